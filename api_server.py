@@ -0,0 +1,228 @@
+"""
+Local HTTP API serving the dashboard's computed datasets
+
+Exposes team stats, league match facts, the actual vs expected league table
+and per-match xPoints over plain HTTP, computed by the same cached functions
+as the dashboard, so other tools never query Snowflake themselves.
+
+Endpoints (GET):
+    /                 Dataset list and current data version
+    /team-stats       Team totals, ranks and per 90 metrics
+    /match-facts      One row per team per match
+    /league-table     Actual vs expected points and positions
+    /xpoints          Match facts with each match's expected points
+
+Every dataset endpoint takes `?team=<name>` to select one team, and
+`?format=arrow` (or `Accept: application/vnd.apache.arrow.stream`) for an
+Arrow IPC stream instead of JSON records. Responses carry an ETag derived
+from the data version, so clients sending If-None-Match get a 304 until the
+data changes, and are gzipped when the client accepts it.
+
+Run it inside the Streamlit server to share the dashboard's caches by setting
+API_PORT (and optionally API_HOST, default 127.0.0.1); it starts with the
+first page load. Or run it on its own with its own cache:
+
+    python api_server.py --port 8502
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import streamlit as st
+
+API_HOST = os.getenv('API_HOST', '127.0.0.1')
+API_PORT = os.getenv('API_PORT')
+
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+JSON_MEDIA_TYPE = 'application/json'
+MAX_CACHED_RESPONSES = 256
+
+# Dataset endpoints and their descriptions
+DATASETS = {
+    'team-stats': "Team totals, ranks and per 90 metrics",
+    'match-facts': "One row per team per match: xG, goals and points for and against",
+    'league-table': "Actual vs expected points and positions",
+    'xpoints': "Match facts with each match's expected points (XPOINTS)",
+}
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_league_xpoints(data_version):
+    """League match facts with expected points per match, one per data version."""
+    from database import get_league_match_data
+    from metrics import expected_points
+
+    df = get_league_match_data().copy()
+    df['XPOINTS'] = expected_points(df['XG_FOR'], df['XG_AGAINST'])
+    return df
+
+
+def load_dataset(data_version, name):
+    """The full frame behind a dataset endpoint."""
+    from database import get_team_stats, get_league_match_data
+    from tables import get_league_table_data
+
+    if name == 'team-stats':
+        return get_team_stats()
+    if name == 'match-facts':
+        return get_league_match_data()
+    if name == 'league-table':
+        return get_league_table_data(data_version)
+    return get_league_xpoints(data_version)
+
+
+def encode_frame(df, fmt, data_version):
+    """DataFrame as JSON records or an Arrow IPC stream."""
+    if fmt == 'json':
+        return df.to_json(orient='records', date_format='iso').encode()
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'data_version': data_version.encode()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+@st.cache_data(max_entries=MAX_CACHED_RESPONSES, show_spinner=False)
+def get_response_body(data_version, name, team, fmt):
+    """
+    Encoded response body and its gzipped form for one dataset request,
+    or None for a team that isn't in the data.
+    """
+    df = load_dataset(data_version, name)
+    if team is not None:
+        if team not in set(df['TEAM'].astype(str)):
+            return None
+        df = df[df['TEAM'] == team].reset_index(drop=True)
+    body = encode_frame(df, fmt, data_version)
+    return body, gzip.compress(body, compresslevel=6)
+
+
+def make_etag(data_version, name, team, fmt, gzipped):
+    """Strong ETag for one representation of a dataset at a data version."""
+    key = f"{data_version}|{name}|{team}|{fmt}"
+    return f'"{hashlib.sha1(key.encode()).hexdigest()[:16]}{"-gz" if gzipped else ""}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value covers the given ETag."""
+    if if_none_match.strip() == '*':
+        return True
+    # Weak comparison, as If-None-Match calls for
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return etag in [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """GET handler for the dataset endpoints."""
+
+    server_version = 'ChampionshipXG-API/1.0'
+
+    def do_GET(self):
+        from database import get_data_version
+
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        name = url.path.strip('/')
+
+        try:
+            data_version = get_data_version()
+        except Exception as e:
+            return self.send_json(503, {'error': f"Data unavailable: {e}"})
+
+        if name == '':
+            return self.send_json(200, {
+                'data_version': data_version,
+                'datasets': {f"/{key}": description for key, description in DATASETS.items()},
+            })
+        if name not in DATASETS:
+            return self.send_json(404, {'error': f"Unknown dataset '{name}'", 'datasets': list(DATASETS)})
+
+        fmt = params.get('format', [None])[0]
+        if fmt is None:
+            fmt = 'arrow' if ARROW_MEDIA_TYPE in self.headers.get('Accept', '') else 'json'
+        if fmt not in ('json', 'arrow'):
+            return self.send_json(400, {'error': "format must be 'json' or 'arrow'"})
+        team = params.get('team', [None])[0]
+
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        etag = make_etag(data_version, name, team, fmt, gzipped)
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept, Accept-Encoding',
+            'X-Data-Version': data_version,
+        }
+
+        # Unchanged data: nothing to compute or send
+        if etag_matches(self.headers.get('If-None-Match', ''), etag):
+            return self.send_body(304, None, headers)
+
+        bodies = get_response_body(data_version, name, team, fmt)
+        if bodies is None:
+            return self.send_json(404, {'error': f"Unknown team '{team}'"})
+        body, gzip_body = bodies
+
+        headers['Content-Type'] = JSON_MEDIA_TYPE if fmt == 'json' else ARROW_MEDIA_TYPE
+        if gzipped:
+            headers['Content-Encoding'] = 'gzip'
+            body = gzip_body
+        self.send_body(200, body, headers)
+
+    def send_body(self, status, body, headers):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if body is not None:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload).encode(), {'Content-Type': JSON_MEDIA_TYPE})
+
+
+def make_server(host, port):
+    """Threaded HTTP server for the API."""
+    return ThreadingHTTPServer((host, port), ApiHandler)
+
+
+@st.cache_resource
+def start_api_server():
+    """
+    Serve the API from a background thread of this process when API_PORT is
+    set, once per process. Requests use the dashboard's own caches.
+    """
+    if not API_PORT:
+        return None
+    server = make_server(API_HOST, int(API_PORT))
+    threading.Thread(target=server.serve_forever, name='api-server', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard's datasets over HTTP.")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=int(API_PORT or 8502))
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
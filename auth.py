@@ -6,8 +6,12 @@ def check_password():
 
     def password_entered():
         """Checks whether a password entered by the user is correct."""
-        if hashlib.sha256(st.session_state["password"].encode()).hexdigest() == st.secrets["password_hash"]:
+        entered_hash = hashlib.sha256(st.session_state["password"].encode()).hexdigest()
+        # The optional admin password also unlocks the profiling panel
+        is_admin = "admin_password_hash" in st.secrets and entered_hash == st.secrets["admin_password_hash"]
+        if entered_hash == st.secrets["password_hash"] or is_admin:
             st.session_state["password_correct"] = True
+            st.session_state["is_admin"] = is_admin
             del st.session_state["password"]  # Don't store the password
         else:
             st.session_state["password_correct"] = False
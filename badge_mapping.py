@@ -2,12 +2,24 @@
 Mapping between team names in database and badge file names
 """
 import os
-from PIL import Image
+import re
+import json
 import base64
 from io import BytesIO
 
 BADGE_DIR = "./Club Badges"
 
+# Optimized badges built by build_badges.py, served by Streamlit static serving
+STATIC_BADGE_DIR = "./static/badges"
+STATIC_BADGE_URL = "app/static/badges"
+BADGE_MANIFEST = os.path.join(STATIC_BADGE_DIR, "manifest.json")
+
+# Pixel size of each badge use in the dashboard
+BADGE_SIZES = {
+    'chart': 64,
+    'sidebar': 120,
+}
+
 # Mapping from database team names to badge filenames
 TEAM_BADGE_MAP = {
     'AFC Wrexham': 'Wrexham_A.F.C._Logo.svg.png',
@@ -36,6 +48,10 @@ TEAM_BADGE_MAP = {
     'West Bromwich Albion': 'West_Bromwich_Albion.svg.png',
 }
 
+def slugify(team):
+    """File-system friendly team name, shared by badge files and report directories."""
+    return re.sub(r'[^a-z0-9]+', '_', team.lower()).strip('_')
+
 def get_badge_path(team_name):
     """Get the full path to a team's badge file."""
     badge_filename = TEAM_BADGE_MAP.get(team_name)
@@ -54,8 +70,28 @@ def get_all_badges():
             badges[team] = path
     return badges
 
+def load_badge_manifest():
+    """Manifest of built badge files, or None if build_badges.py hasn't been run."""
+    try:
+        with open(BADGE_MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def get_badge_url(team_name, use='chart', manifest=None):
+    """Static URL of a team's optimized badge for the given use, or None if not built."""
+    manifest = manifest or load_badge_manifest()
+    if not manifest:
+        return None
+    filename = manifest['badges'].get(team_name, {}).get(str(BADGE_SIZES[use]))
+    if filename:
+        return f"{STATIC_BADGE_URL}/{filename}"
+    return None
+
 def image_to_base64(image_path, size=(30, 30)):
     """Convert image to base64 for Plotly."""
+    from PIL import Image
+
     try:
         img = Image.open(image_path)
         img = img.resize(size, Image.Resampling.LANCZOS)
@@ -0,0 +1,289 @@
+"""
+Benchmarks for the compute and rendering hot paths
+
+Runs without Snowflake on synthetic data shaped like the query results, at
+multiples of the current data volume (24 teams, 46 matches per team):
+
+- expected_points: metrics.expected_points for one team's season
+- match_post_processing: database.add_team_perspective on one team's matches
+- team_ranks: database.add_team_ranks on the team stats
+- league_table: metrics.build_league_table (the League Table tab)
+- scatter_figure, trend_figures, pizza_figure, form_strip: chart construction
+
+Results are compared with the stored baseline and reported as percentage
+changes (positive = slower). Cases whose estimated time at a larger volume
+exceeds --max-seconds are skipped and reported with the estimate.
+
+Usage:
+    python -m benchmarks.bench_hot_paths
+    python -m benchmarks.bench_hot_paths --scales 1,10 --max-regression 20
+    python -m benchmarks.bench_hot_paths --save-baseline
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from charts import build_team_scatter, build_rolling_figure, build_ppg_figure, build_pizza_figure, build_form_strip
+from database import add_team_ranks, add_team_perspective
+from metrics import (
+    expected_points, add_percentiles, build_league_table,
+    form_results, team_match_data
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_hot_paths.json')
+
+TEAMS = 24
+MATCHES_PER_TEAM = 46
+SCALES = [1, 10, 100]
+MAX_SECONDS = 60
+# Cases faster than this are repeated and the best run kept
+REPEAT_BELOW_SECONDS = 1.0
+REPEATS = 5
+
+
+def make_team_stats(n_teams, seed=0):
+    """Synthetic team stats shaped like the get_team_stats query result, before ranks."""
+    rng = np.random.default_rng(seed)
+    matches = MATCHES_PER_TEAM
+    df = pd.DataFrame({
+        'TEAM': [f"Team {i}" for i in range(n_teams)],
+        'MATCHES_PLAYED': matches,
+        'TOTAL_POINTS': rng.integers(30, 100, n_teams),
+        'GOALS': rng.integers(35, 90, n_teams),
+        'SET_PIECE_GOALS': rng.integers(5, 20, n_teams),
+        'GOALS_AGAINST': rng.integers(35, 90, n_teams),
+        'SET_PIECE_GOALS_AGAINST': rng.integers(5, 20, n_teams),
+        'XG': rng.normal(60, 10, n_teams).clip(30),
+        'XGA': rng.normal(60, 10, n_teams).clip(30),
+    })
+    df['POINTS_PER_GAME'] = df['TOTAL_POINTS'] / matches
+    df['SET_PIECE_XG'] = df['XG'] * rng.uniform(0.2, 0.35, n_teams)
+    df['SET_PIECE_XGA'] = df['XGA'] * rng.uniform(0.2, 0.35, n_teams)
+    df['OPEN_PLAY_XG'] = df['XG'] - df['SET_PIECE_XG']
+    df['OPEN_PLAY_XGA'] = df['XGA'] - df['SET_PIECE_XGA']
+    df['OPEN_PLAY_GOALS'] = df['GOALS'] - df['SET_PIECE_GOALS']
+    df['OPEN_PLAY_GOALS_AGAINST'] = df['GOALS_AGAINST'] - df['SET_PIECE_GOALS_AGAINST']
+    df['XG_PER_90'] = df['XG'] / matches
+    df['XGA_PER_90'] = df['XGA'] / matches
+    df['XG_CONVERSION'] = df['GOALS'] / df['XG']
+    df['XGA_CONVERSION'] = df['GOALS_AGAINST'] / df['XGA']
+    df['XGD'] = df['XG'] - df['XGA']
+    df['XGD_PER_90'] = df['XGD'] / matches
+    return df
+
+
+def make_team_matches(n_matches, seed=0):
+    """Synthetic get_match_by_match_data query result for one team, before post-processing."""
+    rng = np.random.default_rng(seed)
+    venue = np.where(np.arange(n_matches) % 2 == 0, 'H', 'A')
+    opponents = [f"Team {i % (TEAMS - 1) + 1}" for i in range(n_matches)]
+    return pd.DataFrame({
+        'matchId': np.arange(n_matches),
+        'dateTime': pd.date_range('2000-08-01', periods=n_matches, freq='7D'),
+        'homeSquadName': np.where(venue == 'H', 'Team 0', opponents),
+        'awaySquadName': np.where(venue == 'H', opponents, 'Team 0'),
+        'OPPONENT': opponents,
+        'VENUE': venue,
+        'HOME_XG': rng.gamma(3, 0.45, n_matches),
+        'HOME_GOALS': rng.poisson(1.4, n_matches),
+        'AWAY_XG': rng.gamma(3, 0.4, n_matches),
+        'AWAY_GOALS': rng.poisson(1.2, n_matches),
+    })
+
+
+def make_league_matches(n_teams, n_matches, seed=0):
+    """Synthetic get_league_match_data result: one row per team per match."""
+    rng = np.random.default_rng(seed)
+    rows = n_teams * n_matches
+    team_idx = np.repeat(np.arange(n_teams), n_matches)
+    goals_for = rng.poisson(1.3, rows)
+    goals_against = rng.poisson(1.3, rows)
+    return pd.DataFrame({
+        'matchId': np.arange(rows),
+        'dateTime': np.tile(pd.date_range('2000-08-01', periods=n_matches, freq='7D'), n_teams),
+        'TEAM': [f"Team {i}" for i in team_idx],
+        'OPPONENT': [f"Team {(i + 1) % n_teams}" for i in team_idx],
+        'VENUE': np.where(np.arange(rows) % 2 == 0, 'H', 'A'),
+        'XG_FOR': rng.gamma(3, 0.43, rows),
+        'XG_AGAINST': rng.gamma(3, 0.43, rows),
+        'GOALS_FOR': goals_for,
+        'GOALS_AGAINST': goals_against,
+        'POINTS': np.select([goals_for > goals_against, goals_for == goals_against], [3, 1], 0),
+        'match_number': np.tile(np.arange(1, n_matches + 1), n_teams),
+    })
+
+
+# Each case: setup(scale) -> state, untimed; run(state), timed
+
+def setup_expected_points(scale):
+    matches = make_team_matches(MATCHES_PER_TEAM * scale)
+    # Import scipy here so the first scale doesn't time it
+    expected_points([1.0], [1.0])
+    return matches['HOME_XG'].to_numpy(), matches['AWAY_XG'].to_numpy()
+
+
+def run_expected_points(xg):
+    expected_points(*xg)
+
+
+def setup_match_post_processing(scale):
+    return make_team_matches(MATCHES_PER_TEAM * scale)
+
+
+def run_match_post_processing(matches):
+    add_team_perspective(matches.copy())
+
+
+def setup_team_ranks(scale):
+    return make_team_stats(TEAMS * scale)
+
+
+def run_team_ranks(team_stats):
+    add_team_ranks(team_stats.copy())
+
+
+def setup_league_table(scale):
+    league_matches = make_league_matches(TEAMS, MATCHES_PER_TEAM * scale)
+    match_data_by_team = {team: team_match_data(league_matches, team) for team in league_matches['TEAM'].unique()}
+    return add_team_ranks(make_team_stats(TEAMS)), match_data_by_team
+
+
+def run_league_table(state):
+    build_league_table(*state)
+
+
+def setup_scatter_figure(scale):
+    return add_team_ranks(make_team_stats(TEAMS * scale))
+
+
+def run_scatter_figure(team_stats):
+    build_team_scatter(
+        team_stats, 'XG_PER_90', 'XGA_PER_90', 'Team 0',
+        x_title="xG Per 90", y_title="xGA Per 90", hover_labels=("xG/90", "xGA/90")
+    ).to_json()
+
+
+def setup_trend_figures(scale):
+    match_data = add_team_perspective(make_team_matches(MATCHES_PER_TEAM * scale))
+    # Same columns as add_points_progression, without timing xPoints again
+    match_data['xpoints'] = 1.3
+    match_data['cumulative_points'] = match_data['POINTS'].cumsum()
+    match_data['ppg'] = match_data['cumulative_points'] / match_data['match_number']
+    match_data['cumulative_xpoints'] = match_data['xpoints'].cumsum()
+    match_data['xppg'] = match_data['cumulative_xpoints'] / match_data['match_number']
+    return match_data
+
+
+def run_trend_figures(match_data):
+    build_rolling_figure(match_data).to_json()
+    build_ppg_figure(match_data).to_json()
+
+
+def setup_pizza_figure(scale):
+    return add_percentiles(make_team_stats(TEAMS * scale)).iloc[0]
+
+
+def run_pizza_figure(team_row):
+    build_pizza_figure(team_row, '#4A90E2').to_json()
+
+
+def setup_form_strip(scale):
+    return form_results(make_league_matches(TEAMS, MATCHES_PER_TEAM * scale))
+
+
+def run_form_strip(form):
+    build_form_strip(form['teams'], form['points'], form['result'], form['hover_text']).to_json()
+
+
+CASES = {
+    'expected_points': (setup_expected_points, run_expected_points),
+    'match_post_processing': (setup_match_post_processing, run_match_post_processing),
+    'team_ranks': (setup_team_ranks, run_team_ranks),
+    'league_table': (setup_league_table, run_league_table),
+    'scatter_figure': (setup_scatter_figure, run_scatter_figure),
+    'trend_figures': (setup_trend_figures, run_trend_figures),
+    'pizza_figure': (setup_pizza_figure, run_pizza_figure),
+    'form_strip': (setup_form_strip, run_form_strip),
+}
+
+def time_case(state, run):
+    """Best wall time in ms; fast cases are repeated to reduce noise."""
+    start = time.perf_counter()
+    run(state)
+    best = time.perf_counter() - start
+    if best < REPEAT_BELOW_SECONDS:
+        for _ in range(REPEATS - 1):
+            start = time.perf_counter()
+            run(state)
+            best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compute and rendering hot paths.")
+    parser.add_argument('--scales', default=','.join(str(s) for s in SCALES), help="Data volume multiples")
+    parser.add_argument('--cases', default=','.join(CASES), help="Comma separated cases to run")
+    parser.add_argument('--max-seconds', type=float, default=MAX_SECONDS,
+                        help="Skip a case at a volume estimated to take longer than this")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the baseline")
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help="Exit with an error if any case is this many percent slower than baseline")
+    args = parser.parse_args()
+
+    scales = sorted(int(s) for s in args.scales.split(','))
+    cases = [case.strip() for case in args.cases.split(',')]
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    print(f"{'Case':<24} {'Scale':>6} {'Time ms':>10} {'Baseline':>10} {'Change':>8}")
+    for case in cases:
+        setup, run = CASES[case]
+        results[case] = {}
+        previous = None
+        for scale in scales:
+            # Cost grows at least linearly with volume; skip cases that would run too long
+            if previous is not None:
+                estimate_ms = previous[1] * scale / previous[0]
+                if estimate_ms > args.max_seconds * 1000:
+                    print(f"{case:<24} {scale:>5}x {'skipped':>10}   (estimated {estimate_ms / 1000:.0f}s)")
+                    continue
+
+            ms = time_case(setup(scale), run)
+            results[case][str(scale)] = round(ms, 2)
+            previous = (scale, ms)
+
+            base_ms = baseline.get(case, {}).get(str(scale))
+            if base_ms:
+                change = (ms - base_ms) / base_ms * 100
+                print(f"{case:<24} {scale:>5}x {ms:>10.1f} {base_ms:>10.1f} {change:>+7.1f}%")
+                if args.max_regression is not None and change > args.max_regression:
+                    regressions.append(f"{case} at {scale}x: {change:+.1f}%")
+            else:
+                print(f"{case:<24} {scale:>5}x {ms:>10.1f} {'-':>10} {'-':>8}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nSaved baseline to {BASELINE_PATH}")
+
+    if regressions:
+        print(f"\nRegressions over {args.max_regression}%:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Live matchday update time, and a check that the updates add up
+
+Generates events for one or more seasons, holds the last rounds back as a
+replay feed (generate_events.split_live_rounds) and serves the rest from the
+local backend. Then replays the feed through live mode (live.py) a poll at a
+time, as a matchday would, and times each update: applying the polled totals
+to the live matchday index, re-ranking and publishing the revision. For
+comparison it also times what live mode avoids: rebuilding the team stats
+from the match facts, and querying them from every event.
+
+Once the feed is exhausted the live team stats, which cover the last season,
+must equal the team stats queried from every event of that season, held back
+rounds included; the run fails if any column differs.
+
+Usage:
+    python -m benchmarks.bench_live
+    python -m benchmarks.bench_live --seasons 20 --live-rounds 2 --events-per-poll 1000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from generate_events import generate_events, split_live_rounds, write_snapshot
+from metrics import season_of
+
+EVENTS_PER_POLL = 2500
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time live matchday updates and check them against a full query.")
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--live-rounds', type=int, default=1, help="Rounds replayed through live mode")
+    parser.add_argument('--events-per-poll', type=int, default=EVENTS_PER_POLL)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        events = generate_events(seasons=args.seasons)
+        snapshot, feed = split_live_rounds(events, args.live_rounds)
+        seasons = season_of(events.column('dateTime').to_pandas())
+        last_season = events.filter(seasons == seasons.max())
+        paths = {name: os.path.join(data_dir, f"{name}.feather") for name in ['last_season', 'snapshot', 'feed']}
+        for name, table in [('last_season', last_season), ('snapshot', snapshot), ('feed', feed)]:
+            write_snapshot(table, paths[name])
+
+        # Must be set before live and database are imported
+        os.environ['DATA_BACKEND'] = 'local'
+        os.environ['LOCAL_SNAPSHOT_PATH'] = paths['snapshot']
+        os.environ['LIVE_FEED_PATH'] = paths['feed']
+        os.environ['LIVE_REPLAY_EVENTS'] = str(args.events_per_poll)
+        os.environ['LIVE_POLL_SECONDS'] = '0'
+        os.environ['DISK_CACHE_DIR'] = ''
+        os.environ['ANALYTICS_BUNDLE_DIR'] = ''
+
+        import live
+        from database import get_data_version, fetch_league_match_data, get_team_stats_as_of, add_team_ranks, compact_team_stats
+        from local_backend import query_team_stats
+        from metrics import matchday_index, team_stats_as_of
+
+        data_version = get_data_version()
+        start = time.perf_counter()
+        state = live.get_live_state(data_version)
+        state_seconds = time.perf_counter() - start
+
+        update_ms = []
+        while state['watermark'] < feed.num_rows:
+            view = live.poll_live(data_version)
+            update_ms.append(view['update_ms'])
+
+        match_facts = fetch_league_match_data()
+        start = time.perf_counter()
+        index = matchday_index(match_facts)
+        compact_team_stats(add_team_ranks(team_stats_as_of(index, index['matchdays'])))
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        live_stats = get_team_stats_as_of(view['version'], view['matchday']).sort_values('TEAM').reset_index(drop=True)
+        start = time.perf_counter()
+        full_stats = (
+            compact_team_stats(add_team_ranks(query_team_stats(paths['last_season'])))
+            .sort_values('TEAM').reset_index(drop=True)
+        )
+        query_ms = (time.perf_counter() - start) * 1000
+
+    mismatched = [
+        col for col in full_stats.columns
+        if col != 'TEAM' and not np.allclose(live_stats[col].astype(float), full_stats[col].astype(float), atol=1e-3)
+    ]
+
+    print(f"{args.seasons} season(s), {args.live_rounds} live round(s): {feed.num_rows:,} events "
+          f"in {len(update_ms)} polls of {args.events_per_poll:,}")
+    print(f"Live state set up in {state_seconds:.2f}s (once per data version and process)")
+    print(f"{'Update':<26} {'ms':>8}")
+    print(f"{'Median':<26} {statistics.median(update_ms):>8.2f}")
+    print(f"{'p90':<26} {np.percentile(update_ms, 90):>8.2f}")
+    print(f"{'Max':<26} {max(update_ms):>8.2f}")
+    print(f"{'Rebuild from match facts':<26} {rebuild_ms:>8.2f}")
+    print(f"{'Query the season events':<26} {query_ms:>8.2f}")
+
+    if list(live_stats['TEAM']) != list(full_stats['TEAM']) or mismatched:
+        print(f"\nLive team stats differ from the full query: {mismatched}")
+        sys.exit(1)
+    print("\nLive team stats match the full query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Warm rerun time of one dashboard tab, and what each cache hit costs
+
+Runs app.py headlessly with Streamlit's AppTest against the local data
+backend (DATA_BACKEND=local), logs in, opens a tab and reruns it until the
+caches are warm, then times further reruns with nothing changed, as when a
+user interacts with a widget on that tab. Rerun times come from the app's own
+profiling spans (the session is marked admin), so they cover the script run
+alone and not AppTest's polling around it.
+
+Also times single hits on the cached dataset functions a rerun reads from,
+which is where cache_data's per-hit unpickling shows up.
+
+Usage:
+    python -m benchmarks.bench_rerun
+    python -m benchmarks.bench_rerun --tab "📈 Match Trends" --reruns 50
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.load_test import DEFAULT_SNAPSHOT, LEAGUE_TABLE, Session
+from profiling import PROFILE_KEY
+
+WARMUP_RERUNS = 3
+RERUNS = 30
+HITS = 200
+
+
+def cache_hit_functions(data_version, team):
+    """The cached data reads a rerun makes, as name and zero-argument call."""
+    from database import get_team_stats, get_league_match_data, get_match_by_match_data
+    from tables import get_league_table, get_team_stat_tables
+
+    return {
+        'get_team_stats': get_team_stats,
+        'get_league_match_data': get_league_match_data,
+        'get_match_by_match_data': lambda: get_match_by_match_data(team),
+        'get_league_table': lambda: get_league_table(data_version),
+        'get_team_stat_tables': lambda: get_team_stat_tables(data_version),
+    }
+
+
+def time_hits(func, hits):
+    """Mean microseconds per call of an already cached function."""
+    func()
+    start = time.perf_counter()
+    for _ in range(hits):
+        func()
+    return (time.perf_counter() - start) / hits * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time warm reruns of a dashboard tab and cache hits.")
+    parser.add_argument('--tab', default=LEAGUE_TABLE, help="Tab label as shown in app.py")
+    parser.add_argument('--reruns', type=int, default=RERUNS)
+    parser.add_argument('--hits', type=int, default=HITS, help="Calls per cache hit timing")
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT, help="Local event snapshot to serve")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.snapshot):
+        from generate_events import generate_events, write_snapshot
+        print(f"Generating a one-season snapshot at {args.snapshot}")
+        write_snapshot(generate_events(), args.snapshot)
+
+    # Must be set before the app imports database
+    os.environ['DATA_BACKEND'] = 'local'
+    os.environ['LOCAL_SNAPSHOT_PATH'] = args.snapshot
+    os.environ['DISK_CACHE_DIR'] = ''
+    os.environ['ANALYTICS_BUNDLE_DIR'] = ''
+
+    session = Session(random.Random(0))
+    session.login()
+    # Records profiling spans for every rerun
+    session.at.session_state['is_admin'] = True
+    session.open_tab(args.tab)
+    for _ in range(WARMUP_RERUNS):
+        session.timed(session.at.run)
+    if session.errors:
+        raise SystemExit(f"The app raised: {[e.message for e in session.at.exception]}")
+
+    spans = {}
+    rerun_ms = []
+    for _ in range(args.reruns):
+        session.at.run()
+        rerun = session.at.session_state[PROFILE_KEY]['history'][-1]
+        rerun_ms.append(rerun['duration'] * 1000)
+        for span in rerun['spans']:
+            if span['depth'] == 0:
+                spans.setdefault(span['name'], []).append(span['duration'] * 1000)
+    rerun_ms = np.array(rerun_ms)
+
+    from database import get_data_version
+    team = session.at.selectbox(key='selected_team').value
+    hits = {
+        name: time_hits(func, args.hits)
+        for name, func in cache_hit_functions(get_data_version(), team).items()
+    }
+
+    print(f"{args.tab}: {args.reruns} warm reruns")
+    print(f"{'Section':<26} {'Median ms':>10} {'p90 ms':>8}")
+    print(f"{'Whole rerun':<26} {statistics.median(rerun_ms):>10.1f} {np.percentile(rerun_ms, 90):>8.1f}")
+    for name, times in spans.items():
+        print(f"{name:<26} {statistics.median(times):>10.1f} {np.percentile(times, 90):>8.1f}")
+    print("")
+    print(f"{'Cache hit':<26} {'µs per call':>12}")
+    for name, us in hits.items():
+        print(f"{name:<26} {us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark for the League Overview scatter builders
+
+Compares the old one-trace-per-team construction with the batched
+single-trace builder in charts.py, reporting build time and the size of the
+serialized Plotly JSON sent to the browser.
+
+Run from the repository root:
+    python -m benchmarks.bench_scatter
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from PIL import Image
+
+from badge_mapping import get_all_badges, image_to_base64
+from charts import build_team_scatter
+
+POINT_COUNTS = [24, 96, 480]
+# The per-trace builder re-encodes full-size badges and is too slow past this
+PER_TRACE_MAX_POINTS = 96
+REPEATS = 3
+
+
+def make_team_seasons(n_points, seed=0):
+    """Synthetic team-season frame with realistic xG per 90 values."""
+    rng = np.random.default_rng(seed)
+    teams = sorted(get_all_badges()) or [f"Team {i}" for i in range(24)]
+    team_names = [teams[i % len(teams)] for i in range(n_points)]
+    seasons = [f"{2025 - i // len(teams)}/{(26 - i // len(teams)) % 100:02d}" for i in range(n_points)]
+    return pd.DataFrame({
+        'TEAM': team_names,
+        'SEASON_LABEL': [f"{team} {season}" for team, season in zip(team_names, seasons)],
+        'XG_PER_90': rng.normal(1.35, 0.25, n_points).clip(0.5),
+        'XGA_PER_90': rng.normal(1.35, 0.25, n_points).clip(0.5),
+    })
+
+
+def build_per_trace_scatter(df, selected_team, badge_paths):
+    """The previous construction: one trace and one layout image per point."""
+    fig = go.Figure()
+    xg_range = df['XG_PER_90'].max() - df['XG_PER_90'].min()
+    xga_range = df['XGA_PER_90'].max() - df['XGA_PER_90'].min()
+    badge_size = min(xg_range, xga_range) * 0.08
+
+    for _, row in df.iterrows():
+        team_name = row['TEAM']
+        badge_path = badge_paths.get(team_name)
+        if badge_path:
+            fig.add_layout_image(dict(
+                source=Image.open(badge_path),
+                x=row['XG_PER_90'], y=row['XGA_PER_90'],
+                xref="x", yref="y", sizex=badge_size, sizey=badge_size,
+                xanchor="center", yanchor="middle", layer="above"
+            ))
+        fig.add_trace(go.Scatter(
+            x=[row['XG_PER_90']],
+            y=[row['XGA_PER_90']],
+            mode='markers',
+            marker=dict(size=50 if team_name == selected_team else 35, color='rgba(0,0,0,0)', line=dict(width=0)),
+            hovertemplate=f'<b>{team_name}</b><br>xG/90: {row["XG_PER_90"]:.2f}<br>xGA/90: {row["XGA_PER_90"]:.2f}<extra></extra>',
+            showlegend=False,
+            name=team_name
+        ))
+    return fig
+
+
+def time_build(build):
+    """Median build time in ms, serialized payload size in KB and trace count."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fig = build()
+        timings.append(time.perf_counter() - start)
+    payload = len(fig.to_json())
+    return float(np.median(timings)) * 1000, payload / 1024, len(fig.data)
+
+
+def main():
+    badge_paths = get_all_badges()
+    badge_images = {team: image_to_base64(path, size=(64, 64)) for team, path in badge_paths.items()}
+
+    print(f"{'points':>7} {'builder':<12} {'build ms':>10} {'payload KB':>12} {'traces':>7}")
+    for n_points in POINT_COUNTS:
+        df = make_team_seasons(n_points)
+        selected_team = df['TEAM'].iloc[0]
+
+        legacy = lambda: build_per_trace_scatter(df, selected_team, badge_paths)
+        batched = lambda: build_team_scatter(
+            df, 'XG_PER_90', 'XGA_PER_90', selected_team,
+            x_title="xG Per 90", y_title="xGA Per 90",
+            hover_labels=("xG/90", "xGA/90"),
+            badges=badge_images, label_col='SEASON_LABEL'
+        )
+
+        builders = [('per-trace', legacy), ('batched', batched)]
+        if n_points > PER_TRACE_MAX_POINTS:
+            builders = builders[1:]
+
+        for name, build in builders:
+            build_ms, payload_kb, n_traces = time_build(build)
+            print(f"{n_points:>7} {name:<12} {build_ms:>10.1f} {payload_kb:>12.1f} {n_traces:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Shared cache fill test: many replicas missing the same entry at once
+
+Starts several processes ("replicas") sharing one disk cache directory. For
+each of a few data versions they all ask for the same slow result at the same
+moment, as replicas do after a data refresh. The lease in disk_cache should
+let exactly one replica fill each version while the others wait and read it.
+
+Reported per data version: how many replicas ran the fill (should be 1), and
+the fastest and slowest time a replica took to get the result.
+
+Usage:
+    python -m benchmarks.bench_shared_cache
+    python -m benchmarks.bench_shared_cache --replicas 16 --versions 5 --fill-seconds 2
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import disk_cache
+from disk_cache import disk_cached
+
+FILL_LOG = 'fills.log'
+
+
+@disk_cached(scope='bench_shared_cache')
+def slow_result(data_version, fill_seconds, log_path):
+    """Stands in for a warehouse query: logs who ran it, then takes fill_seconds."""
+    with open(log_path, 'a') as f:
+        f.write(f"{data_version} {os.getpid()}\n")
+    time.sleep(fill_seconds)
+    return pd.DataFrame({'data_version': [data_version] * 100, 'value': np.arange(100)})
+
+
+def replica(cache_dir, versions, fill_seconds, barrier):
+    """One replica: fetch every version in turn, starting each with the others."""
+    disk_cache.DISK_CACHE_DIR = cache_dir
+    log_path = os.path.join(cache_dir, FILL_LOG)
+    timings = {}
+    for version in versions:
+        barrier.wait()
+        start = time.perf_counter()
+        df = slow_result(version, fill_seconds, log_path)
+        timings[version] = time.perf_counter() - start
+        assert df['data_version'].iloc[0] == version
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that replicas sharing a cache fill each entry once.")
+    parser.add_argument('--replicas', type=int, default=8)
+    parser.add_argument('--versions', type=int, default=3, help="Data versions to fetch in turn")
+    parser.add_argument('--fill-seconds', type=float, default=1.0, help="How long one fill takes")
+    args = parser.parse_args()
+
+    versions = [f"v{i + 1}" for i in range(args.versions)]
+    with tempfile.TemporaryDirectory() as cache_dir, multiprocessing.Manager() as manager:
+        barrier = manager.Barrier(args.replicas)
+        with ProcessPoolExecutor(max_workers=args.replicas) as pool:
+            futures = [
+                pool.submit(replica, cache_dir, versions, args.fill_seconds, barrier)
+                for _ in range(args.replicas)
+            ]
+            timings = [future.result() for future in futures]
+        with open(os.path.join(cache_dir, FILL_LOG)) as f:
+            fills = Counter(line.split()[0] for line in f)
+
+    print(f"{args.replicas} replicas, fill takes {args.fill_seconds:.1f}s")
+    print(f"{'Version':<9} {'Fills':>6} {'Fastest s':>10} {'Slowest s':>10}")
+    for version in versions:
+        times = [replica_timings[version] for replica_timings in timings]
+        print(f"{version:<9} {fills[version]:>6} {min(times):>10.2f} {max(times):>10.2f}")
+
+    if any(fills[version] != 1 for version in versions):
+        print("\nSome versions were filled more than once")
+        sys.exit(1)
+    print("\nEvery version filled exactly once")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Cold-start timing for the dashboard, checked against a budget
+
+Each measurement runs in a fresh Python process so nothing is already
+imported, as on a container that has scaled to zero:
+
+- streamlit_import_ms: importing Streamlit itself (for reference, not budgeted)
+- login_screen_ms: running app.py up to the password screen (first paint)
+- dashboard_import_ms: importing the dashboard modules loaded after login
+
+The run fails if the password screen pulls in any of the heavy modules
+(pandas, scipy, Snowflake connector, cryptography) or a timing goes over its
+budget in benchmarks/startup_budget.json.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --update-budget   # after an intended change
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(REPO_ROOT, 'benchmarks', 'startup_budget.json')
+
+REPEATS = 5
+# Budget written by --update-budget, relative to the measured median
+BUDGET_HEADROOM = 1.5
+
+# Must not be imported before the user has logged in
+HEAVY_MODULES = ['pandas', 'scipy', 'snowflake.connector', 'cryptography']
+
+STREAMLIT_IMPORT = """
+import json, time
+start = time.perf_counter()
+import streamlit
+print(json.dumps({'ms': (time.perf_counter() - start) * 1000}))
+"""
+
+LOGIN_SCREEN = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+import preload
+# The background data load is off the critical path and needs Snowflake
+preload.preload_data = lambda: None
+already_loaded = set(sys.modules)
+start = time.perf_counter()
+at = AppTest.from_file('app.py', default_timeout=60)
+at.secrets['password_hash'] = '0' * 64
+at.run()
+ms = (time.perf_counter() - start) * 1000
+assert len(at.text_input) == 1 and not at.exception, 'password screen did not render'
+loaded = [m for m in HEAVY if m in sys.modules and m not in already_loaded]
+print(json.dumps({'ms': ms, 'heavy_loaded': loaded}))
+"""
+
+DASHBOARD_IMPORT = """
+import json, time
+import streamlit
+start = time.perf_counter()
+import pandas, numpy
+import database, figures, tables
+print(json.dumps({'ms': (time.perf_counter() - start) * 1000}))
+"""
+
+
+def run_fresh(code):
+    """Run a snippet in a new interpreter from the repo root and return its JSON output."""
+    code = f"HEAVY = {HEAVY_MODULES!r}\n" + code
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(code, repeats=REPEATS):
+    """Median of several fresh-process runs, plus the last run's extra fields."""
+    runs = [run_fresh(code) for _ in range(repeats)]
+    summary = dict(runs[-1])
+    summary['ms'] = statistics.median(run['ms'] for run in runs)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dashboard cold start against a budget.")
+    parser.add_argument('--update-budget', action='store_true', help="Write a new budget from this run")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="Fresh-process runs per measurement")
+    args = parser.parse_args()
+
+    results = {
+        'streamlit_import_ms': measure(STREAMLIT_IMPORT, args.repeats),
+        'login_screen_ms': measure(LOGIN_SCREEN, args.repeats),
+        'dashboard_import_ms': measure(DASHBOARD_IMPORT, args.repeats),
+    }
+
+    if args.update_budget:
+        budget = {
+            name: round(result['ms'] * BUDGET_HEADROOM)
+            for name, result in results.items() if name != 'streamlit_import_ms'
+        }
+        with open(BUDGET_PATH, 'w') as f:
+            json.dump(budget, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Wrote {BUDGET_PATH}")
+
+    with open(BUDGET_PATH) as f:
+        budget = json.load(f)
+
+    failures = []
+    print(f"{'Measurement':<22} {'Median ms':>10} {'Budget ms':>10}")
+    for name, result in results.items():
+        limit = budget.get(name)
+        print(f"{name:<22} {result['ms']:>10.0f} {limit if limit is not None else '-':>10}")
+        if limit is not None and result['ms'] > limit:
+            failures.append(f"{name} took {result['ms']:.0f}ms, budget is {limit}ms")
+
+    heavy_loaded = results['login_screen_ms']['heavy_loaded']
+    if heavy_loaded:
+        failures.append(f"password screen imported {', '.join(heavy_loaded)}")
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nStartup within budget")
+
+
+if __name__ == "__main__":
+    main()
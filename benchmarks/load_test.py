@@ -0,0 +1,271 @@
+"""
+Concurrent-session load test for the dashboard
+
+Drives many simulated sessions through app.py headlessly with Streamlit's
+AppTest, all in one process so they share the data and figure caches as
+sessions on one server do. Each session logs in through the password screen
+and then follows a scenario of tab switches and team changes.
+
+Sessions run in concurrent threads, but AppTest swaps Streamlit's global
+runtime on every run, so script runs themselves take turns behind a lock.
+That matches a server whose reruns are bound by the GIL. Latency is measured
+from the moment a session asks for a rerun, so it includes time spent queued
+behind other sessions; service time is the rerun alone.
+
+Runs against the local data backend (DATA_BACKEND=local), generating a
+one-season snapshot with generate_events.py if none exists. Caches are
+cleared before each scenario so every scenario starts cold.
+
+Reported per scenario:
+- p50/p95/p99 and max rerun latency over every action of every session,
+  and the mean service time
+- peak resident memory of the process while the scenario ran
+- warehouse queries issued (calls into the three data queries)
+
+Usage:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --sessions 30 --scenarios comparison
+    python -m benchmarks.load_test --snapshot data/impect_events.parquet --json results.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, 'app.py')
+DEFAULT_SNAPSHOT = os.path.join(REPO_ROOT, 'data', 'impect_events.parquet')
+
+PASSWORD = 'load-test'
+SESSIONS = 30
+RSS_SAMPLE_SECONDS = 0.05
+
+# AppTest is not thread-safe, script runs take turns
+RUN_LOCK = threading.Lock()
+
+# Tab labels as shown in app.py
+LEAGUE_OVERVIEW = "📊 League Overview"
+MATCH_TRENDS = "📈 Match Trends"
+LEAGUE_TABLE = "🏆 League Table"
+TEAM_COMPARISON = "⚖️ Team Comparison"
+
+QUERY_FUNCTIONS = ['query_team_stats', 'query_team_matches', 'query_league_matches', 'query_shot_quality']
+
+
+class Session:
+    """One simulated user: an AppTest plus the latency of every rerun it triggered."""
+
+    def __init__(self, rng):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = rng
+        self.at = AppTest.from_file(APP_PATH, default_timeout=300)
+        self.at.secrets['password_hash'] = hashlib.sha256(PASSWORD.encode()).hexdigest()
+        self.latencies = []
+        self.service_times = []
+        self.errors = 0
+
+    def timed(self, action):
+        """Run one rerun-triggering action and record how long it took, queueing included."""
+        requested = time.perf_counter()
+        with RUN_LOCK:
+            started = time.perf_counter()
+            action()
+        finished = time.perf_counter()
+        self.latencies.append(finished - requested)
+        self.service_times.append(finished - started)
+        self.errors += len(self.at.exception)
+
+    def teams(self):
+        return self.at.selectbox(key='selected_team').options
+
+    def login(self):
+        self.timed(self.at.run)
+        self.timed(lambda: self.at.text_input(key='password').input(PASSWORD).run())
+
+    def open_tab(self, label):
+        self.at.session_state['active_tab'] = label
+        self.timed(self.at.run)
+
+    def select(self, key, team=None):
+        team = team or self.rng.choice(self.teams())
+        self.timed(lambda: self.at.selectbox(key=key).select(team).run())
+
+
+def scenario_matchday_browse(session):
+    """Look through every tab, pick another team, look through them again."""
+    session.login()
+    for tab in [MATCH_TRENDS, LEAGUE_TABLE, TEAM_COMPARISON, LEAGUE_OVERVIEW]:
+        session.open_tab(tab)
+    session.select('selected_team')
+    for tab in [MATCH_TRENDS, LEAGUE_TABLE, TEAM_COMPARISON]:
+        session.open_tab(tab)
+
+
+def scenario_team_switching(session):
+    """Flick between teams on the overview and trends tabs."""
+    session.login()
+    for _ in range(4):
+        session.select('selected_team')
+    session.open_tab(MATCH_TRENDS)
+    for _ in range(4):
+        session.select('selected_team')
+
+
+def scenario_comparison(session):
+    """Build several team comparisons, including the all-teams form view."""
+    session.login()
+    session.open_tab(TEAM_COMPARISON)
+    for _ in range(3):
+        for key in ['compare_1', 'compare_2', 'compare_3']:
+            session.select(key)
+    session.timed(lambda: session.at.toggle(key='form_all_teams').set_value(True).run())
+
+
+SCENARIOS = {
+    'matchday_browse': scenario_matchday_browse,
+    'team_switching': scenario_team_switching,
+    'comparison': scenario_comparison,
+}
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB (peak so far where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        # ru_maxrss is KB on Linux, bytes on macOS
+        scale = 1e6 if sys.platform == 'darwin' else 1e3
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class PeakRSS:
+    """Sample resident memory in a background thread and keep the peak."""
+
+    def __enter__(self):
+        self.peak = current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+
+def count_queries(counter):
+    """Wrap the local backend queries so every call is counted as a warehouse query."""
+    import local_backend
+
+    for name in QUERY_FUNCTIONS:
+        query = getattr(local_backend, name)
+
+        def counted(*args, _query=query, _name=name, **kwargs):
+            counter[_name] += 1
+            return _query(*args, **kwargs)
+
+        setattr(local_backend, name, counted)
+
+
+def run_scenario(name, sessions, concurrency, seed, queries):
+    """Run one scenario across concurrent sessions from cold caches."""
+    import streamlit as st
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    queries.clear()
+
+    def run_session(idx):
+        session = Session(random.Random(seed + idx))
+        SCENARIOS[name](session)
+        return session
+
+    start = time.perf_counter()
+    with PeakRSS() as rss, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        finished = list(pool.map(run_session, range(sessions)))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([latency for session in finished for latency in session.latencies]) * 1000
+    service_times = np.array([service for session in finished for service in session.service_times]) * 1000
+    return {
+        'scenario': name,
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'errors': sum(session.errors for session in finished),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'mean_service_ms': float(service_times.mean()),
+        'wall_s': wall,
+        'peak_rss_mb': rss.peak,
+        'warehouse_queries': dict(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard with concurrent simulated sessions.")
+    parser.add_argument('--sessions', type=int, default=SESSIONS, help="Simulated sessions per scenario")
+    parser.add_argument('--concurrency', type=int, default=None, help="Sessions running at once (default: all)")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma separated scenarios")
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT, help="Local event snapshot to serve")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.snapshot):
+        from generate_events import generate_events, write_snapshot
+        print(f"Generating a one-season snapshot at {args.snapshot}")
+        write_snapshot(generate_events(seed=args.seed), args.snapshot)
+
+    # Must be set before the app imports database. The disk cache and any
+    # analytics bundle are off so every scenario really starts cold.
+    os.environ['DATA_BACKEND'] = 'local'
+    os.environ['LOCAL_SNAPSHOT_PATH'] = args.snapshot
+    os.environ['DISK_CACHE_DIR'] = ''
+    os.environ['ANALYTICS_BUNDLE_DIR'] = ''
+
+    queries = Counter()
+    count_queries(queries)
+
+    results = []
+    for name in args.scenarios.split(','):
+        print(f"Running {name} with {args.sessions} sessions...")
+        results.append(run_scenario(name, args.sessions, args.concurrency or args.sessions, args.seed, queries))
+
+    print("")
+    print(f"{'Scenario':<18} {'Reruns':>7} {'Errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'Max ms':>8} {'Service':>8} {'Peak RSS':>9} {'Queries':>8}")
+    for result in results:
+        print(f"{result['scenario']:<18} {result['reruns']:>7} {result['errors']:>7} {result['p50_ms']:>8.0f} "
+              f"{result['p95_ms']:>8.0f} {result['p99_ms']:>8.0f} {result['max_ms']:>8.0f} "
+              f"{result['mean_service_ms']:>8.0f} {result['peak_rss_mb']:>7.0f}MB "
+              f"{sum(result['warehouse_queries'].values()):>8}")
+    for result in results:
+        breakdown = ', '.join(f"{name}={count}" for name, count in sorted(result['warehouse_queries'].items()))
+        print(f"  {result['scenario']}: {breakdown or 'no queries'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
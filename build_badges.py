@@ -0,0 +1,80 @@
+"""
+Build optimized club badge assets for Streamlit static file serving
+
+Resizes every badge in `Club Badges/` to the sizes the dashboard displays,
+quantizes and compresses them, and writes them to `static/badges/` with a
+content hash in the file name plus a manifest.json mapping team and size to
+file. With `enableStaticServing` on, figures reference the badges by URL so
+browsers fetch and cache them once instead of receiving them inside every
+figure.
+
+Re-run after adding or changing a badge:
+    python build_badges.py
+"""
+import hashlib
+import json
+import os
+from io import BytesIO
+
+from PIL import Image
+
+from badge_mapping import (
+    BADGE_DIR, TEAM_BADGE_MAP, STATIC_BADGE_DIR, BADGE_MANIFEST, BADGE_SIZES, slugify
+)
+
+
+def optimize_badge(path, size):
+    """Badge fitted into a transparent size x size square, as optimized PNG bytes."""
+    img = Image.open(path).convert('RGBA')
+    img.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+    # Centre on a square canvas so every badge keeps its aspect ratio
+    canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    canvas.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
+
+    buffered = BytesIO()
+    canvas.quantize(colors=256, method=Image.Quantize.FASTOCTREE).save(buffered, format='PNG', optimize=True)
+    return buffered.getvalue()
+
+
+def main():
+    os.makedirs(STATIC_BADGE_DIR, exist_ok=True)
+
+    # Clear previous builds so renamed badges don't linger
+    for filename in os.listdir(STATIC_BADGE_DIR):
+        if filename.endswith('.png') or filename == os.path.basename(BADGE_MANIFEST):
+            os.remove(os.path.join(STATIC_BADGE_DIR, filename))
+
+    manifest = {'sizes': BADGE_SIZES, 'badges': {}}
+    source_bytes = 0
+    output_bytes = 0
+
+    for team, source_name in sorted(TEAM_BADGE_MAP.items()):
+        source_path = os.path.join(BADGE_DIR, source_name)
+        if not os.path.exists(source_path):
+            print(f"Missing badge for {team}: {source_path}")
+            continue
+        source_bytes += os.path.getsize(source_path)
+
+        files = {}
+        for size in sorted(set(BADGE_SIZES.values())):
+            data = optimize_badge(source_path, size)
+            # Content hash in the name lets browsers cache the file indefinitely
+            digest = hashlib.sha1(data).hexdigest()[:8]
+            filename = f"{slugify(team)}_{size}_{digest}.png"
+            with open(os.path.join(STATIC_BADGE_DIR, filename), 'wb') as f:
+                f.write(data)
+            files[str(size)] = filename
+            output_bytes += len(data)
+        manifest['badges'][team] = files
+
+    with open(BADGE_MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"Built {len(manifest['badges'])} badges at sizes {sorted(set(BADGE_SIZES.values()))}")
+    print(f"Source: {source_bytes / 1024:.0f} KB -> output: {output_bytes / 1024:.0f} KB")
+    print(f"Manifest: {BADGE_MANIFEST}")
+
+
+if __name__ == "__main__":
+    main()
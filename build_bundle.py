@@ -0,0 +1,201 @@
+"""
+Build the versioned analytics bundle after a data refresh
+
+Queries the warehouse (or the local backend) once and computes every derived
+dataset the dashboard shows: the latest season's team stats with ranks, actual
+vs expected league table and percentiles, each season's team stats and league
+table after its last matchday, league match facts, each team's match data with
+rolling averages, points progression and xPoints, shots grouped by xG, the
+matchday index behind the as-of views and every team-season's metrics for the
+similar teams search. They are written to
+`bundles/<data_version>/` as uncompressed Arrow IPC (Feather) files, which
+the app memory-maps, with a manifest, then CURRENT is
+switched to the new version. The app picks the new bundle up on its next
+rerun and only does lookups from then on (see bundle.py).
+
+Bundles are immutable: each is written to a temporary directory and renamed
+into place, its files are made read-only, and a version that already exists
+is left alone.
+
+Run after each data refresh:
+    python build_bundle.py
+    python build_bundle.py --output-dir bundles --keep 3
+"""
+import argparse
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+import disk_cache
+from bundle import BUNDLE_DIR, CURRENT_FILE, MANIFEST_FILE, current_version, matchday_index_frames
+from database import (
+    DATA_SOURCE, fetch_team_stats, fetch_league_match_data, fetch_shot_quality, data_version_of, add_team_ranks,
+    compact_team_stats
+)
+from metrics import (
+    team_match_data, add_points_progression, team_percentiles, matchday_index, team_season_stats, team_stats_as_of,
+    league_table_as_of
+)
+
+KEEP_BUNDLES = 3
+
+
+def compute_datasets():
+    """
+    Query the data and compute every dataset in a bundle.
+
+    Returns:
+        (data_version, dict of dataset name to DataFrame)
+    """
+    # Summed over every season: only the data version comes from these
+    df = fetch_team_stats()
+    match_facts = fetch_league_match_data()
+
+    match_data_by_team = {
+        team: add_points_progression(team_match_data(match_facts, team)) for team in df['TEAM']
+    }
+    index = matchday_index(match_facts)
+    index_frame, seasons_frame = matchday_index_frames(index)
+
+    # Each season's team stats and league table after its last matchday, the
+    # latest season's being the dashboard's default view
+    season_stats, season_tables = [], []
+    for season, last_matchday in zip(index['seasons'], index['season_bounds'][1:]):
+        stats = compact_team_stats(add_team_ranks(team_stats_as_of(index, last_matchday)))
+        season_stats.append(stats)
+        season_tables.append(league_table_as_of(index, stats, last_matchday).assign(SEASON=season))
+
+    return data_version_of(df), {
+        'team_stats': season_stats[-1],
+        'match_facts': match_facts,
+        # Grouped by team: bundle.py slices it per team without copying
+        'team_matches': pd.concat(match_data_by_team.values(), ignore_index=True),
+        'league_table': season_tables[-1].drop(columns='SEASON'),
+        'percentiles': team_percentiles(season_stats[-1]),
+        # Grouped by season: bundle.py splits them per season's last matchday
+        'season_team_stats': pd.concat(
+            [stats.assign(SEASON=season) for season, stats in zip(index['seasons'], season_stats)], ignore_index=True
+        ),
+        'season_league_tables': pd.concat(season_tables, ignore_index=True),
+        'shot_quality': fetch_shot_quality(),
+        'matchday_index': index_frame,
+        'matchday_seasons': seasons_frame,
+        'team_seasons': team_season_stats(match_facts),
+    }
+
+
+def write_bundle(output_dir, data_version, datasets):
+    """
+    Write a bundle to output_dir/<data_version>, unless that version exists.
+
+    Returns:
+        True if the bundle was written, False if it was already there
+    """
+    final_path = os.path.join(output_dir, data_version)
+    if os.path.isdir(final_path):
+        return False
+
+    os.makedirs(output_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=output_dir, prefix='.tmp-')
+    try:
+        files = {}
+        for name, df in datasets.items():
+            files[name] = f"{name}.arrow"
+            # One uncompressed record batch, so readers map each column as a
+            # single buffer rather than decoding or concatenating chunks
+            table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+            feather.write_feather(
+                table, os.path.join(tmp_path, files[name]), compression='uncompressed', chunksize=max(len(df), 1)
+            )
+
+        manifest = {
+            'data_version': data_version,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'source': DATA_SOURCE,
+            'files': files,
+            'rows': {name: len(df) for name, df in datasets.items()},
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        for file_name in os.listdir(tmp_path):
+            os.chmod(os.path.join(tmp_path, file_name), stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        # mkdtemp makes the directory private to this user
+        os.chmod(tmp_path, 0o755)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    try:
+        os.rename(tmp_path, final_path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        # Another build finished the same version first
+        if os.path.isdir(final_path):
+            return False
+        raise
+    return True
+
+
+def set_current(output_dir, data_version):
+    """Point CURRENT at a bundle, atomically."""
+    def write(path):
+        with open(path, 'w') as f:
+            f.write(data_version)
+        os.chmod(path, 0o644)
+    disk_cache.atomic_write(os.path.join(output_dir, CURRENT_FILE), write)
+
+
+def prune_bundles(output_dir, keep):
+    """Delete all but the newest `keep` bundles, never the current one."""
+    current = current_version(output_dir)
+    bundles = [
+        name for name in os.listdir(output_dir)
+        if os.path.isfile(os.path.join(output_dir, name, MANIFEST_FILE))
+    ]
+    bundles.sort(key=lambda name: os.path.getmtime(os.path.join(output_dir, name, MANIFEST_FILE)), reverse=True)
+    removed = []
+    for name in bundles[keep:]:
+        if name != current:
+            shutil.rmtree(os.path.join(output_dir, name))
+            removed.append(name)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the dashboard's datasets into a versioned bundle.")
+    parser.add_argument('--output-dir', default=BUNDLE_DIR or 'bundles')
+    parser.add_argument('--keep', type=int, default=KEEP_BUNDLES, help="Bundles to keep, including the new one")
+    args = parser.parse_args()
+
+    # Always build from fresh query results
+    disk_cache.DISK_CACHE_DIR = ''
+
+    start = time.perf_counter()
+    data_version, datasets = compute_datasets()
+    computed = time.perf_counter()
+
+    if write_bundle(args.output_dir, data_version, datasets):
+        print(f"Wrote bundle {data_version} to {os.path.join(args.output_dir, data_version)}")
+    else:
+        print(f"Bundle {data_version} already exists, data unchanged")
+    set_current(args.output_dir, data_version)
+    removed = prune_bundles(args.output_dir, args.keep)
+
+    for name, df in datasets.items():
+        print(f"  {name:<14} {len(df):>6} rows")
+    print(f"Computed in {computed - start:.1f}s, written in {time.perf_counter() - computed:.1f}s")
+    if removed:
+        print(f"Removed old bundles: {', '.join(removed)}")
+
+
+if __name__ == "__main__":
+    main()
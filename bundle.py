@@ -0,0 +1,184 @@
+"""
+Versioned analytics bundle produced by build_bundle.py
+
+A bundle holds every derived dataset the dashboard shows, computed offline
+after a data refresh: the latest season's team stats with ranks, league table
+and percentiles, each season's team stats and league table after its last
+matchday, league match facts, each team's match-by-match data with rolling
+metrics and xPoints, shots grouped by xG, the matchday index behind the as-of
+views and every team-season's metrics for the similar teams search. Each bundle
+lives in its own directory named after its data version and is never
+modified once written; a CURRENT file names the one in use.
+
+Datasets are uncompressed Arrow IPC (Feather) files, memory-mapped when
+loaded. Their numeric columns are zero-copy views of the mapped pages, so
+every session shares one copy within a process, and every process loading the
+same bundle (replicas on one host, export workers) shares the same OS page
+cache pages instead of holding its own copy.
+
+When a bundle exists the data functions in database.py, tables.py and
+figures.py look datasets up here instead of querying and computing, so
+interactive requests only do lookups and rendering. Without one (or with
+ANALYTICS_BUNDLE_DIR set to an empty value) everything is computed on demand
+as before.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import streamlit as st
+
+BUNDLE_DIR = os.getenv('ANALYTICS_BUNDLE_DIR', 'bundles')
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+# Datasets in a bundle, one file each
+DATASETS = [
+    'team_stats', 'match_facts', 'team_matches', 'league_table', 'percentiles', 'shot_quality',
+    'matchday_index', 'matchday_seasons', 'team_seasons', 'season_team_stats', 'season_league_tables',
+]
+
+
+def current_version(bundle_dir=None):
+    """Data version of the bundle in use, or None if there is none."""
+    bundle_dir = BUNDLE_DIR if bundle_dir is None else bundle_dir
+    if not bundle_dir:
+        return None
+    try:
+        with open(os.path.join(bundle_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def matchday_index_frames(index):
+    """
+    A metrics.matchday_index as two frames to store in a bundle:
+    matchday_index, one row per team and matchday column (0 to the last,
+    team by team) with each cumulative sum and the points, xpoints and
+    positions of that matchday (NaN or 0 in column 0), and matchday_seasons,
+    each season and its last matchday column.
+    """
+    n_teams, n_columns = len(index['teams']), index['matchdays'] + 1
+
+    def per_matchday(values, fill):
+        # Column 0 is before the first matchday
+        return np.concatenate([np.full((n_teams, 1), fill, dtype=values.dtype), values], axis=1).ravel()
+
+    matchday_index = pd.DataFrame({
+        'TEAM': np.repeat(index['teams'], n_columns),
+        'MATCHDAY': np.tile(np.arange(n_columns), n_teams),
+        **{name: values.ravel() for name, values in index['cumulative'].items()},
+        'points': per_matchday(index['points'], np.nan),
+        'xpoints': per_matchday(index['xpoints'], np.nan),
+        'positions': per_matchday(index['positions'], 0),
+    })
+    matchday_seasons = pd.DataFrame({'SEASON': index['seasons'], 'LAST_MATCHDAY': index['season_bounds'][1:]})
+    return matchday_index, matchday_seasons
+
+
+def matchday_index_from_frames(matchday_index, matchday_seasons):
+    """
+    The matchday index stored by matchday_index_frames. Its arrays are views
+    of the frames' columns, so a mapped bundle's index is not copied.
+    """
+    season_bounds = np.concatenate([[0], matchday_seasons['LAST_MATCHDAY'].to_numpy()])
+    n_columns = int(season_bounds[-1]) + 1
+    per_matchday = ['points', 'xpoints', 'positions']
+
+    def grid(column):
+        return matchday_index[column].to_numpy().reshape(-1, n_columns)
+
+    return {
+        'teams': matchday_index['TEAM'].to_numpy()[::n_columns],
+        'seasons': matchday_seasons['SEASON'].to_numpy(),
+        'season_bounds': season_bounds,
+        'matchdays': n_columns - 1,
+        'cumulative': {
+            name: grid(name) for name in matchday_index.columns if name not in ['TEAM', 'MATCHDAY'] + per_matchday
+        },
+        **{name: grid(name)[:, 1:] for name in per_matchday},
+    }
+
+
+def split_by_season(frame, last_matchdays):
+    """
+    A dataset stored grouped by SEASON as one frame per season, keyed by the
+    season's last matchday column in the matchday index.
+    """
+    return {
+        last_matchdays[season]: frame.iloc[positions[0]:positions[-1] + 1].drop(columns='SEASON').reset_index(drop=True)
+        for season, positions in frame.groupby('SEASON', sort=False).indices.items()
+    }
+
+
+def read_dataset(path):
+    """One bundle dataset; Arrow files are memory-mapped, not read into memory."""
+    if path.endswith('.parquet'):
+        # Bundles built before datasets were written as Arrow files
+        return pd.read_parquet(path)
+    # split_blocks keeps each column a view of its own Arrow buffer
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_bundle(bundle_dir, version):
+    """
+    Map one bundle, once per process, as read-only frames shared by every
+    session. team_matches is also split per team (team_matches_by_team) into
+    slices of the same memory, the matchday index frames are read back into
+    the index (matchday_index) over the same memory, each season's team stats
+    and league table are split per season's last matchday column
+    (team_stats_by_matchday and league_table_by_matchday), and team_seasons
+    goes into the similar teams search's index (similarity_index).
+    """
+    from database import freeze, freeze_frame
+    from metrics import similarity_index
+
+    path = os.path.join(bundle_dir, version)
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    bundle = {'version': manifest['data_version'], 'manifest': manifest}
+    for name in DATASETS:
+        # Bundles built by older versions lack datasets added since
+        if name not in manifest['files']:
+            continue
+        bundle[name] = freeze_frame(read_dataset(os.path.join(path, manifest['files'][name])))
+
+    # build_bundle.py stores team_matches grouped by team, so each team is one slice
+    team_matches = bundle['team_matches']
+    bundle['team_matches_by_team'] = {
+        team: freeze_frame(team_matches.iloc[positions[0]:positions[-1] + 1].reset_index(drop=True))
+        for team, positions in team_matches.groupby('TEAM', observed=True, sort=False).indices.items()
+    }
+
+    # Bundles built before the matchday index was added don't have it
+    if 'matchday_index' in bundle:
+        bundle['matchday_index'] = freeze(
+            matchday_index_from_frames(bundle['matchday_index'], bundle.pop('matchday_seasons'))
+        )
+    if 'season_team_stats' in bundle:
+        index = bundle['matchday_index']
+        last_matchdays = dict(zip(index['seasons'].tolist(), index['season_bounds'][1:].tolist()))
+        bundle['team_stats_by_matchday'] = {
+            # Categorical TEAM, as in team_stats
+            matchday: freeze_frame(stats.astype({'TEAM': 'category'}))
+            for matchday, stats in split_by_season(bundle.pop('season_team_stats'), last_matchdays).items()
+        }
+        bundle['league_table_by_matchday'] = {
+            matchday: freeze_frame(table)
+            for matchday, table in split_by_season(bundle.pop('season_league_tables'), last_matchdays).items()
+        }
+    if 'team_seasons' in bundle:
+        bundle['similarity_index'] = freeze(similarity_index(bundle['team_seasons']))
+    return bundle
+
+
+def current_bundle():
+    """The bundle in use, or None to compute everything on demand."""
+    version = current_version()
+    if version is None:
+        return None
+    return load_bundle(BUNDLE_DIR, version)
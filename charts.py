@@ -0,0 +1,599 @@
+"""
+Plotly figure builders for the dashboard charts
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+SELECTED_COLOR = '#FF4B4B'
+TEAM_COLOR = '#4A90E2'
+
+# Above this many points, badges are dropped in favour of plain markers
+MAX_BADGE_POINTS = 48
+
+
+def build_team_scatter(df, x_col, y_col, selected_team, x_title, y_title,
+                       hover_labels=None, hover_format='.2f', badges=None,
+                       team_col='TEAM', label_col=None):
+    """
+    Build a team scatter plot as a single batched trace.
+
+    Every point shares one go.Scatter trace: hover text comes from per-point
+    customdata and selection styling from marker arrays, so the figure size
+    grows with the number of points rather than the number of traces.
+
+    Args:
+        df: DataFrame with one row per point (team or team-season)
+        x_col, y_col: Columns plotted on the x and y axes
+        selected_team: Team to highlight
+        x_title, y_title: Axis titles
+        hover_labels: (x label, y label) used in the hover text, defaults to the axis titles
+        hover_format: d3 format string for hover values
+        badges: Optional dict mapping team name to a layout image source
+        team_col: Column holding the team name (used for selection and badges)
+        label_col: Column used as the hover title, defaults to team_col
+
+    Returns:
+        go.Figure
+    """
+    x_label, y_label = hover_labels or (x_title, y_title)
+    label_col = label_col or team_col
+
+    x = df[x_col].to_numpy()
+    y = df[y_col].to_numpy()
+    teams = df[team_col].to_numpy()
+    is_selected = teams == selected_team
+
+    badges = badges or {}
+    show_badges = bool(badges) and len(df) <= MAX_BADGE_POINTS
+    has_badge = [show_badges and team in badges for team in teams]
+
+    # Points with a badge get a transparent hover target, the rest a visible marker
+    marker_colors = [
+        'rgba(0,0,0,0)' if badge else (SELECTED_COLOR if selected else TEAM_COLOR)
+        for badge, selected in zip(has_badge, is_selected)
+    ]
+    marker_sizes = [
+        (50 if selected else 35) if badge else (16 if selected else 10)
+        for badge, selected in zip(has_badge, is_selected)
+    ]
+    line_widths = [0 if badge else (3 if selected else 2) for badge, selected in zip(has_badge, is_selected)]
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=y,
+        mode='markers',
+        marker=dict(
+            size=marker_sizes,
+            color=marker_colors,
+            line=dict(width=line_widths, color='white')
+        ),
+        customdata=df[label_col].to_numpy(),
+        hovertemplate=(
+            f'<b>%{{customdata}}</b><br>{x_label}: %{{x:{hover_format}}}'
+            f'<br>{y_label}: %{{y:{hover_format}}}<extra></extra>'
+        ),
+        showlegend=False,
+        name=''
+    ))
+
+    # Add y=x line (perfect balance line)
+    min_val = min(x.min(), y.min())
+    max_val = max(x.max(), y.max())
+    fig.add_trace(go.Scatter(
+        x=[min_val, max_val],
+        y=[min_val, max_val],
+        mode='lines',
+        line=dict(color='rgba(255, 255, 255, 0.3)', width=2, dash='dash'),
+        showlegend=False,
+        hoverinfo='skip',
+        name='Balance Line (y=x)'
+    ))
+
+    if show_badges:
+        # Consistent badge size: 8% of the smallest axis range
+        badge_size = min(x.max() - x.min(), y.max() - y.min()) * 0.08
+        fig.update_layout(images=[
+            dict(
+                source=badges[team],
+                x=x_val,
+                y=y_val,
+                xref="x",
+                yref="y",
+                sizex=badge_size,
+                sizey=badge_size,
+                xanchor="center",
+                yanchor="middle",
+                layer="above"
+            )
+            for team, x_val, y_val, badge in zip(teams, x, y, has_badge)
+            if badge
+        ])
+
+    fig.update_layout(
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        height=450,
+        hovermode='closest',
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#0e1117',
+        font=dict(color='white', size=12),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False
+        ),
+        margin=dict(l=60, r=20, t=40, b=60)
+    )
+
+    return fig
+
+
+def build_rolling_figure(match_data):
+    """Rolling 5-match xG vs xGA for one team's match data."""
+    fig_rolling = go.Figure()
+
+    # Use match_label (opponent name) on x-axis
+    fig_rolling.add_trace(go.Scatter(
+        x=match_data['match_label'],
+        y=match_data['xg_rolling_5'],
+        mode='lines+markers',
+        name='xG (Rolling 5)',
+        line=dict(color='#00C853', width=3),
+        marker=dict(size=8),
+        hovertemplate='<b>%{x}</b><br>xG (Rolling 5): %{y:.2f}<extra></extra>'
+    ))
+
+    fig_rolling.add_trace(go.Scatter(
+        x=match_data['match_label'],
+        y=match_data['xga_rolling_5'],
+        mode='lines+markers',
+        name='xGA (Rolling 5)',
+        line=dict(color='#FF4B4B', width=3),
+        marker=dict(size=8),
+        hovertemplate='<b>%{x}</b><br>xGA (Rolling 5): %{y:.2f}<extra></extra>'
+    ))
+
+    fig_rolling.update_layout(
+        xaxis_title="Match (Opponent)",
+        yaxis_title="xG / xGA",
+        height=400,
+        hovermode='x unified',
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#0e1117',
+        font=dict(color='white', size=12),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False,
+            tickangle=-45
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    return fig_rolling
+
+
+def build_ppg_figure(match_data):
+    """
+    Points pace projection vs the 80 point target.
+
+    Expects match data with the ppg and xppg columns from
+    metrics.add_points_progression.
+    """
+    # Calculate target PPG needed for 80 points in 46 games
+    target_ppg = 80 / 46  # ~1.74 PPG
+
+    fig_ppg = go.Figure()
+
+    # Create x-axis from 1 to 46 matches
+    x_matches = list(range(1, 47))
+
+    # Get current PPG and xPPG, project across 46 matches
+    current_ppg = match_data['ppg'].iloc[-1]
+    current_xppg = match_data['xppg'].iloc[-1]
+    y_current_projection = [current_ppg * x for x in x_matches]
+    y_xpoints_projection = [current_xppg * x for x in x_matches]
+
+    # Target line: 80 points pace
+    y_target = [target_ppg * x for x in x_matches]
+
+    # Team's projected points line (y = current_ppg * x)
+    fig_ppg.add_trace(go.Scatter(
+        x=x_matches,
+        y=y_current_projection,
+        mode='lines',
+        name=f'Current Pace (PPG: {current_ppg:.2f})',
+        line=dict(color='#4A90E2', width=3),
+        hovertemplate='Match %{x}<br>Projected Points: %{y:.1f}<extra></extra>'
+    ))
+
+    # Expected points projection line (y = current_xppg * x)
+    fig_ppg.add_trace(go.Scatter(
+        x=x_matches,
+        y=y_xpoints_projection,
+        mode='lines',
+        name=f'xPoints Pace (xPPG: {current_xppg:.2f})',
+        line=dict(color='#FF6F00', width=3, dash='dot'),
+        hovertemplate='Match %{x}<br>Projected xPoints: %{y:.1f}<extra></extra>'
+    ))
+
+    # Target line (y = 1.74 * x)
+    fig_ppg.add_trace(go.Scatter(
+        x=x_matches,
+        y=y_target,
+        mode='lines',
+        name='80 Point Pace (PPG: 1.74)',
+        line=dict(color='#00C853', width=3, dash='dash'),
+        hovertemplate='Match %{x}<br>Target Points: %{y:.1f}<extra></extra>'
+    ))
+
+    fig_ppg.update_layout(
+        xaxis_title="Match Number",
+        yaxis_title="Points",
+        height=400,
+        hovermode='x unified',
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#0e1117',
+        font=dict(color='white', size=12),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False,
+            range=[1, 46]
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False,
+            range=[0, 90]
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    return fig_ppg
+
+
+PIZZA_CATEGORIES = ['xG/90', 'xGA/90 (inv)', 'xG Conv.', 'xGA Conv. (inv)', 'PPG', 'xGD/90']
+PIZZA_PERCENTILE_COLUMNS = [
+    'xg90_percentile', 'xga90_percentile', 'xg_conv_percentile',
+    'xga_conv_percentile', 'ppg_percentile', 'xgd90_percentile'
+]
+PIZZA_VALUE_COLUMNS = ['XG_PER_90', 'XGA_PER_90', 'XG_CONVERSION', 'XGA_CONVERSION', 'POINTS_PER_GAME', 'XGD_PER_90']
+COMPARISON_COLORS = ['#4A90E2', '#FF6F00', '#00C853']
+
+
+def build_pizza_figure(team_data, color):
+    """
+    Pizza (polar area) chart of a team's percentile rankings.
+
+    Expects a team row with the columns from metrics.add_percentiles.
+    """
+    # Get percentile values (0-100 scale) and actual values for hover
+    percentile_values = [team_data[col] for col in PIZZA_PERCENTILE_COLUMNS]
+    actual_values = [team_data[col] for col in PIZZA_VALUE_COLUMNS]
+
+    # Create labels with percentile
+    percentile_labels = [f"{p:.0f}th" for p in percentile_values]
+
+    fig_pizza = go.Figure()
+
+    fig_pizza.add_trace(go.Barpolar(
+        r=percentile_values,
+        theta=PIZZA_CATEGORIES,
+        name=team_data['TEAM'],
+        marker=dict(
+            color=color,
+            line=dict(color='white', width=2)
+        ),
+        opacity=0.8,
+        text=percentile_labels,
+        hovertemplate='<b>%{theta}</b><br>Percentile: %{text}<br>Actual Value: %{customdata:.2f}<extra></extra>',
+        customdata=actual_values
+    ))
+
+    fig_pizza.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=False,  # Hide radial axis
+                range=[0, 100]
+            ),
+            angularaxis=dict(
+                gridcolor='rgba(255, 255, 255, 0.2)',
+                linecolor='rgba(255, 255, 255, 0.3)',
+                tickfont=dict(size=11, color='white')
+            ),
+            bgcolor='#1a1a1a'
+        ),
+        showlegend=False,
+        height=450,
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#0e1117',
+        font=dict(color='white', size=10),
+        title=dict(
+            text=f"<b>{team_data['TEAM']}</b>",
+            font=dict(size=15, color=color),
+            x=0.5,
+            xanchor='center'
+        ),
+        margin=dict(l=70, r=70, t=70, b=70)
+    )
+
+    return fig_pizza
+
+
+# Points -> colour on a 0-3 scale: loss red, draw yellow, win green
+FORM_COLORSCALE = [
+    [0.0, '#D32F2F'], [1 / 6, '#D32F2F'],
+    [1 / 6, '#FFD600'], [2 / 3, '#FFD600'],
+    [2 / 3, '#00C853'], [1.0, '#00C853'],
+]
+
+
+def build_form_strip(teams, points, result, hover_text):
+    """
+    Form strips (W/D/L boxes) for several teams as a single heatmap trace.
+
+    Args:
+        teams: Team names, one per row (drawn top to bottom)
+        points: teams x matches array of points (NaN where there is no match)
+        result: Matching array of 'W'/'D'/'L' labels
+        hover_text: Matching array of hover text
+
+    Returns:
+        go.Figure
+    """
+    fig_form = go.Figure()
+
+    fig_form.add_trace(go.Heatmap(
+        z=points,
+        y=list(teams),
+        zmin=0,
+        zmax=3,
+        colorscale=FORM_COLORSCALE,
+        showscale=False,
+        text=result,
+        texttemplate='%{text}',
+        textfont=dict(size=16, color='white', family='Arial Black'),
+        hovertext=hover_text,
+        hovertemplate='%{hovertext}<extra></extra>',
+        xgap=4,
+        ygap=4
+    ))
+
+    fig_form.update_layout(
+        height=60 + 50 * len(teams),
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#0e1117',
+        font=dict(color='white', size=12),
+        xaxis=dict(
+            showticklabels=False,
+            showgrid=False,
+            zeroline=False
+        ),
+        yaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            autorange='reversed'
+        ),
+        margin=dict(l=10, r=10, t=10, b=10)
+    )
+
+    return fig_form
+
+
+def build_shot_quality_figure(bin_edges, shots_for, shots_against, league_shots):
+    """
+    Shot quality histogram: share of a team's shots, and of the shots it
+    faced, in each xG bin, against the league-wide distribution.
+
+    Args:
+        bin_edges: xG bin edges, one more than the bins
+        shots_for: Shots taken per bin
+        shots_against: Shots faced per bin
+        league_shots: Every team's shots per bin
+
+    Returns:
+        go.Figure
+    """
+    labels = [f"{low:.2f}-{high:.2f}" for low, high in zip(bin_edges[:-1], bin_edges[1:])]
+
+    def share(shots):
+        total = shots.sum()
+        return shots / total * 100 if total else shots * 0.0
+
+    fig_quality = go.Figure()
+
+    for name, shots, color in [('Shots', shots_for, '#00C853'), ('Shots faced', shots_against, '#FF4B4B')]:
+        fig_quality.add_trace(go.Bar(
+            x=labels,
+            y=share(shots),
+            name=name,
+            marker_color=color,
+            customdata=shots,
+            hovertemplate=f'<b>%{{x}} xG</b><br>{name}: %{{y:.1f}}% (%{{customdata:.0f}})<extra></extra>'
+        ))
+
+    fig_quality.add_trace(go.Scatter(
+        x=labels,
+        y=share(league_shots),
+        mode='lines',
+        name='League',
+        line=dict(color='rgba(255, 255, 255, 0.6)', width=2, dash='dash'),
+        hovertemplate='<b>%{x} xG</b><br>League: %{y:.1f}%<extra></extra>'
+    ))
+
+    fig_quality.update_layout(
+        xaxis_title="Shot xG",
+        yaxis_title="% of Shots",
+        barmode='group',
+        height=400,
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#0e1117',
+        font=dict(color='white', size=12),
+        xaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            tickangle=-45
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    return fig_quality
+
+
+def build_position_figure(teams, positions, selected_team):
+    """
+    League position after each matchday for every team (a bump chart), with
+    the selected team highlighted.
+
+    Args:
+        teams: Team names, one per row of positions
+        positions: teams x matchdays array of league positions
+        selected_team: Team to highlight
+
+    Returns:
+        go.Figure
+    """
+    matchdays = list(range(1, positions.shape[1] + 1))
+    fig_positions = go.Figure()
+
+    # Selected team drawn last so it sits on top
+    for team, team_positions in sorted(zip(teams, positions), key=lambda item: item[0] == selected_team):
+        is_selected = team == selected_team
+        fig_positions.add_trace(go.Scatter(
+            x=matchdays,
+            y=team_positions,
+            mode='lines+markers' if is_selected else 'lines',
+            name=team,
+            line=dict(
+                color=SELECTED_COLOR if is_selected else 'rgba(255, 255, 255, 0.15)',
+                width=4 if is_selected else 1.5
+            ),
+            marker=dict(size=6),
+            showlegend=False,
+            hovertemplate=f'<b>{team}</b><br>Matchday %{{x}}: %{{y}}<extra></extra>'
+        ))
+
+    fig_positions.update_layout(
+        xaxis_title="Matchday",
+        yaxis_title="Position",
+        height=500,
+        hovermode='closest',
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#0e1117',
+        font=dict(color='white', size=12),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            zeroline=False,
+            autorange='reversed',
+            dtick=1 if len(teams) <= 30 else None
+        ),
+        margin=dict(l=10, r=10, t=10, b=10)
+    )
+
+    return fig_positions
+
+
+def css_colors(css_values, default_fill, default_text):
+    """
+    Background and text colour of each cell from an array of inline CSS
+    strings (as the styled tables use), the last declaration winning.
+    """
+    css_values = np.asarray(css_values, dtype=object)
+    fill = np.full(css_values.shape, default_fill, dtype=object)
+    text = np.full(css_values.shape, default_text, dtype=object)
+    for cell, css in np.ndenumerate(css_values):
+        for declaration in str(css).split(';'):
+            name, _, value = declaration.partition(':')
+            if name.strip() == 'background-color':
+                fill[cell] = value.strip()
+            elif name.strip() == 'color':
+                text[cell] = value.strip()
+    return fill, text
+
+
+def build_table_figure(display, css_values=None):
+    """
+    A styled table as a single go.Table trace, for static image export.
+
+    Args:
+        display: Display frame, one column per table column
+        css_values: Optional inline CSS per cell, shaped like display (as
+            tables.style_precomputed takes); cell background and text
+            colours carry over, other properties are dropped
+
+    Returns:
+        go.Figure
+    """
+    n_rows = len(display)
+    if css_values is None:
+        css_values = np.full(display.shape, '', dtype=object)
+    fill, text = css_colors(css_values, '#0e1117', 'white')
+
+    fig_table = go.Figure(go.Table(
+        header=dict(
+            values=[f"<b>{column}</b>" for column in display.columns],
+            fill_color='#262730',
+            font=dict(color='white', size=12),
+            align='center',
+            height=30
+        ),
+        cells=dict(
+            values=[display[column].tolist() for column in display.columns],
+            # go.Table takes colours column by column
+            fill_color=fill.T.tolist(),
+            font=dict(color=text.T.tolist(), size=12),
+            line_color='#333333',
+            align='center',
+            height=26
+        )
+    ))
+
+    fig_table.update_layout(
+        height=50 + 26 * n_rows,
+        paper_bgcolor='#0e1117',
+        margin=dict(l=10, r=10, t=10, b=10)
+    )
+
+    return fig_table
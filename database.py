@@ -1,17 +1,39 @@
-import snowflake.connector
 import pandas as pd
+import numpy as np
 import os
+import hashlib
+from functools import wraps
+from types import MappingProxyType
 from dotenv import load_dotenv
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
 import streamlit as st
+import local_backend
+from disk_cache import disk_cached
+from bundle import current_bundle
+from metrics import matchday_index, team_stats_as_of, season_of
 
 # Load environment variables
 load_dotenv()
 
+# 'snowflake' (default) or 'local' to read an event snapshot from generate_events.py
+DATA_BACKEND = os.getenv('DATA_BACKEND', 'snowflake')
+LOCAL_SNAPSHOT_PATH = os.getenv('LOCAL_SNAPSHOT_PATH', 'data/impect_events.parquet')
+
+# Where query results come from, so disk-cached results from one source are never served for another
+DATA_SOURCE = f"local:{os.path.abspath(LOCAL_SNAPSHOT_PATH)}" if DATA_BACKEND == 'local' else 'snowflake'
+
+# Whole-number team stats, stored as int16 along with the rank columns
+TEAM_STATS_INT_COLUMNS = [
+    'MATCHES_PLAYED', 'TOTAL_POINTS', 'GOALS', 'OPEN_PLAY_GOALS', 'SET_PIECE_GOALS',
+    'GOALS_AGAINST', 'OPEN_PLAY_GOALS_AGAINST', 'SET_PIECE_GOALS_AGAINST',
+]
+
 @st.cache_resource
 def get_snowflake_connection():
     """Create and cache Snowflake connection using private key authentication."""
+    # Imported here so the connector and cryptography only load on first connect
+    import snowflake.connector
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
 
     # Try to load from Streamlit secrets first (for cloud deployment)
     if "snowflake" in st.secrets:
@@ -76,14 +98,148 @@ def get_snowflake_connection():
 
     return conn
 
-@st.cache_data(ttl=604800)  # Cache for 1 week (604800 seconds)
-def get_team_stats():
+def freeze_frame(df):
+    """
+    The same data as df, backed by read-only arrays.
+
+    For frames shared between reruns and sessions: in-place writes raise
+    instead of silently changing every reader's copy. Derive a new frame
+    (or .copy()) to add or change columns.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, np.dtype):
+            values = values.to_numpy(copy=False)
+            values.setflags(write=False)
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            # Same categories over read-only codes
+            codes = values.cat.codes.to_numpy(copy=False)
+            codes.setflags(write=False)
+            values = pd.Categorical.from_codes(codes, dtype=values.dtype, validate=False)
+        elif isinstance(values.dtype, pd.StringDtype):
+            # Arrow-backed strings can't be made read-only, object-backed ones can
+            na_value = values.dtype.na_value
+            strings = values.to_numpy(dtype=object, na_value=na_value)
+            strings.setflags(write=False)
+            values = pd.arrays.StringArray(strings, dtype=pd.StringDtype('python', na_value=na_value))
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+def freeze(value):
     """
-    Fetch and calculate team statistics from Snowflake.
-    Returns a DataFrame with team-level xG statistics, rankings, and match results.
+    A cached result made read-only: DataFrames through freeze_frame, numpy
+    arrays as read-only views, and dicts, tuples and lists of them as
+    read-only mappings and tuples.
+    """
+    if isinstance(value, pd.DataFrame):
+        return freeze_frame(value)
+    if isinstance(value, np.ndarray):
+        value = value.view()
+        value.setflags(write=False)
+        return value
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (tuple, list)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def cache_shared(**cache_kwargs):
+    """
+    Cache for read-only analytical datasets: like st.cache_data, but every
+    hit returns the same object rather than unpickling a fresh copy.
+
+    Results are frozen (see freeze) and kept with st.cache_resource, so all
+    reruns and sessions in the process share them and writing to them in
+    place raises. Takes st.cache_resource's arguments (ttl, max_entries,
+    show_spinner).
+    """
+    def decorator(func):
+        @wraps(func)
+        def frozen(*args, **kwargs):
+            return freeze(func(*args, **kwargs))
+        return st.cache_resource(**cache_kwargs)(frozen)
+    return decorator
+
+def compact_frame(df, category_columns=(), int_columns=(), float_columns=()):
+    """
+    A query result in compact dtypes, read-only.
+
+    Category columns become categoricals, int columns int16 and float columns
+    float32. Any other column is kept as it is.
     """
-    conn = get_snowflake_connection()
+    columns = {}
+    for col in df.columns:
+        if col in category_columns:
+            columns[col] = df[col].astype('category')
+        elif col in int_columns:
+            columns[col] = pd.to_numeric(df[col]).astype(np.int16)
+        elif col in float_columns:
+            columns[col] = pd.to_numeric(df[col]).astype(np.float32)
+        else:
+            columns[col] = df[col]
+    return freeze_frame(pd.DataFrame(columns))
+
+def add_team_ranks(df):
+    """
+    Add league rank columns to the team stats (1 = best, ties share the best rank).
+    Attacking metrics rank high values first, defensive metrics low values first.
+    """
+    # Calculate rankings
+    df['goals_rank'] = df['GOALS'].rank(ascending=False, method='min').astype(int)
+    df['xg_rank'] = df['XG'].rank(ascending=False, method='min').astype(int)
+    df['open_play_xg_rank'] = df['OPEN_PLAY_XG'].rank(ascending=False, method='min').astype(int)
+    df['set_piece_xg_rank'] = df['SET_PIECE_XG'].rank(ascending=False, method='min').astype(int)
+    df['set_piece_goals_rank'] = df['SET_PIECE_GOALS'].rank(ascending=False, method='min').astype(int)
+    df['xg_per_90_rank'] = df['XG_PER_90'].rank(ascending=False, method='min').astype(int)
+    df['xg_conversion_rank'] = df['XG_CONVERSION'].rank(ascending=False, method='min').astype(int)
+
+    df['goals_against_rank'] = df['GOALS_AGAINST'].rank(ascending=True, method='min').astype(int)
+    df['xga_rank'] = df['XGA'].rank(ascending=True, method='min').astype(int)
+    df['open_play_xga_rank'] = df['OPEN_PLAY_XGA'].rank(ascending=True, method='min').astype(int)
+    df['set_piece_xga_rank'] = df['SET_PIECE_XGA'].rank(ascending=True, method='min').astype(int)
+    df['set_piece_goals_against_rank'] = df['SET_PIECE_GOALS_AGAINST'].rank(ascending=True, method='min').astype(int)
+    df['xga_per_90_rank'] = df['XGA_PER_90'].rank(ascending=True, method='min').astype(int)
+    df['xga_conversion_rank'] = df['XGA_CONVERSION'].rank(ascending=True, method='min').astype(int)
+
+    return df
+
+def add_team_perspective(df):
+    """
+    Turn one team's home/away match rows into that team's perspective:
+    xG, goals and points for/against, match number and label, and rolling averages.
+    """
+    # Calculate team's xG, xGA, goals for/against from team's perspective
+    df['XG_FOR'] = df.apply(lambda row: row['HOME_XG'] if row['VENUE'] == 'H' else row['AWAY_XG'], axis=1)
+    df['XG_AGAINST'] = df.apply(lambda row: row['AWAY_XG'] if row['VENUE'] == 'H' else row['HOME_XG'], axis=1)
+    df['GOALS_FOR'] = df.apply(lambda row: row['HOME_GOALS'] if row['VENUE'] == 'H' else row['AWAY_GOALS'], axis=1)
+    df['GOALS_AGAINST'] = df.apply(lambda row: row['AWAY_GOALS'] if row['VENUE'] == 'H' else row['HOME_GOALS'], axis=1)
+
+    # Calculate points
+    df['POINTS'] = df.apply(lambda row: 3 if row['GOALS_FOR'] > row['GOALS_AGAINST']
+                            else (1 if row['GOALS_FOR'] == row['GOALS_AGAINST'] else 0), axis=1)
+
+    # Add match number within the season and date label
+    df['match_number'] = df.groupby(season_of(df['dateTime'])).cumcount() + 1
+    df['match_label'] = df.apply(lambda row: f"{row['match_number']}: {row['OPPONENT']}", axis=1)
 
+    # Calculate rolling averages (right-aligned, includes current match)
+    df['xg_rolling_5'] = df['XG_FOR'].rolling(window=5, min_periods=1).mean()
+    df['xga_rolling_5'] = df['XG_AGAINST'].rolling(window=5, min_periods=1).mean()
+
+    return df
+
+@cache_shared(ttl=604800)  # Cache for 1 week (604800 seconds)
+@disk_cached(ttl=604800, scope=DATA_SOURCE)  # Kept on disk for restarts
+def fetch_team_stats():
+    """
+    Fetch and calculate team statistics from Snowflake, summed over every
+    season in the data. These totals fingerprint the data (data_version_of);
+    the dashboard shows one season at a time (see get_team_stats).
+    Returns a DataFrame with team-level xG statistics, rankings, and match results,
+    in compact dtypes (categorical TEAM, int16 counts and ranks, float32 metrics)
+    and read-only. Derived columns belong in their own frames.
+    """
     query = """
     WITH match_results AS (
         SELECT
@@ -95,7 +251,7 @@ def get_team_stats():
             SUM(CASE WHEN "squadName" = "awaySquadName" AND GOALS = 1 THEN 1 ELSE 0 END)
                 + SUM(CASE WHEN "squadName" = "homeSquadName" AND OWNGOALS = 1 THEN 1 ELSE 0 END) as away_goals
         FROM IMPECT_EVENTS_STAGING
-        WHERE GOALS IS NOT NULL OR OWNGOALS IS NOT NULL
+        -- Every match, so goalless draws earn their point
         GROUP BY "matchId", "homeSquadName", "awaySquadName"
     ),
     team_points AS (
@@ -236,34 +392,35 @@ def get_team_stats():
     ORDER BY xg DESC
     """
 
-    df = pd.read_sql(query, conn)
+    if DATA_BACKEND == 'local':
+        df = local_backend.query_team_stats(LOCAL_SNAPSHOT_PATH)
+    else:
+        df = pd.read_sql(query, get_snowflake_connection())
 
-    # Calculate rankings
-    df['goals_rank'] = df['GOALS'].rank(ascending=False, method='min').astype(int)
-    df['xg_rank'] = df['XG'].rank(ascending=False, method='min').astype(int)
-    df['open_play_xg_rank'] = df['OPEN_PLAY_XG'].rank(ascending=False, method='min').astype(int)
-    df['set_piece_xg_rank'] = df['SET_PIECE_XG'].rank(ascending=False, method='min').astype(int)
-    df['set_piece_goals_rank'] = df['SET_PIECE_GOALS'].rank(ascending=False, method='min').astype(int)
-    df['xg_per_90_rank'] = df['XG_PER_90'].rank(ascending=False, method='min').astype(int)
-    df['xg_conversion_rank'] = df['XG_CONVERSION'].rank(ascending=False, method='min').astype(int)
+    # Ranks come from the full-precision values, before narrowing
+    return compact_team_stats(add_team_ranks(df))
 
-    df['goals_against_rank'] = df['GOALS_AGAINST'].rank(ascending=True, method='min').astype(int)
-    df['xga_rank'] = df['XGA'].rank(ascending=True, method='min').astype(int)
-    df['open_play_xga_rank'] = df['OPEN_PLAY_XGA'].rank(ascending=True, method='min').astype(int)
-    df['set_piece_xga_rank'] = df['SET_PIECE_XGA'].rank(ascending=True, method='min').astype(int)
-    df['set_piece_goals_against_rank'] = df['SET_PIECE_GOALS_AGAINST'].rank(ascending=True, method='min').astype(int)
-    df['xga_per_90_rank'] = df['XGA_PER_90'].rank(ascending=True, method='min').astype(int)
-    df['xga_conversion_rank'] = df['XGA_CONVERSION'].rank(ascending=True, method='min').astype(int)
+def compact_team_stats(df):
+    """Team stats with ranks in compact dtypes, read-only."""
+    int_columns = TEAM_STATS_INT_COLUMNS + [col for col in df.columns if col.endswith('_rank')]
+    float_columns = [col for col in df.columns if col != 'TEAM' and col not in int_columns]
+    return compact_frame(df, ['TEAM'], int_columns, float_columns)
 
-    return df
+def data_version_of(df):
+    """Short fingerprint of a team stats frame."""
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()[:12]
 
-@st.cache_data(ttl=604800)  # Cache for 1 week
-def get_match_by_match_data(team_name):
+@st.cache_data(ttl=604800)  # Same lifetime as the team stats it fingerprints
+def fetch_data_version():
+    """Data version of the freshly queried team stats."""
+    return data_version_of(fetch_team_stats())
+
+@cache_shared(ttl=604800)  # Cache for 1 week
+@disk_cached(ttl=604800, scope=DATA_SOURCE)
+def fetch_match_by_match_data(team_name):
     """
     Get match-by-match xG, xGA, and points data for a specific team.
     """
-    conn = get_snowflake_connection()
-
     # Get all matches for the team with proper team stats
     query = f"""
     WITH all_matches AS (
@@ -325,24 +482,345 @@ def get_match_by_match_data(team_name):
     ORDER BY m."dateTime"
     """
 
-    df = pd.read_sql(query, conn)
+    if DATA_BACKEND == 'local':
+        df = local_backend.query_team_matches(LOCAL_SNAPSHOT_PATH, team_name)
+    else:
+        df = pd.read_sql(query, get_snowflake_connection())
 
-    # Calculate team's xG, xGA, goals for/against from team's perspective
-    df['XG_FOR'] = df.apply(lambda row: row['HOME_XG'] if row['VENUE'] == 'H' else row['AWAY_XG'], axis=1)
-    df['XG_AGAINST'] = df.apply(lambda row: row['AWAY_XG'] if row['VENUE'] == 'H' else row['HOME_XG'], axis=1)
-    df['GOALS_FOR'] = df.apply(lambda row: row['HOME_GOALS'] if row['VENUE'] == 'H' else row['AWAY_GOALS'], axis=1)
-    df['GOALS_AGAINST'] = df.apply(lambda row: row['AWAY_GOALS'] if row['VENUE'] == 'H' else row['HOME_GOALS'], axis=1)
+    return add_team_perspective(df)
+
+@cache_shared(ttl=604800)  # Cache for 1 week
+@disk_cached(ttl=604800, scope=DATA_SOURCE)
+def fetch_league_match_data():
+    """
+    Get match-by-match xG, goals and points for every team in one query.
+    Returns one row per team per match (each match appears once from each side),
+    ordered by team and date, with the same team-perspective columns as
+    get_match_by_match_data, in compact dtypes and read-only.
+
+    Set piece xG and goals and own goals (OWN_GOALS_FOR: the opponent's, counted
+    in GOALS_FOR) are split out per side so team stats can be rebuilt as of any
+    matchday (see get_team_stats_as_of).
+    """
+    query = """
+    WITH all_matches AS (
+        SELECT DISTINCT
+            "matchId",
+            "dateTime",
+            "homeSquadName",
+            "awaySquadName"
+        FROM IMPECT_EVENTS_STAGING
+    ),
+    match_stats AS (
+        SELECT
+            "matchId",
+            "squadName",
+            SUM(COALESCE(SHOT_XG, 0)) as xg,
+            SUM(CASE WHEN GOALS = 1 THEN 1 ELSE 0 END) as goals,
+            SUM(CASE WHEN OWNGOALS = 1 THEN 1 ELSE 0 END) as own_goals,
+            SUM(CASE WHEN SHOT_XG > 0 AND "phase" = 'SET_PIECE' THEN SHOT_XG ELSE 0 END) as set_piece_xg,
+            SUM(CASE WHEN GOALS = 1 AND "phase" = 'SET_PIECE' THEN 1 ELSE 0 END) as set_piece_goals
+        FROM IMPECT_EVENTS_STAGING
+        WHERE "squadName" IS NOT NULL
+            AND "squadName" != 'nan'
+        GROUP BY "matchId", "squadName"
+    ),
+    match_goals AS (
+        SELECT
+            m."matchId",
+            m."dateTime",
+            m."homeSquadName",
+            m."awaySquadName",
+            COALESCE(home_stats.goals, 0) + COALESCE(away_stats.own_goals, 0) as home_goals,
+            COALESCE(away_stats.goals, 0) + COALESCE(home_stats.own_goals, 0) as away_goals,
+            COALESCE(home_stats.xg, 0) as home_xg,
+            COALESCE(away_stats.xg, 0) as away_xg,
+            COALESCE(home_stats.set_piece_xg, 0) as home_set_piece_xg,
+            COALESCE(away_stats.set_piece_xg, 0) as away_set_piece_xg,
+            COALESCE(home_stats.set_piece_goals, 0) as home_set_piece_goals,
+            COALESCE(away_stats.set_piece_goals, 0) as away_set_piece_goals,
+            COALESCE(home_stats.own_goals, 0) as home_own_goals,
+            COALESCE(away_stats.own_goals, 0) as away_own_goals
+        FROM all_matches m
+        LEFT JOIN match_stats home_stats
+            ON m."matchId" = home_stats."matchId"
+            AND home_stats."squadName" = m."homeSquadName"
+        LEFT JOIN match_stats away_stats
+            ON m."matchId" = away_stats."matchId"
+            AND away_stats."squadName" = m."awaySquadName"
+    )
+    SELECT
+        "matchId",
+        "dateTime",
+        "homeSquadName" as team,
+        "awaySquadName" as opponent,
+        'H' as venue,
+        home_xg as xg_for,
+        away_xg as xg_against,
+        home_goals as goals_for,
+        away_goals as goals_against,
+        home_set_piece_xg as set_piece_xg_for,
+        away_set_piece_xg as set_piece_xg_against,
+        home_set_piece_goals as set_piece_goals_for,
+        away_set_piece_goals as set_piece_goals_against,
+        away_own_goals as own_goals_for,
+        home_own_goals as own_goals_against
+    FROM match_goals
+    UNION ALL
+    SELECT
+        "matchId",
+        "dateTime",
+        "awaySquadName" as team,
+        "homeSquadName" as opponent,
+        'A' as venue,
+        away_xg as xg_for,
+        home_xg as xg_against,
+        away_goals as goals_for,
+        home_goals as goals_against,
+        away_set_piece_xg as set_piece_xg_for,
+        home_set_piece_xg as set_piece_xg_against,
+        away_set_piece_goals as set_piece_goals_for,
+        home_set_piece_goals as set_piece_goals_against,
+        home_own_goals as own_goals_for,
+        away_own_goals as own_goals_against
+    FROM match_goals
+    ORDER BY team, "dateTime"
+    """
+
+    if DATA_BACKEND == 'local':
+        df = local_backend.query_league_matches(LOCAL_SNAPSHOT_PATH)
+    else:
+        df = pd.read_sql(query, get_snowflake_connection())
 
     # Calculate points
-    df['POINTS'] = df.apply(lambda row: 3 if row['GOALS_FOR'] > row['GOALS_AGAINST']
-                            else (1 if row['GOALS_FOR'] == row['GOALS_AGAINST'] else 0), axis=1)
+    df['POINTS'] = np.select(
+        [df['GOALS_FOR'] > df['GOALS_AGAINST'], df['GOALS_FOR'] == df['GOALS_AGAINST']],
+        [3, 1],
+        0
+    )
 
-    # Add match number and date label
-    df['match_number'] = range(1, len(df) + 1)
-    df['match_label'] = df.apply(lambda row: f"{row['match_number']}: {row['OPPONENT']}", axis=1)
+    # Match number within each team's season
+    df['match_number'] = df.groupby(['TEAM', season_of(df['dateTime'])]).cumcount() + 1
+
+    return compact_frame(
+        df,
+        category_columns=['TEAM', 'OPPONENT', 'VENUE'],
+        int_columns=[
+            'GOALS_FOR', 'GOALS_AGAINST', 'POINTS', 'match_number', 'SET_PIECE_GOALS_FOR',
+            'SET_PIECE_GOALS_AGAINST', 'OWN_GOALS_FOR', 'OWN_GOALS_AGAINST'
+        ],
+        float_columns=['XG_FOR', 'XG_AGAINST', 'SET_PIECE_XG_FOR', 'SET_PIECE_XG_AGAINST']
+    )
 
-    # Calculate rolling averages (right-aligned, includes current match)
-    df['xg_rolling_5'] = df['XG_FOR'].rolling(window=5, min_periods=1).mean()
-    df['xga_rolling_5'] = df['XG_AGAINST'].rolling(window=5, min_periods=1).mean()
+@cache_shared(ttl=604800)  # Cache for 1 week
+@disk_cached(ttl=604800, scope=DATA_SOURCE)
+def fetch_shot_quality():
+    """
+    Get every shot in one grouped query: shot count, xG and goals per team,
+    opponent, phase and xG to the hundredth (XG_CENTS, 0-100). Shots without
+    a phase are grouped as UNKNOWN. Small enough to bin in memory for any
+    number of seasons; see metrics.shot_quality.
+    """
+    query = """
+    SELECT
+        "squadName" as team,
+        CASE WHEN "squadName" = "homeSquadName" THEN "awaySquadName" ELSE "homeSquadName" END as opponent,
+        COALESCE("phase", 'UNKNOWN') as phase,
+        -- The small offset keeps values like 0.29 from flooring to 28 through float error
+        FLOOR(SHOT_XG * 100 + 0.000001) as xg_cents,
+        COUNT(*) as shots,
+        SUM(SHOT_XG) as xg,
+        SUM(CASE WHEN GOALS = 1 THEN 1 ELSE 0 END) as goals
+    FROM IMPECT_EVENTS_STAGING
+    WHERE SHOT_XG > 0
+        AND "squadName" IS NOT NULL
+        AND "squadName" != 'nan'
+        AND "squadName" IN ("homeSquadName", "awaySquadName")
+    GROUP BY 1, 2, 3, 4
+    ORDER BY team, opponent, phase, xg_cents
+    """
 
-    return df
+    if DATA_BACKEND == 'local':
+        df = local_backend.query_shot_quality(LOCAL_SNAPSHOT_PATH)
+    else:
+        df = pd.read_sql(query, get_snowflake_connection())
+
+    return compact_frame(
+        df,
+        category_columns=['TEAM', 'OPPONENT', 'PHASE'],
+        int_columns=['XG_CENTS', 'SHOTS', 'GOALS'],
+        float_columns=['XG']
+    )
+
+def fetch_live_match_totals(since):
+    """
+    Current home and away totals of every match kicking off at or after
+    `since`, for live matchday mode (see live.py). Not cached: it is polled
+    while matches are in play.
+
+    Returns one row per match with the score (HOME_GOALS and AWAY_GOALS, own
+    goals included) and each side's xG, set piece xG and goals and own goals.
+    """
+    query = """
+    WITH live_matches AS (
+        SELECT DISTINCT
+            "matchId",
+            "dateTime",
+            "homeSquadName",
+            "awaySquadName"
+        FROM IMPECT_EVENTS_STAGING
+        WHERE "dateTime" >= %(since)s
+    ),
+    match_stats AS (
+        SELECT
+            "matchId",
+            "squadName",
+            SUM(COALESCE(SHOT_XG, 0)) as xg,
+            SUM(CASE WHEN GOALS = 1 THEN 1 ELSE 0 END) as goals,
+            SUM(CASE WHEN OWNGOALS = 1 THEN 1 ELSE 0 END) as own_goals,
+            SUM(CASE WHEN SHOT_XG > 0 AND "phase" = 'SET_PIECE' THEN SHOT_XG ELSE 0 END) as set_piece_xg,
+            SUM(CASE WHEN GOALS = 1 AND "phase" = 'SET_PIECE' THEN 1 ELSE 0 END) as set_piece_goals
+        FROM IMPECT_EVENTS_STAGING
+        WHERE "dateTime" >= %(since)s
+            AND "squadName" IS NOT NULL
+            AND "squadName" != 'nan'
+        GROUP BY "matchId", "squadName"
+    )
+    SELECT
+        m."matchId",
+        m."dateTime",
+        m."homeSquadName",
+        m."awaySquadName",
+        COALESCE(home_stats.goals, 0) + COALESCE(away_stats.own_goals, 0) as home_goals,
+        COALESCE(away_stats.goals, 0) + COALESCE(home_stats.own_goals, 0) as away_goals,
+        COALESCE(home_stats.xg, 0) as home_xg,
+        COALESCE(away_stats.xg, 0) as away_xg,
+        COALESCE(home_stats.set_piece_xg, 0) as home_set_piece_xg,
+        COALESCE(away_stats.set_piece_xg, 0) as away_set_piece_xg,
+        COALESCE(home_stats.set_piece_goals, 0) as home_set_piece_goals,
+        COALESCE(away_stats.set_piece_goals, 0) as away_set_piece_goals,
+        COALESCE(home_stats.own_goals, 0) as home_own_goals,
+        COALESCE(away_stats.own_goals, 0) as away_own_goals
+    FROM live_matches m
+    LEFT JOIN match_stats home_stats
+        ON m."matchId" = home_stats."matchId"
+        AND home_stats."squadName" = m."homeSquadName"
+    LEFT JOIN match_stats away_stats
+        ON m."matchId" = away_stats."matchId"
+        AND away_stats."squadName" = m."awaySquadName"
+    ORDER BY m."dateTime", m."matchId"
+    """
+
+    if DATA_BACKEND == 'local':
+        return local_backend.query_live_match_totals(LOCAL_SNAPSHOT_PATH, since)
+    return pd.read_sql(query, get_snowflake_connection(), params={'since': since})
+
+# As-of views keep one entry per matchday looked at
+MAX_CACHED_MATCHDAYS = 64
+
+# Marks the data versions of live matchday revisions (see live.py)
+LIVE_VERSION_MARK = '+live'
+
+@cache_shared(max_entries=4, show_spinner=False)
+def compute_matchday_index(data_version):
+    """
+    Prefix sums of every team's match facts by matchday (see
+    metrics.matchday_index), one build per data version.
+    """
+    return matchday_index(fetch_league_match_data())
+
+def get_matchday_index(data_version):
+    """
+    Matchday index for a data version, from the analytics bundle when there
+    is one. A live matchday revision's version gives the index as live mode
+    last updated it.
+
+    Returns:
+        The index, or None for a bundle built before the index was added to
+        it; rebuilding the bundle adds it
+    """
+    if LIVE_VERSION_MARK in data_version:
+        # live.py imports this module, so it loads on first use
+        from live import live_matchday_index
+        return live_matchday_index(data_version)
+    bundle = current_bundle()
+    if bundle is not None:
+        return bundle.get('matchday_index')
+    return compute_matchday_index(data_version)
+
+@cache_shared(max_entries=MAX_CACHED_MATCHDAYS, show_spinner=False)
+def compute_team_stats_as_of(data_version, matchday):
+    """Team stats with ranks as they stood after a matchday, from the matchday index."""
+    return compact_team_stats(add_team_ranks(team_stats_as_of(get_matchday_index(data_version), matchday)))
+
+@cache_shared(max_entries=4, show_spinner=False)
+def compute_latest_team_stats(data_version):
+    """The latest season's team stats to date, one per data version."""
+    # The matchday index's last column is the latest season's latest matchday
+    return compute_team_stats_as_of(data_version, compute_matchday_index(data_version)['matchdays'])
+
+# The dashboard reads data through these: from the analytics bundle when one
+# has been built (see build_bundle.py), otherwise from the cached queries
+
+def get_team_stats():
+    """
+    Team-level xG statistics with ranks for the latest season to date,
+    compact and read-only.
+    """
+    bundle = current_bundle()
+    if bundle is not None:
+        return bundle['team_stats']
+    return compute_latest_team_stats(fetch_data_version())
+
+def get_data_version():
+    """
+    Short fingerprint of the current team stats.
+    Derived caches are keyed on this so they only rebuild when the data changes.
+    """
+    bundle = current_bundle()
+    if bundle is not None:
+        return bundle['version']
+    return fetch_data_version()
+
+def get_match_by_match_data(team_name):
+    """
+    Match-by-match xG, xGA, and points data for a specific team. From a bundle
+    it also has the points progression and xPoints columns.
+    """
+    bundle = current_bundle()
+    if bundle is not None:
+        return bundle['team_matches_by_team'][team_name]
+    return fetch_match_by_match_data(team_name)
+
+def get_league_match_data():
+    """Match-by-match facts for every team, one row per team per match."""
+    bundle = current_bundle()
+    if bundle is not None:
+        return bundle['match_facts']
+    return fetch_league_match_data()
+
+def get_shot_quality():
+    """Shots grouped by team, opponent, phase and xG to the hundredth."""
+    bundle = current_bundle()
+    # Bundles built before shot quality was added don't have it
+    if bundle is not None and 'shot_quality' in bundle:
+        return bundle['shot_quality']
+    return fetch_shot_quality()
+
+def get_team_stats_as_of(data_version, matchday=None):
+    """
+    Team stats as they stood after a matchday, with the same columns and
+    dtypes as get_team_stats. None for the season to date (get_team_stats).
+
+    Matchdays are columns of the matchday index, which run season by season
+    (see metrics.matchday_columns), so the stats cover that matchday's season
+    and its teams. The analytics bundle has each season's stats after its
+    last matchday.
+    """
+    if matchday is None:
+        return get_team_stats()
+    bundle = current_bundle()
+    # Live revisions have their own data version, so they never match the bundle's
+    if bundle is not None and data_version == bundle['version'] and matchday in bundle.get('team_stats_by_matchday', {}):
+        return bundle['team_stats_by_matchday'][matchday]
+    return compute_team_stats_as_of(data_version, matchday)
@@ -0,0 +1,283 @@
+"""
+Disk-persistent result cache that survives process restarts
+
+`@disk_cached` sits under `@st.cache_data` on the query and table functions:
+a memory miss (a fresh process after a redeploy or crash) reads the result
+from local disk before going to the warehouse. Results are DataFrames stored
+as Parquet files, with a small JSON index keyed on function, arguments and
+scope recording when each was written and last read.
+
+- Functions taking the data version are keyed on it like any other argument.
+  The warehouse queries, which decide the data version, expire after `ttl`
+  seconds, the same lifetime as their memory cache.
+- Files and the index are written to a temporary file and renamed into place,
+  so readers never see a partial write.
+- The cache is bounded by DISK_CACHE_MAX_MB, evicting the least recently read
+  entries first.
+
+Several app replicas can share one cache by pointing DISK_CACHE_DIR at a
+shared volume. Exactly one of them fills a missing entry: the first to miss
+takes a lease (a lock file that expires after DISK_CACHE_LEASE_SECONDS) and
+runs the function, while the others wait for the entry to appear instead of
+all querying the warehouse at once. If the holder dies its lease expires and
+another replica takes over; at worst two replicas fill the same entry, which
+the atomic writes make harmless.
+
+Set DISK_CACHE_DIR (default .cache/results) to move it, or to an empty value
+to turn it off. `python disk_cache.py` lists the entries, `--clear` empties it.
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+import pandas as pd
+
+DISK_CACHE_DIR = os.getenv('DISK_CACHE_DIR', '.cache/results')
+DISK_CACHE_MAX_MB = float(os.getenv('DISK_CACHE_MAX_MB', '512'))
+DISK_CACHE_LEASE_SECONDS = float(os.getenv('DISK_CACHE_LEASE_SECONDS', '300'))
+INDEX_FILE = 'index.json'
+INDEX_LEASE_SECONDS = 10
+LEASE_POLL_SECONDS = 0.1
+
+# Index read-modify-writes within this process take turns, across processes
+# they take the index lease
+_index_lock = threading.Lock()
+
+
+def cache_path(name):
+    return os.path.join(DISK_CACHE_DIR, name)
+
+
+def atomic_write(path, write):
+    """
+    Write a file by calling write(temp_path) and renaming the result into place.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_index():
+    """Cache index: key to entry metadata. Empty if missing or unreadable."""
+    try:
+        with open(cache_path(INDEX_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_index(index):
+    def write(path):
+        with open(path, 'w') as f:
+            json.dump(index, f, indent=1)
+    atomic_write(cache_path(INDEX_FILE), write)
+
+
+def lease_owner():
+    """Identifies this thread of this process on this host in lease files."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def acquire_lease(name, seconds):
+    """
+    Try to take a named lease. Returns True if this thread now holds it.
+
+    A lease is a lock file created exclusively; one older than `seconds` is
+    treated as abandoned and removed so the next attempt can take it.
+    """
+    path = cache_path(f"{name}.lease")
+    os.makedirs(DISK_CACHE_DIR, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(path) > seconds:
+                os.remove(path)
+        except OSError:
+            pass
+        return False
+    with os.fdopen(fd, 'w') as f:
+        f.write(lease_owner())
+    return True
+
+
+def release_lease(name):
+    """Give up a lease, unless it expired and someone else has taken it since."""
+    path = cache_path(f"{name}.lease")
+    try:
+        with open(path) as f:
+            if f.read() == lease_owner():
+                os.remove(path)
+    except OSError:
+        pass
+
+
+@contextmanager
+def index_lock():
+    """Hold the index for a read-modify-write, within and across processes."""
+    with _index_lock:
+        while not acquire_lease('index', INDEX_LEASE_SECONDS):
+            time.sleep(LEASE_POLL_SECONDS / 10)
+        try:
+            yield
+        finally:
+            release_lease('index')
+
+
+def cache_key(func, args, kwargs, scope):
+    """Stable key for one call: function, arguments and scope."""
+    call = repr((func.__module__, func.__qualname__, args, sorted(kwargs.items()), scope))
+    return hashlib.sha1(call.encode()).hexdigest()
+
+
+def evict(index, max_bytes):
+    """Drop least recently read entries (and their files) until the index fits max_bytes."""
+    total = sum(entry['size'] for entry in index.values())
+    for key in sorted(index, key=lambda key: index[key]['accessed']):
+        if total <= max_bytes:
+            break
+        entry = index.pop(key)
+        total -= entry['size']
+        try:
+            os.remove(cache_path(entry['file']))
+        except OSError:
+            pass
+
+
+def load(key, ttl=None):
+    """Cached DataFrame for a key, or None if missing, expired or unreadable."""
+    # The index is replaced atomically, so reading it needs no lock
+    entry = read_index().get(key)
+    if entry is None or (ttl and time.time() - entry['created'] > ttl):
+        return None
+
+    try:
+        df = pd.read_parquet(cache_path(entry['file']))
+    except (OSError, ValueError):
+        return None
+
+    # Recency for eviction only, not worth failing a read over
+    try:
+        with index_lock():
+            index = read_index()
+            if key in index:
+                index[key]['accessed'] = time.time()
+                write_index(index)
+    except OSError:
+        pass
+    return df
+
+
+def store(key, df, description):
+    """Write a DataFrame under a key and evict down to the size bound."""
+    file_name = f"{key}.parquet"
+    atomic_write(cache_path(file_name), lambda path: df.to_parquet(path, compression='snappy'))
+
+    now = time.time()
+    with index_lock():
+        index = read_index()
+        index[key] = {
+            'file': file_name,
+            'call': description,
+            'created': now,
+            'accessed': now,
+            'size': os.path.getsize(cache_path(file_name)),
+        }
+        evict(index, DISK_CACHE_MAX_MB * 1e6)
+        write_index(index)
+
+
+def disk_cached(ttl=None, scope=''):
+    """
+    Decorator persisting a DataFrame-returning function's results to disk.
+
+    Args:
+        ttl: Seconds an entry stays valid (None for as long as it is kept)
+        scope: Extra key part, e.g. which data backend the results came from
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not DISK_CACHE_DIR:
+                return func(*args, **kwargs)
+
+            key = cache_key(func, args, kwargs, scope)
+            while True:
+                df = load(key, ttl)
+                if df is not None:
+                    return df
+                try:
+                    leased = acquire_lease(key, DISK_CACHE_LEASE_SECONDS)
+                except OSError:
+                    # Cache directory unusable: just run the function
+                    return func(*args, **kwargs)
+                if leased:
+                    break
+                # Another thread or replica is filling this entry
+                time.sleep(LEASE_POLL_SECONDS)
+
+            try:
+                # It may have been filled between our miss and taking the lease
+                df = load(key, ttl)
+                if df is not None:
+                    return df
+                df = func(*args, **kwargs)
+                if isinstance(df, pd.DataFrame):
+                    # A full disk or read-only volume only costs the next restart a query
+                    try:
+                        store(key, df, f"{func.__qualname__}{args}")
+                    except OSError:
+                        pass
+                return df
+            finally:
+                release_lease(key)
+        return wrapper
+    return decorator
+
+
+def clear():
+    """Remove every cached entry."""
+    with index_lock():
+        for entry in read_index().values():
+            try:
+                os.remove(cache_path(entry['file']))
+            except OSError:
+                pass
+        write_index({})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the disk result cache.")
+    parser.add_argument('--clear', action='store_true', help="Remove every entry")
+    args = parser.parse_args()
+
+    if args.clear:
+        clear()
+        print(f"Cleared {DISK_CACHE_DIR}")
+        return
+
+    index = read_index()
+    now = time.time()
+    for entry in sorted(index.values(), key=lambda entry: entry['accessed'], reverse=True):
+        print(f"{entry['size'] / 1e3:>9.1f} KB  written {(now - entry['created']) / 3600:>6.1f}h ago  "
+              f"read {(now - entry['accessed']) / 3600:>6.1f}h ago  {entry['call']}")
+    total = sum(entry['size'] for entry in index.values())
+    print(f"{len(index)} entries, {total / 1e6:.1f} of {DISK_CACHE_MAX_MB:.0f} MB in {DISK_CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
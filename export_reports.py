@@ -0,0 +1,336 @@
+"""
+Headless export of every team's dashboard to static files
+
+Renders the four dashboard views (League Overview, Match Trends, League
+Table, Team Comparison) for each team to a self-contained HTML report, plus
+PNG charts and tables and one combined PDF matchday pack when kaleido 1.0 or
+later and a Chrome for it are installed (plotly_get_chrome downloads one).
+Data is loaded once and shared with a pool of worker processes, one team
+per task. With an analytics bundle (see build_bundle.py) each worker maps the
+bundle itself instead, sharing its pages with the other workers.
+
+Usage:
+    python export_reports.py                     # every team, html/png/pdf
+    python export_reports.py --teams "Stoke City" --formats html
+    python export_reports.py --workers 8 --output-dir reports
+"""
+import argparse
+import importlib.metadata
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from badge_mapping import get_all_badges, image_to_base64, slugify
+from bundle import current_bundle
+from charts import (
+    build_team_scatter, build_rolling_figure, build_ppg_figure,
+    build_pizza_figure, build_form_strip, build_table_figure, COMPARISON_COLORS
+)
+from metrics import (
+    add_points_progression, add_percentiles, form_results, team_match_data,
+    latest_season_match_data
+)
+from tables import (
+    ATTACK_METRICS, DEFEND_METRICS, build_stat_table, team_stats_display, style_precomputed,
+    format_league_table, league_table_css, match_results_table, get_league_table_data
+)
+
+FORMATS = ['html', 'png', 'pdf']
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{team} - Championship xG Analysis</title>
+<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>
+<style>
+body {{ background-color: #0e1117; color: #ffffff; font-family: sans-serif; padding: 1rem 2rem; }}
+h1, h2, h3 {{ color: #ffffff; }}
+table {{ border-collapse: collapse; margin-bottom: 1rem; font-size: 13px; }}
+th {{ color: #a0a0a0; padding: 8px; }}
+.row {{ display: flex; gap: 1rem; flex-wrap: wrap; }}
+.row > div {{ flex: 1; min-width: 400px; }}
+</style>
+</head>
+<body>
+<h1>⚽ {team} - Championship xG Analysis</h1>
+{sections}
+<p style="color: #808080; font-size: 12px;">Exported {exported}</p>
+</body>
+</html>
+"""
+
+# Shared by every task in a worker process, set once by init_worker
+_shared = {}
+
+
+def load_report_data():
+    """
+    Load everything the reports need in one pass, all for the latest season
+    as the dashboard shows it: team stats, each team's matches, the league
+    table and form.
+    """
+    from database import get_team_stats, get_league_match_data, get_data_version
+
+    df = get_team_stats()
+    season_match_data = latest_season_match_data(get_league_match_data())
+
+    return {
+        'df': df,
+        'match_data_by_team': {team: team_match_data(season_match_data, team) for team in df['TEAM']},
+        'league_table': get_league_table_data(get_data_version()),
+        'form': form_results(season_match_data),
+    }
+
+
+def init_worker(data, badges):
+    """
+    Process pool initializer: keep the shared data for every task. data is
+    None when there is a bundle to map instead of pickling it to each worker.
+    """
+    if data is None:
+        data = load_report_data()
+    _shared['data'] = data
+    _shared['badges'] = badges
+    _shared['stat_tables'] = {
+        'attack': build_stat_table(data['df'], ATTACK_METRICS),
+        'defend': build_stat_table(data['df'], DEFEND_METRICS),
+    }
+    _shared['league_table'] = format_league_table(data['league_table'])
+    _shared['percentiles'] = add_percentiles(data['df'])
+
+
+def comparison_teams_for(league_table, team):
+    """The team plus its neighbours directly above and below in the table."""
+    teams = list(league_table['TEAM'])
+    position = teams.index(team)
+    start = min(max(position - 1, 0), max(len(teams) - 3, 0))
+    return teams[start:start + 3]
+
+
+def build_team_views(team):
+    """
+    Figures and tables for each dashboard view, for one team. Tables are
+    (title, display frame, cell CSS or None).
+    """
+    data = _shared['data']
+    df = data['df']
+    match_data = data['match_data_by_team'][team]
+
+    views = {}
+
+    views['League Overview'] = {
+        'figures': [
+            build_team_scatter(
+                df, 'XG_PER_90', 'XGA_PER_90', team,
+                x_title="xG Per 90", y_title="xGA Per 90",
+                hover_labels=("xG/90", "xGA/90"), badges=_shared['badges']
+            ),
+            build_team_scatter(
+                df, 'XG_CONVERSION', 'XGA_CONVERSION', team,
+                x_title="xG Conversion", y_title="xGA Conversion",
+                hover_labels=("xG Conv", "xGA Conv"), hover_format='.3f',
+                badges=_shared['badges']
+            ),
+        ],
+        'tables': [
+            ('⚔️ Attacking Stats', *team_stats_display(_shared['stat_tables']['attack'], team)),
+            ('🛡️ Defensive Stats', *team_stats_display(_shared['stat_tables']['defend'], team)),
+        ],
+    }
+
+    if len(match_data) > 0:
+        progression = add_points_progression(match_data)
+        views['Match Trends'] = {
+            'figures': [build_rolling_figure(progression), build_ppg_figure(progression)],
+            'tables': [('Match Results', match_results_table(match_data), None)],
+        }
+
+    display_table, css = _shared['league_table']
+    views['League Table'] = {
+        'figures': [],
+        'tables': [('🏆 League Table: Actual vs Expected', display_table, league_table_css(display_table, css, team))],
+    }
+
+    comparison_teams = comparison_teams_for(data['league_table'], team)
+    percentiles = _shared['percentiles']
+    form = data['form']
+    rows = [list(form['teams']).index(t) for t in comparison_teams]
+    views['Team Comparison'] = {
+        'figures': [
+            build_pizza_figure(percentiles[percentiles['TEAM'] == t].iloc[0], COMPARISON_COLORS[idx])
+            for idx, t in enumerate(comparison_teams)
+        ] + [
+            build_form_strip(
+                form['teams'][rows], form['points'][rows, -10:],
+                form['result'][rows, -10:], form['hover_text'][rows, -10:]
+            )
+        ],
+        'tables': [],
+    }
+
+    return views
+
+
+def render_team(team, output_dir, formats):
+    """
+    Render one team's report. Runs in a worker process.
+
+    Returns:
+        (team, seconds, list of PNG paths in page order, image export error
+        or None)
+    """
+    start = time.perf_counter()
+    team_dir = os.path.join(output_dir, slugify(team))
+    os.makedirs(team_dir, exist_ok=True)
+
+    views = build_team_views(team)
+
+    if 'html' in formats:
+        sections = []
+        for view_name, view in views.items():
+            parts = [f"<h2>{view_name}</h2>", '<div class="row">']
+            for fig in view['figures']:
+                parts.append(f"<div>{fig.to_html(full_html=False, include_plotlyjs=False)}</div>")
+            parts.append('</div>')
+            for title, display, css in view['tables']:
+                styler = display.style if css is None else style_precomputed(display, css)
+                parts.append(f"<h3>{title}</h3>")
+                parts.append(styler.hide(axis='index').to_html())
+            sections.append('\n'.join(parts))
+
+        html = PAGE_TEMPLATE.format(
+            team=team,
+            sections='\n'.join(sections),
+            exported=time.strftime('%Y-%m-%d %H:%M')
+        )
+        with open(os.path.join(team_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    png_paths, image_error = [], None
+    if 'png' in formats or 'pdf' in formats:
+        try:
+            for view_name, view in views.items():
+                # Tables are rasterised as table figures, after the view's charts
+                figures = view['figures'] + [build_table_figure(display, css) for _, display, css in view['tables']]
+                for idx, fig in enumerate(figures):
+                    path = os.path.join(team_dir, f"{slugify(view_name)}_{idx + 1}.png")
+                    fig.write_image(path, width=1100, height=fig.layout.height or 450, scale=1)
+                    png_paths.append(path)
+        except Exception as e:
+            # One team's failed image export leaves the rest of the run going
+            png_paths, image_error = [], f"{type(e).__name__}: {' '.join(str(e).split())}"
+
+    return team, time.perf_counter() - start, png_paths, image_error
+
+
+def write_pdf(pages, pdf_path):
+    """
+    Combined PDF with one page per team, each page the team's charts and
+    tables stacked vertically.
+    """
+    from PIL import Image
+
+    page_images = []
+    for png_paths in pages:
+        charts = [Image.open(path).convert('RGB') for path in png_paths]
+        if not charts:
+            continue
+        width = max(chart.width for chart in charts)
+        page = Image.new('RGB', (width, sum(chart.height for chart in charts)), '#0e1117')
+        y = 0
+        for chart in charts:
+            page.paste(chart, (0, y))
+            y += chart.height
+        page_images.append(page)
+
+    if page_images:
+        page_images[0].save(pdf_path, save_all=True, append_images=page_images[1:])
+
+
+def image_export_problem():
+    """
+    Why PNG and PDF export can't run here, or None when they can. plotly
+    needs kaleido 1.0 or later, and kaleido drives a Chrome install.
+    """
+    try:
+        kaleido_version = importlib.metadata.version('kaleido')
+    except importlib.metadata.PackageNotFoundError:
+        return "kaleido is not installed (pip install -r requirements.txt)"
+    if int(kaleido_version.split('.')[0]) < 1:
+        return f"kaleido {kaleido_version} is too old for plotly, which needs 1.0 or later (pip install -U kaleido)"
+
+    # A tiny export finds out whether kaleido can start Chrome
+    import plotly.graph_objects as go
+    try:
+        go.Figure().to_image(format='png', width=10, height=10)
+    except Exception as e:
+        reason = ' '.join(str(e).split())
+        return f"kaleido can't export images ({type(e).__name__}: {reason}); install Chrome with plotly_get_chrome"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export every team's dashboard to static files.")
+    parser.add_argument('--output-dir', default='reports', help="Directory for the exported reports")
+    parser.add_argument('--teams', nargs='*', help="Teams to export (default: all)")
+    parser.add_argument('--formats', default='html,png,pdf', help="Comma separated: html, png, pdf")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    args = parser.parse_args()
+
+    formats = {fmt.strip() for fmt in args.formats.split(',') if fmt.strip()}
+    unknown = formats - set(FORMATS)
+    if unknown:
+        parser.error(f"Unknown formats: {', '.join(sorted(unknown))}")
+
+    # PNG and PDF output need kaleido and Chrome for static image export
+    image_problem = image_export_problem() if formats & {'png', 'pdf'} else None
+    if image_problem:
+        print(f"{image_problem}, skipping PNG/PDF export")
+        formats -= {'png', 'pdf'}
+
+    total_start = time.perf_counter()
+
+    print("Loading data...")
+    load_start = time.perf_counter()
+    data = load_report_data()
+    badges = {team: image_to_base64(path, size=(64, 64)) for team, path in get_all_badges().items()}
+    print(f"Loaded data in {time.perf_counter() - load_start:.1f}s")
+
+    league_teams = list(data['league_table']['TEAM'])
+    unknown_teams = set(args.teams or []) - set(league_teams)
+    if unknown_teams:
+        parser.error(f"Unknown teams: {', '.join(sorted(unknown_teams))}")
+    teams = args.teams or league_teams
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    results, image_errors = {}, {}
+    worker_data = None if current_bundle() is not None else data
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(worker_data, badges)) as pool:
+        futures = [pool.submit(render_team, team, args.output_dir, formats) for team in teams]
+        for future in as_completed(futures):
+            team, seconds, png_paths, image_error = future.result()
+            results[team] = (seconds, png_paths)
+            print(f"  {team:<25} {seconds:6.2f}s")
+            if image_error:
+                image_errors[team] = image_error
+                print(f"    PNG/PDF export failed: {image_error}")
+
+    if 'pdf' in formats and results:
+        pdf_path = os.path.join(args.output_dir, 'matchday_pack.pdf')
+        write_pdf([results[team][1] for team in teams], pdf_path)
+        print(f"Wrote {pdf_path}")
+
+    render_times = [seconds for seconds, _ in results.values()]
+    print("")
+    print(f"Teams exported:   {len(results)}")
+    if image_errors:
+        print(f"Without images:   {len(image_errors)} (see above)")
+    if render_times:
+        print(f"Slowest team:     {max(render_times):.2f}s")
+        print(f"Mean per team:    {sum(render_times) / len(render_times):.2f}s")
+    print(f"Total wall time:  {time.perf_counter() - total_start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Cached figure construction for the dashboard
+
+Each function builds its figures from the cached data and returns Plotly
+JSON, cached on the data version plus the selection the figure depends on.
+Reruns that change neither skip figure construction entirely.
+"""
+import json
+import numpy as np
+import streamlit as st
+from database import (
+    get_match_by_match_data, get_league_match_data, get_shot_quality, get_matchday_index,
+    get_team_stats_as_of, cache_shared, MAX_CACHED_MATCHDAYS
+)
+from bundle import current_bundle
+from badge_mapping import get_all_badges, image_to_base64, load_badge_manifest, get_badge_url
+from charts import (
+    build_team_scatter, build_rolling_figure, build_ppg_figure,
+    build_pizza_figure, build_form_strip, build_shot_quality_figure, build_position_figure, COMPARISON_COLORS
+)
+from metrics import (
+    add_points_progression, add_percentiles, team_percentiles, form_results, season_of, season_position,
+    season_span, season_teams, shot_quality, shot_quality_summary, team_season_stats, similarity_index,
+    most_similar
+)
+
+# Enough for every team/comparison combination in use without growing unbounded
+MAX_CACHED_FIGURES = 256
+
+
+@st.cache_resource
+def load_badge_images():
+    """
+    Badge source for every team, for use in figures.
+
+    Uses static URLs of the optimized badges from build_badges.py so figures
+    only carry a short link the browser caches. Falls back to encoding the
+    badges inline when the build step hasn't been run.
+    """
+    manifest = load_badge_manifest()
+    badges = {}
+    for team, path in get_all_badges().items():
+        badge = get_badge_url(team, 'chart', manifest) or image_to_base64(path, size=(64, 64))
+        if badge:
+            badges[team] = badge
+    return badges
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def league_scatter_figures(data_version, selected_team, matchday=None):
+    """League Overview scatters (xG/xGA per 90, conversion) as Plotly JSON."""
+    df = get_team_stats_as_of(data_version, matchday)
+    badges = load_badge_images()
+
+    # Teams above the balance line: better defense (lower xGA)
+    # Teams below the balance line: better attack (higher xG)
+    fig1 = build_team_scatter(
+        df, 'XG_PER_90', 'XGA_PER_90', selected_team,
+        x_title="xG Per 90",
+        y_title="xGA Per 90",
+        hover_labels=("xG/90", "xGA/90"),
+        badges=badges
+    )
+
+    # Teams above the balance line: opponents convert more chances
+    # Teams below the balance line: team converts more chances
+    fig2 = build_team_scatter(
+        df, 'XG_CONVERSION', 'XGA_CONVERSION', selected_team,
+        x_title="xG Conversion",
+        y_title="xGA Conversion",
+        hover_labels=("xG Conv", "xGA Conv"),
+        hover_format='.3f',
+        badges=badges
+    )
+
+    return fig1.to_json(), fig2.to_json()
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def match_trend_figures(data_version, team, matchday=None):
+    """Rolling xG and points progression charts for a team as Plotly JSON."""
+    match_data = team_matches_as_of(data_version, team, matchday)
+    # Bundled match data already has the points progression, over every season
+    if 'xpoints' not in match_data or matchday is not None:
+        match_data = add_points_progression(match_data)
+    return build_rolling_figure(match_data).to_json(), build_ppg_figure(match_data).to_json()
+
+
+@cache_shared(max_entries=MAX_CACHED_MATCHDAYS, show_spinner=False)
+def compute_team_percentiles(data_version, matchday=None):
+    """Every team's percentile rankings, one shared read-only frame per data version and matchday."""
+    return team_percentiles(get_team_stats_as_of(data_version, matchday))
+
+
+def get_team_percentiles(data_version, matchday=None):
+    """Every team's percentile rankings, from the analytics bundle when there is one."""
+    bundle = current_bundle()
+    if bundle is not None and matchday is None:
+        return bundle['percentiles']
+    return compute_team_percentiles(data_version, matchday)
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def pizza_figures(data_version, comparison_teams, matchday=None):
+    """One percentile pizza chart per comparison team as Plotly JSON."""
+    df = add_percentiles(get_team_stats_as_of(data_version, matchday), get_team_percentiles(data_version, matchday))
+    return [
+        build_pizza_figure(df[df['TEAM'] == team].iloc[0], COMPARISON_COLORS[idx]).to_json()
+        for idx, team in enumerate(comparison_teams)
+    ]
+
+
+@cache_shared(max_entries=4, show_spinner=False)
+def get_form_results(data_version):
+    """Every team's results as aligned team x match arrays, one build per data version."""
+    return form_results(get_league_match_data())
+
+
+def select_form(data_version, teams=None, n_matches=None, matchday=None):
+    """
+    Rows of the form arrays for the given teams (all teams if None), keeping
+    only their last n matches (the full season if None), up to a matchday
+    (the latest if None). Up to a matchday, all teams are that season's teams
+    and the full season is the matches of that season.
+    """
+    form = get_form_results(data_version)
+    if matchday is None:
+        rows = slice(None) if teams is None else [list(form['teams']).index(team) for team in teams]
+        columns = slice(None) if n_matches is None else slice(-n_matches, None)
+        return {key: values[rows] if key == 'teams' else values[rows, columns] for key, values in form.items()}
+
+    index = get_matchday_index(data_version)
+    index_rows = {team: row for row, team in enumerate(index['teams'])}
+    if teams is None:
+        teams = index['teams'][season_teams(index, matchday)]
+    rows = [list(form['teams']).index(team) for team in teams]
+
+    # Matches each team had played, over every season, before its season and by the matchday
+    start, _ = season_span(index, matchday)
+    matches = index['cumulative']['MATCHES'][[index_rows[team] for team in teams]]
+    before_season = matches[:, start].astype(int)
+    shown = matches[:, matchday].astype(int)
+
+    # Rows are right-aligned per team, so each team's window starts in its own column
+    points = form['points'][rows]
+    n_columns = points.shape[1]
+    played = (~np.isnan(points)).sum(axis=1)
+    width = n_matches or int((shown - before_season).max(initial=0))
+    match_idx = shown[:, None] - width + np.arange(width)
+    columns = np.clip(n_columns - played[:, None] + match_idx, 0, None)
+    # The last n matches can reach back into earlier seasons, the full season can't
+    missing = match_idx < (0 if n_matches else before_season[:, None])
+
+    selected = {'teams': form['teams'][rows]}
+    for key, values in form.items():
+        if key != 'teams':
+            window = np.take_along_axis(values[rows], columns, axis=1)
+            window[missing] = '' if window.dtype == object else np.nan
+            selected[key] = window
+    return selected
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def form_strip_figure(data_version, teams=None, n_matches=None, matchday=None):
+    """Form strip for several teams as one heatmap, as Plotly JSON."""
+    form = select_form(data_version, teams, n_matches, matchday)
+    return build_form_strip(form['teams'], form['points'], form['result'], form['hover_text']).to_json()
+
+
+def team_matches_as_of(data_version, team, matchday=None):
+    """
+    A team's match-by-match data, only its matches in a matchday's season up
+    to that matchday when given.
+    """
+    match_data = get_match_by_match_data(team)
+    if matchday is None:
+        return match_data
+    index = get_matchday_index(data_version)
+    start, _ = season_span(index, matchday)
+    season = index['seasons'][season_position(index, matchday)]
+    in_season = season_of(match_data['dateTime']) == season
+    # Rows are in date order, so counting the season's rows numbers its matches
+    return match_data[in_season & (np.cumsum(in_season) <= matchday - start)].reset_index(drop=True)
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def position_figure(data_version, selected_team, matchday=None):
+    """
+    League position of the season's teams after every matchday of the season
+    (the latest, to the given matchday) as a bump chart, as Plotly JSON.
+    """
+    index = get_matchday_index(data_version)
+    matchday = index['matchdays'] if matchday is None else matchday
+    start, _ = season_span(index, matchday)
+    rows = season_teams(index, matchday)
+    return build_position_figure(index['teams'][rows], index['positions'][rows, start:matchday], selected_team).to_json()
+
+
+@cache_shared(max_entries=4, show_spinner=False)
+def get_similarity_index(data_version):
+    """
+    Nearest-neighbour index over every team-season's standardised metrics
+    (see metrics.similarity_index), from the analytics bundle when there is
+    one, otherwise one build per data version.
+    """
+    bundle = current_bundle()
+    # Bundles built before team_seasons was added lack it
+    if bundle is not None and 'similarity_index' in bundle:
+        return bundle['similarity_index']
+    return similarity_index(team_season_stats(get_league_match_data()))
+
+
+def similar_teams(data_version, team, n=5, current_only=False):
+    """
+    Team-seasons most like a team's season in the latest season, nearest
+    first, as rows of the index's team_seasons with a DISTANCE column. None
+    when the team has no matches in the latest season.
+    """
+    index = get_similarity_index(data_version)
+    if team not in index['current']:
+        return None
+    positions, distances = most_similar(index, team, n, current_only)
+    return index['team_seasons'].iloc[positions].assign(DISTANCE=distances)
+
+
+@cache_shared(max_entries=4, show_spinner=False)
+def get_shot_quality_data(data_version):
+    """
+    Binned shot quality for every team and phase (see metrics.shot_quality)
+    plus its per-team summary, one build per data version.
+    """
+    quality = shot_quality(get_shot_quality())
+    # Shots cover every season, so rates are per match over every season too
+    matches_played = get_league_match_data()['TEAM'].astype(str).value_counts()
+    return {**quality, 'summary': shot_quality_summary(quality, matches_played)}
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def shot_quality_figure(data_version, team, phase):
+    """Shot quality histogram for a team in one phase as Plotly JSON."""
+    quality = get_shot_quality_data(data_version)
+    team_idx = list(quality['teams']).index(team)
+    phase_idx = list(quality['phases']).index(phase)
+    return build_shot_quality_figure(
+        quality['bin_edges'],
+        quality['for']['shots'][team_idx, phase_idx],
+        quality['against']['shots'][team_idx, phase_idx],
+        quality['for']['shots'][:, phase_idx].sum(axis=0)
+    ).to_json()
+
+
+def show_figure(fig_json):
+    """Render a cached Plotly JSON figure."""
+    st.plotly_chart(json.loads(fig_json), use_container_width=True)
@@ -0,0 +1,252 @@
+"""
+Seeded synthetic IMPECT event generator
+
+Produces events shaped like IMPECT_EVENTS_STAGING (matchId, dateTime,
+homeSquadName, awaySquadName, squadName, SHOT_XG, GOALS, OWNGOALS, phase) for
+any number of leagues, seasons and teams, and writes them straight to a local
+snapshot the dashboard can read with DATA_BACKEND=local.
+
+Each league-season is a double round robin, one round a week. Teams get a
+fixed attacking and defensive strength, shots per match are Poisson around
+those, shot xG follows a skewed distribution with occasional penalties, and
+goals are drawn from each shot's xG. Everything is built with numpy arrays
+and written through pyarrow, so generating millions of events takes seconds.
+
+With --live-rounds the last rounds are held back from the snapshot and
+written to a separate replay feed for live matchday mode (see live.py), in
+the order the events of simultaneous matches would land.
+
+Usage:
+    python generate_events.py                                   # one Championship season
+    python generate_events.py --leagues 4 --seasons 10 --output data/impect_events.parquet
+    python generate_events.py --output data/impect_events.feather
+    python generate_events.py --live-rounds 1 --live-output data/live_events.parquet
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from badge_mapping import TEAM_BADGE_MAP
+
+DEFAULT_OUTPUT = "data/impect_events.parquet"
+DEFAULT_LIVE_OUTPUT = "data/live_events.parquet"
+
+# Events per match in the real feed, most of them not shots
+EVENTS_PER_MATCH = 1600
+SHOTS_PER_TEAM = 12.0
+HOME_ADVANTAGE = 1.1
+PENALTY_RATE = 0.025
+PENALTY_XG = 0.76
+OWN_GOALS_PER_TEAM = 0.04
+SET_PIECE_SHOT_SHARE = 0.28
+PHASES = ['IN_POSSESSION', 'OUT_OF_POSSESSION', 'ATTACKING_TRANSITION', 'DEFENDING_TRANSITION', 'SET_PIECE']
+
+
+def team_names(league, n_teams):
+    """The real Championship names for the first league, numbered names elsewhere."""
+    championship = sorted(TEAM_BADGE_MAP)
+    if league == 0 and n_teams <= len(championship):
+        return championship[:n_teams]
+    return [f"League {league + 1} Team {i + 1:02d}" for i in range(n_teams)]
+
+
+def round_robin(n_teams):
+    """
+    Double round robin fixtures by the circle method.
+
+    Returns:
+        (round, home, away) arrays of team indices, n_teams * (n_teams - 1) matches
+    """
+    teams = np.arange(n_teams)
+    half = n_teams // 2
+    rounds, homes, aways = [], [], []
+    for r in range(n_teams - 1):
+        rotated = np.concatenate([teams[:1], np.roll(teams[1:], r)])
+        first, second = rotated[:half], rotated[::-1][:half]
+        # Alternate who hosts so each team has a mix of home and away games
+        home, away = (first, second) if r % 2 == 0 else (second, first)
+        rounds.append(np.full(half, r))
+        homes.append(home)
+        aways.append(away)
+    rounds, homes, aways = np.concatenate(rounds), np.concatenate(homes), np.concatenate(aways)
+    # Second half of the season reverses the fixtures
+    return (
+        np.concatenate([rounds, rounds + n_teams - 1]),
+        np.concatenate([homes, aways]),
+        np.concatenate([aways, homes]),
+    )
+
+
+def generate_events(leagues=1, seasons=1, teams=24, events_per_match=EVENTS_PER_MATCH, first_season=2025, seed=0):
+    """
+    Generate synthetic events for every match of every league and season.
+
+    Args:
+        leagues: Number of leagues
+        seasons: Number of seasons per league
+        teams: Teams per league (must be even)
+        events_per_match: Total events per match, shots included
+        first_season: Year the most recent season starts in
+        seed: Random seed, the same arguments always produce the same events
+
+    Returns:
+        pyarrow Table with the IMPECT_EVENTS_STAGING columns used by the dashboard
+    """
+    if teams % 2:
+        raise ValueError("teams must be even for a round robin schedule")
+    rng = np.random.default_rng(seed)
+
+    # Fixtures for every league-season
+    fixture_round, fixture_home, fixture_away = round_robin(teams)
+    n_fixtures = len(fixture_round)
+    names = [name for league in range(leagues) for name in team_names(league, teams)]
+
+    league_season = np.repeat(np.arange(leagues * seasons), n_fixtures)
+    league_idx = league_season // seasons
+    season_idx = league_season % seasons
+    home = np.tile(fixture_home, leagues * seasons) + league_idx * teams
+    away = np.tile(fixture_away, leagues * seasons) + league_idx * teams
+    rounds = np.tile(fixture_round, leagues * seasons)
+    n_matches = len(home)
+    match_ids = np.arange(n_matches, dtype=np.int64) + 1
+
+    # Saturday 15:00 kick-offs from early August, one round a week
+    season_start = np.array([np.datetime64(f"{first_season - s}-08-02T15:00") for s in range(seasons)])
+    kickoff = season_start[season_idx] + rounds.astype('timedelta64[W]')
+
+    # Team strengths stay fixed across seasons
+    attack = rng.lognormal(0, 0.18, len(names))
+    defence = rng.lognormal(0, 0.18, len(names))
+
+    # Shots per side, then one row per shot
+    home_shots = rng.poisson(SHOTS_PER_TEAM * HOME_ADVANTAGE * attack[home] * defence[away])
+    away_shots = rng.poisson(SHOTS_PER_TEAM / HOME_ADVANTAGE * attack[away] * defence[home])
+    shot_match = np.concatenate([np.repeat(np.arange(n_matches), home_shots), np.repeat(np.arange(n_matches), away_shots)])
+    shot_squad = np.concatenate([np.repeat(home, home_shots), np.repeat(away, away_shots)])
+    n_shots = len(shot_match)
+
+    shot_xg = rng.beta(0.5, 5.0, n_shots)
+    shot_xg[rng.random(n_shots) < PENALTY_RATE] = PENALTY_XG
+    shot_goal = rng.random(n_shots) < shot_xg
+    shot_set_piece = rng.random(n_shots) < SET_PIECE_SHOT_SHARE
+
+    # Own goals are logged against the squad of the player who scored them
+    home_own_goals = rng.poisson(OWN_GOALS_PER_TEAM, n_matches)
+    away_own_goals = rng.poisson(OWN_GOALS_PER_TEAM, n_matches)
+    own_goal_match = np.concatenate([np.repeat(np.arange(n_matches), home_own_goals), np.repeat(np.arange(n_matches), away_own_goals)])
+    own_goal_squad = np.concatenate([np.repeat(home, home_own_goals), np.repeat(away, away_own_goals)])
+    n_own_goals = len(own_goal_match)
+
+    # Everything else in the feed: passes, duels, carries...
+    other_per_match = np.maximum(events_per_match - home_shots - away_shots - home_own_goals - away_own_goals, 0)
+    other_match = np.repeat(np.arange(n_matches), other_per_match)
+    n_other = len(other_match)
+    other_home = rng.random(n_other) < 0.5
+    other_squad = np.where(other_home, home[other_match], away[other_match])
+
+    # Combine and order by match
+    event_match = np.concatenate([shot_match, own_goal_match, other_match])
+    order = np.argsort(event_match, kind='stable')
+    event_match = event_match[order]
+    squad = np.concatenate([shot_squad, own_goal_squad, other_squad])[order]
+
+    nan_own = np.full(n_own_goals, np.nan)
+    nan_other = np.full(n_other, np.nan)
+    xg = np.concatenate([shot_xg, nan_own, nan_other])[order]
+    goals = np.concatenate([np.where(shot_goal, 1.0, np.nan), nan_own, nan_other])[order]
+    own_goals = np.concatenate([np.full(n_shots, np.nan), np.ones(n_own_goals), nan_other])[order]
+
+    set_piece_code = PHASES.index('SET_PIECE')
+    open_play_codes = rng.integers(0, set_piece_code, n_shots + n_own_goals + n_other)
+    phase = np.concatenate([np.where(shot_set_piece, set_piece_code, open_play_codes[:n_shots]), open_play_codes[n_shots:]])
+    phase[n_shots + n_own_goals:][rng.random(n_other) < 0.1] = set_piece_code
+    phase = phase[order]
+
+    # Squad and phase columns are dictionary encoded, as they are mostly repeats
+    name_dictionary = pa.array(names)
+    return pa.table({
+        'matchId': pa.array(match_ids[event_match]),
+        'dateTime': pa.array(kickoff[event_match].astype('datetime64[us]')),
+        'homeSquadName': pa.DictionaryArray.from_arrays(pa.array(home[event_match].astype(np.int32)), name_dictionary),
+        'awaySquadName': pa.DictionaryArray.from_arrays(pa.array(away[event_match].astype(np.int32)), name_dictionary),
+        'squadName': pa.DictionaryArray.from_arrays(pa.array(squad.astype(np.int32)), name_dictionary),
+        'SHOT_XG': pa.array(xg, from_pandas=True),
+        'GOALS': pa.array(goals, from_pandas=True),
+        'OWNGOALS': pa.array(own_goals, from_pandas=True),
+        'phase': pa.DictionaryArray.from_arrays(pa.array(phase.astype(np.int8)), pa.array(PHASES)),
+    })
+
+
+def split_live_rounds(table, rounds, seed=0):
+    """
+    Hold the last rounds (kick-off times) back from a table of events.
+
+    Args:
+        table: Events from generate_events
+        rounds: Number of kick-off times to hold back
+        seed: Random seed for the replay order
+
+    Returns:
+        (snapshot, feed) tables. The feed is in kick-off order with the events
+        of matches kicking off together interleaved, so a replay advances
+        every match in a round at once.
+    """
+    kickoff = table.column('dateTime').to_numpy()
+    live = kickoff >= np.unique(kickoff)[-rounds]
+    feed = table.filter(pa.array(live))
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(feed.num_rows), kickoff[live]))
+    return table.filter(pa.array(~live)), feed.take(pa.array(order))
+
+
+def write_snapshot(table, path):
+    """Write events as Parquet or Feather (Arrow IPC), chosen by the file extension."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if path.endswith(('.feather', '.arrow')):
+        # Uncompressed, in one record batch and with NaN rather than null in the
+        # float columns, so readers can memory-map every numeric column as is
+        for i, field in enumerate(table.schema):
+            if pa.types.is_floating(field.type):
+                table = table.set_column(i, field, pc.fill_null(table.column(i), float('nan')))
+        feather.write_feather(
+            table.combine_chunks(), path, compression='uncompressed', chunksize=max(table.num_rows, 1)
+        )
+    else:
+        pq.write_table(table, path, compression='snappy')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic IMPECT events for local testing.")
+    parser.add_argument('--leagues', type=int, default=1)
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--teams', type=int, default=24, help="Teams per league (even)")
+    parser.add_argument('--events-per-match', type=int, default=EVENTS_PER_MATCH)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=".parquet, or .feather/.arrow for Arrow IPC")
+    parser.add_argument('--live-rounds', type=int, default=0, help="Last rounds to write to a replay feed instead")
+    parser.add_argument('--live-output', default=DEFAULT_LIVE_OUTPUT, help="Replay feed for --live-rounds")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = generate_events(args.leagues, args.seasons, args.teams, args.events_per_match, seed=args.seed)
+    generated = time.perf_counter()
+    n_matches = args.leagues * args.seasons * args.teams * (args.teams - 1)
+    print(f"Generated {table.num_rows:,} events for {n_matches:,} matches in {generated - start:.2f}s "
+          f"({table.num_rows / (generated - start) / 1e6:.1f}M events/s)")
+
+    if args.live_rounds:
+        table, feed = split_live_rounds(table, args.live_rounds, args.seed)
+        write_snapshot(feed, args.live_output)
+        print(f"Wrote the last {args.live_rounds} round(s), {feed.num_rows:,} events, to {args.live_output}")
+    write_snapshot(table, args.output)
+    written = time.perf_counter()
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB) in {written - generated:.2f}s")
+
+if __name__ == "__main__":
+    main()
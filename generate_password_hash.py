@@ -12,4 +12,6 @@ print("Password hash generated successfully!")
 print("="*60)
 print(f"\nAdd this line to .streamlit/secrets.toml:")
 print(f'\npassword_hash = "{password_hash}"')
+print(f"\nOr, for an admin login that also shows the profiling panel:")
+print(f'\nadmin_password_hash = "{password_hash}"')
 print("\n" + "="*60)
@@ -0,0 +1,316 @@
+"""
+Live matchday mode: in-play updates applied as deltas to the cached aggregates
+
+Everything else in the dashboard is cached for a week and rebuilt from
+scratch after a refresh. On matchdays live mode keeps the team stats, ranks,
+xPoints and league table moving as events land, without recomputing them:
+each process holds a writable copy of the matchday index (see
+metrics.matchday_index) and every poll folds the change in each updated
+match's totals into it. A changed match only shifts its two teams' prefix
+sums from that matchday on, and only the matchdays from there are re-ranked,
+so an update takes milliseconds however many seasons are loaded.
+
+Updates come from one of two feeds:
+- The warehouse (or the local backend): each poll reads the current totals of
+  every match kicking off at or after a kick-off watermark, which starts at
+  the latest cached kick-off and moves up as rounds finish. Reading totals
+  rather than single events makes a poll safe to repeat and also catches up a
+  match that was only part loaded when the cached data was queried.
+- A replay feed (LIVE_FEED_PATH): a local event file standing in for the
+  warehouse, such as the last rounds generate_events.py --live-rounds holds
+  back. Each poll applies the next LIVE_REPLAY_EVENTS events past a row
+  watermark.
+
+Sessions share one live state per process and poll at most every
+LIVE_POLL_SECONDS between them. Each update is published as a revision with
+its own data version (the cached one plus LIVE_VERSION_MARK and a revision
+number). The views built on the matchday index (team stats and ranks, stat
+tables, league table, positions, percentiles) take it like any other data
+version and read that revision's frozen index through get_matchday_index, so
+their caches never mix revisions.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import local_backend
+from database import (
+    get_matchday_index, get_league_match_data, fetch_live_match_totals, freeze,
+    LIVE_VERSION_MARK
+)
+from metrics import (
+    side_match_facts, update_matchday_index, add_matchday_team, add_matchday_season, league_positions,
+    expected_points, matchday_columns, season_of
+)
+
+LIVE_POLL_SECONDS = float(os.getenv('LIVE_POLL_SECONDS', '15'))
+LIVE_FEED_PATH = os.getenv('LIVE_FEED_PATH', '')
+LIVE_REPLAY_EVENTS = int(os.getenv('LIVE_REPLAY_EVENTS', '2500'))
+
+# A match this long after a later kick-off is over, so the watermark can pass it
+MATCH_HOURS = 3
+# Revisions kept for sessions still rendering an earlier one
+KEPT_REVISIONS = 8
+# Changes smaller than this are float noise between the cached and polled totals
+TOTALS_TOLERANCE = 1e-4
+
+# Per-match totals both feeds report, named as in local_backend.match_goals
+MATCH_TOTALS = [
+    f"{side}_{col}" for side in ('HOME', 'AWAY')
+    for col in ('GOALS', 'XG', 'OWN_GOALS', 'SET_PIECE_XG', 'SET_PIECE_GOALS')
+]
+
+# Revision numbers are unique within the process, across live states too
+_revisions = itertools.count(1)
+
+
+def copy_index(index):
+    """A writable copy of a matchday index."""
+    return {
+        'teams': np.array(index['teams']),
+        'seasons': np.array(index['seasons']),
+        'season_bounds': np.array(index['season_bounds']),
+        'matchdays': index['matchdays'],
+        'cumulative': {name: np.array(values) for name, values in index['cumulative'].items()},
+        'points': np.array(index['points']),
+        'xpoints': np.array(index['xpoints']),
+        'positions': np.array(index['positions']),
+    }
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_live_state(data_version):
+    """
+    Live mode's state on top of one data version's cached aggregates, shared
+    and updated by every session in the process with live mode on.
+    """
+    match_facts = get_league_match_data()
+    index = get_matchday_index(data_version)
+
+    return {
+        'lock': threading.Lock(),
+        'data_version': data_version,
+        'index': copy_index(index),
+        'team_rows': {team: row for row, team in enumerate(index['teams'])},
+        'match_facts': match_facts,
+        'fact_match_ids': match_facts['matchId'].to_numpy(),
+        'fact_columns': matchday_columns(match_facts)['column'],
+        # matchId to its two teams' rows and match numbers and its totals so far
+        'matches': {},
+        # Replay feeds count rows; the warehouse is read from the latest cached kick-off
+        'watermark': 0 if LIVE_FEED_PATH else pd.Timestamp(match_facts['dateTime'].max()).to_pydatetime(),
+        'polled': float('-inf'),
+        'revisions': OrderedDict(),
+        'view': {
+            'version': data_version,
+            'matchday': None,
+            'matches': pd.DataFrame(),
+            'updates': 0,
+            'updated': None,
+            'update_ms': None,
+        },
+    }
+
+
+def live_matchday_index(data_version):
+    """
+    The frozen matchday index of a live revision, by its data version. A
+    revision no longer kept (only the last KEPT_REVISIONS are) gives the
+    newest one, or the base version's index before the first update.
+    """
+    base_version = data_version.split(LIVE_VERSION_MARK)[0]
+    state = get_live_state(base_version)
+    index = state['revisions'].get(data_version)
+    if index is None:
+        # The view names the newest revision (the base version before the
+        # first update), so this doesn't iterate revisions while a poll adds one
+        index = state['revisions'].get(state['view']['version'])
+    return get_matchday_index(base_version) if index is None else index
+
+
+def team_row(state, team):
+    """A team's row in the live index, adding the team if it has no matches yet."""
+    if team not in state['team_rows']:
+        state['team_rows'][team] = add_matchday_team(state['index'], team)
+    return state['team_rows'][team]
+
+
+def open_match(state, match):
+    """
+    Live entry for a match first seen in a poll: its teams' rows, and their
+    match numbers and its totals and per-side facts so far from the cached
+    match facts when it was already (part) loaded there (None for a new
+    match, numbered when first applied).
+    """
+    index = state['index']
+    rows = (team_row(state, match['homeSquadName']), team_row(state, match['awaySquadName']))
+    live = {'match': match, 'rows': rows, 'matchdays': None, 'totals': None, 'facts': None}
+
+    fact_rows = np.flatnonzero(state['fact_match_ids'] == match['matchId'])
+    if len(fact_rows) == 0:
+        return live
+
+    # The cached match facts have a row per side
+    venues = state['match_facts']['VENUE'].to_numpy()[fact_rows]
+    home_row, away_row = fact_rows[venues == 'H'][0], fact_rows[venues == 'A'][0]
+    home_facts = state['match_facts'].iloc[home_row]
+    live['matchdays'] = (int(state['fact_columns'][home_row]), int(state['fact_columns'][away_row]))
+    live['totals'] = {
+        'HOME_GOALS': float(home_facts['GOALS_FOR']),
+        'HOME_XG': float(home_facts['XG_FOR']),
+        'HOME_OWN_GOALS': float(home_facts['OWN_GOALS_AGAINST']),
+        'HOME_SET_PIECE_XG': float(home_facts['SET_PIECE_XG_FOR']),
+        'HOME_SET_PIECE_GOALS': float(home_facts['SET_PIECE_GOALS_FOR']),
+        'AWAY_GOALS': float(home_facts['GOALS_AGAINST']),
+        'AWAY_XG': float(home_facts['XG_AGAINST']),
+        'AWAY_OWN_GOALS': float(home_facts['OWN_GOALS_FOR']),
+        'AWAY_SET_PIECE_XG': float(home_facts['SET_PIECE_XG_AGAINST']),
+        'AWAY_SET_PIECE_GOALS': float(home_facts['SET_PIECE_GOALS_AGAINST']),
+    }
+    # The xPoints the index already summed for it
+    live['facts'] = tuple(
+        side_match_facts(live['totals'], venue, index['xpoints'][row, matchday - 1])
+        for venue, row, matchday in zip(('H', 'A'), rows, live['matchdays'])
+    )
+    return live
+
+
+def apply_match_totals(state, matches, increments=False):
+    """
+    Fold polled match totals into the live index.
+
+    Args:
+        state: From get_live_state
+        matches: One row per match, in kick-off order, with MATCH_TOTALS
+        increments: The rows are what was added since the last poll rather
+            than the current totals
+
+    Returns:
+        The earliest matchday that changed, None if nothing did
+    """
+    index = state['index']
+    n_teams = len(index['teams'])
+    totals = {col: matches[col].to_numpy(dtype=float) for col in MATCH_TOTALS}
+    changed = []
+    for i, match_id in enumerate(matches['matchId'].tolist()):
+        live = state['matches'].get(match_id)
+        if live is None:
+            match = matches.iloc[i][['matchId', 'dateTime', 'homeSquadName', 'awaySquadName']].to_dict()
+            live = state['matches'][match_id] = open_match(state, match)
+
+        before = live['totals']
+        after = {col: float(values[i]) for col, values in totals.items()}
+        if increments and before is not None:
+            after = {col: before[col] + after[col] for col in MATCH_TOTALS}
+        if before is None or any(abs(after[col] - before[col]) >= TOTALS_TOLERANCE for col in MATCH_TOTALS):
+            changed.append((live, after))
+
+    # A team that joined changes every matchday's ranking
+    first_changed = 1 if len(index['teams']) > n_teams else None
+    if not changed:
+        return first_changed
+
+    # Every changed side's xPoints in one call
+    xg_home = np.array([after['HOME_XG'] for _, after in changed])
+    xg_away = np.array([after['AWAY_XG'] for _, after in changed])
+    xpoints = expected_points(np.concatenate([xg_home, xg_away]), np.concatenate([xg_away, xg_home]))
+
+    for i, (live, after) in enumerate(changed):
+        if live['matchdays'] is None:
+            # A match kicking off after the last season starts a new one
+            season = season_of(pd.Series([live['match']['dateTime']]))[0]
+            if len(index['seasons']) == 0 or season > index['seasons'][-1]:
+                add_matchday_season(index, season)
+            # Each team's next matchday of the last season, counting any applied before it in this poll
+            start, matches = index['season_bounds'][-2], index['cumulative']['MATCHES']
+            live['matchdays'] = tuple(int(start + matches[row, -1] - matches[row, start]) + 1 for row in live['rows'])
+        facts = (side_match_facts(after, 'H', xpoints[i]), side_match_facts(after, 'A', xpoints[len(changed) + i]))
+        for row, matchday, before, fact in zip(live['rows'], live['matchdays'], live['facts'] or (None, None), facts):
+            update_matchday_index(index, row, matchday, before, fact)
+            first_changed = matchday if first_changed is None else min(first_changed, matchday)
+        live['totals'], live['facts'] = after, facts
+    return first_changed
+
+
+def live_matches(state):
+    """Every match live mode follows with its current totals and xPoints, in the order first seen."""
+    followed = [live for live in state['matches'].values() if live['totals'] is not None]
+    return pd.DataFrame({
+        'matchId': [live['match']['matchId'] for live in followed],
+        'dateTime': [live['match']['dateTime'] for live in followed],
+        'homeSquadName': [live['match']['homeSquadName'] for live in followed],
+        'awaySquadName': [live['match']['awaySquadName'] for live in followed],
+        **{col: [live['totals'][col] for live in followed] for col in MATCH_TOTALS},
+        'HOME_XPOINTS': [live['facts'][0]['XPOINTS'] for live in followed],
+        'AWAY_XPOINTS': [live['facts'][1]['XPOINTS'] for live in followed],
+    })
+
+
+def publish(state, first_changed, started):
+    """Re-rank the changed matchdays and publish the live index as a new revision."""
+    index = state['index']
+    matchdays = range(first_changed, index['matchdays'] + 1)
+    index['positions'][:, first_changed - 1:] = league_positions(index, matchdays)
+
+    version = f"{state['data_version']}{LIVE_VERSION_MARK}{next(_revisions)}"
+    state['revisions'][version] = freeze(copy_index(index))
+    while len(state['revisions']) > KEPT_REVISIONS:
+        state['revisions'].popitem(last=False)
+
+    state['view'] = {
+        'version': version,
+        'matchday': index['matchdays'],
+        'matches': freeze(live_matches(state)),
+        'updates': state['view']['updates'] + 1,
+        'updated': datetime.now(),
+        'update_ms': (time.perf_counter() - started) * 1000,
+    }
+
+
+def poll(state):
+    """Read the feed past the watermark and publish a revision if any match changed."""
+    if LIVE_FEED_PATH:
+        matches, state['watermark'] = local_backend.replay_match_totals(
+            LIVE_FEED_PATH, state['watermark'], LIVE_REPLAY_EVENTS
+        )
+    else:
+        matches = fetch_live_match_totals(state['watermark'])
+
+    # Timed from here: applying the update, not waiting for the feed
+    started = time.perf_counter()
+    first_changed = apply_match_totals(state, matches, increments=bool(LIVE_FEED_PATH))
+    if not LIVE_FEED_PATH and len(matches):
+        latest_kickoff = pd.Timestamp(matches['dateTime'].max()).to_pydatetime()
+        state['watermark'] = max(state['watermark'], latest_kickoff - timedelta(hours=MATCH_HOURS))
+
+    if first_changed is not None:
+        publish(state, first_changed, started)
+
+
+def poll_live(data_version):
+    """
+    Poll for new events, unless a session in this process did within
+    LIVE_POLL_SECONDS, and return the live view.
+
+    Returns:
+        Dict with the version and matchday to show the matchday index views
+        at (the cached data version and None until the first update), the
+        matches being followed, the number of updates and when and how fast
+        the last one was applied
+    """
+    state = get_live_state(data_version)
+    # Sessions that find a poll already running show the current revision
+    if time.monotonic() - state['polled'] >= LIVE_POLL_SECONDS and state['lock'].acquire(blocking=False):
+        try:
+            state['polled'] = time.monotonic()
+            poll(state)
+        finally:
+            state['lock'].release()
+    return state['view']
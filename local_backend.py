@@ -0,0 +1,337 @@
+"""
+Local data backend reading an event snapshot instead of Snowflake
+
+Set DATA_BACKEND=local (and optionally LOCAL_SNAPSHOT_PATH) to run the
+dashboard against a Parquet or Feather file of IMPECT_EVENTS_STAGING rows,
+such as one written by generate_events.py. Each function mirrors one of the
+queries in database.py and returns the same columns, names and ordering as
+the Snowflake result, so everything downstream is unchanged.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import streamlit as st
+
+SQUAD_COLUMNS = ['squadName', 'homeSquadName', 'awaySquadName']
+
+
+@st.cache_resource
+def load_snapshot(path):
+    """
+    Read the event snapshot once per process and pre-aggregate per match.
+
+    Returns:
+        Dict with the raw events, the distinct matches (all_matches) and
+        per match and squad xG, goals and own goals (match_stats)
+    """
+    if path.endswith(('.feather', '.arrow')):
+        # Memory-mapped: unmodified columns stay views of the file's pages
+        events = feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+    else:
+        events = pd.read_parquet(path)
+
+    # One shared category list for the squad columns, so they compare by integer code
+    teams = pd.Index(sorted(set().union(*(events[col].dropna().unique() for col in SQUAD_COLUMNS))))
+    for col in SQUAD_COLUMNS:
+        events[col] = pd.Categorical(events[col], categories=teams)
+
+    valid = events[events['squadName'].notna() & (events['squadName'] != 'nan')]
+
+    matches = (
+        events[['matchId', 'dateTime', 'homeSquadName', 'awaySquadName']]
+        .drop_duplicates()
+        .reset_index(drop=True)
+    )
+    for col in ['homeSquadName', 'awaySquadName']:
+        matches[col] = matches[col].astype(str)
+
+    # Rows that are neither shots nor goals add nothing to these sums
+    scoring = valid[valid['SHOT_XG'].notna() | (valid['GOALS'] == 1) | (valid['OWNGOALS'] == 1)]
+    set_piece = scoring['phase'] == 'SET_PIECE'
+    match_stats = pd.DataFrame({
+        'matchId': scoring['matchId'],
+        'squadName': scoring['squadName'].astype(str),
+        'xg': scoring['SHOT_XG'].fillna(0),
+        'goals': (scoring['GOALS'] == 1).astype(int),
+        'own_goals': (scoring['OWNGOALS'] == 1).astype(int),
+        'set_piece_xg': scoring['SHOT_XG'].where((scoring['SHOT_XG'] > 0) & set_piece, 0),
+        'set_piece_goals': ((scoring['GOALS'] == 1) & set_piece).astype(int),
+    }).groupby(['matchId', 'squadName'], as_index=False).sum()
+
+    return {'events': events, 'valid': valid, 'teams': teams, 'matches': matches, 'match_stats': match_stats}
+
+
+def match_goals(snapshot, matches):
+    """Home and away goals and xG for the given matches (the match_goals CTE)."""
+    stats = snapshot['match_stats']
+    home = matches.merge(
+        stats, left_on=['matchId', 'homeSquadName'], right_on=['matchId', 'squadName'], how='left'
+    )
+    away = matches.merge(
+        stats, left_on=['matchId', 'awaySquadName'], right_on=['matchId', 'squadName'], how='left'
+    )
+    matches = matches.copy()
+    matches['HOME_GOALS'] = home['goals'].fillna(0).to_numpy() + away['own_goals'].fillna(0).to_numpy()
+    matches['AWAY_GOALS'] = away['goals'].fillna(0).to_numpy() + home['own_goals'].fillna(0).to_numpy()
+    matches['HOME_XG'] = home['xg'].fillna(0).to_numpy()
+    matches['AWAY_XG'] = away['xg'].fillna(0).to_numpy()
+    for side, stats in [('HOME', home), ('AWAY', away)]:
+        for col in ['set_piece_xg', 'set_piece_goals', 'own_goals']:
+            matches[f"{side}_{col.upper()}"] = stats[col].fillna(0).to_numpy()
+    return matches
+
+
+def query_team_stats(path):
+    """Team-level totals, as returned by the get_team_stats query."""
+    snapshot = load_snapshot(path)
+    teams = snapshot['teams']
+
+    # Points from every match's score (match_results), goalless draws included
+    match_results = match_goals(snapshot, snapshot['matches'])
+    home_goals, away_goals = match_results['HOME_GOALS'], match_results['AWAY_GOALS']
+    team_points = pd.DataFrame({
+        'team': np.concatenate([
+            teams.get_indexer(match_results['homeSquadName']), teams.get_indexer(match_results['awaySquadName'])
+        ]),
+        'points': np.concatenate([
+            np.select([home_goals > away_goals, home_goals == away_goals], [3, 1], 0),
+            np.select([away_goals > home_goals, home_goals == away_goals], [3, 1], 0),
+        ]),
+    }).groupby('team')['points'].sum().rename('total_points')
+
+    # Attacking totals per squad (team_stats)
+    valid = snapshot['valid']
+    squad, home, away = (valid[col].cat.codes.to_numpy() for col in SQUAD_COLUMNS)
+    xg = valid['SHOT_XG'].fillna(0).to_numpy()
+    goal = (valid['GOALS'] == 1).to_numpy()
+    set_piece = (valid['phase'] == 'SET_PIECE').to_numpy()
+    set_piece_xg = np.where((valid['SHOT_XG'] > 0).to_numpy() & set_piece, xg, 0)
+    set_piece_goal = (goal & set_piece).astype(int)
+    team_stats = pd.DataFrame({
+        'team': squad,
+        'goals': goal.astype(int),
+        'xg': xg,
+        'set_piece_xg': set_piece_xg,
+        'set_piece_goals': set_piece_goal,
+    }).groupby('team').sum()
+    team_stats['matches_played'] = (
+        pd.DataFrame({'team': squad, 'matchId': valid['matchId'].to_numpy()})
+        .drop_duplicates().groupby('team').size()
+    )
+
+    # Defensive totals, credited to the opponent of the shooting squad (opponent_stats)
+    opponent = np.where(squad == away, home, np.where(squad == home, away, -1))
+    has_opponent = opponent >= 0
+    opponent_stats = pd.DataFrame({
+        'team': opponent[has_opponent],
+        'goals_against': goal[has_opponent].astype(int),
+        'xga': xg[has_opponent],
+        'set_piece_xga': set_piece_xg[has_opponent],
+        'set_piece_goals_against': set_piece_goal[has_opponent],
+    }).groupby('team').sum()
+
+    df = team_stats.join(opponent_stats, how='left').join(team_points, how='left')
+    df = df.fillna({col: 0 for col in list(opponent_stats.columns) + ['total_points']})
+    matches_played = df['matches_played'].replace(0, np.nan)
+
+    result = pd.DataFrame({
+        'TEAM': teams[df.index].astype(object),
+        'MATCHES_PLAYED': df['matches_played'],
+        'TOTAL_POINTS': df['total_points'],
+        'POINTS_PER_GAME': df['total_points'] / matches_played,
+        'GOALS': df['goals'],
+        'XG': df['xg'],
+        'OPEN_PLAY_XG': df['xg'] - df['set_piece_xg'],
+        'SET_PIECE_XG': df['set_piece_xg'],
+        'OPEN_PLAY_GOALS': df['goals'] - df['set_piece_goals'],
+        'SET_PIECE_GOALS': df['set_piece_goals'],
+        'XG_PER_90': df['xg'] / matches_played,
+        'XG_CONVERSION': np.where(df['xg'] > 0, df['goals'] / df['xg'].replace(0, np.nan), 0),
+        'GOALS_AGAINST': df['goals_against'],
+        'XGA': df['xga'],
+        'OPEN_PLAY_XGA': df['xga'] - df['set_piece_xga'],
+        'SET_PIECE_XGA': df['set_piece_xga'],
+        'OPEN_PLAY_GOALS_AGAINST': df['goals_against'] - df['set_piece_goals_against'],
+        'SET_PIECE_GOALS_AGAINST': df['set_piece_goals_against'],
+        'XGA_PER_90': df['xga'] / matches_played,
+        'XGA_CONVERSION': np.where(df['xga'] > 0, df['goals_against'] / df['xga'].replace(0, np.nan), 0),
+        'XGD': df['xg'] - df['xga'],
+        'XGD_PER_90': (df['xg'] - df['xga']) / matches_played,
+    })
+    return result.sort_values('XG', ascending=False, kind='mergesort').reset_index(drop=True)
+
+
+def query_team_matches(path, team_name):
+    """One team's matches with home/away xG and goals, as returned by the get_match_by_match_data query."""
+    snapshot = load_snapshot(path)
+    matches = snapshot['matches']
+    matches = matches[(matches['homeSquadName'] == team_name) | (matches['awaySquadName'] == team_name)]
+    matches = match_goals(snapshot, matches)
+
+    is_home = matches['homeSquadName'] == team_name
+    return pd.DataFrame({
+        'matchId': matches['matchId'],
+        'dateTime': matches['dateTime'],
+        'homeSquadName': matches['homeSquadName'],
+        'awaySquadName': matches['awaySquadName'],
+        'OPPONENT': np.where(is_home, matches['awaySquadName'], matches['homeSquadName']),
+        'VENUE': np.where(is_home, 'H', 'A'),
+        'HOME_XG': matches['HOME_XG'],
+        'HOME_GOALS': matches['HOME_GOALS'],
+        'AWAY_XG': matches['AWAY_XG'],
+        'AWAY_GOALS': matches['AWAY_GOALS'],
+    }).sort_values('dateTime', kind='mergesort').reset_index(drop=True)
+
+
+def query_league_matches(path):
+    """Every match from both teams' perspectives, as returned by the get_league_match_data query."""
+    snapshot = load_snapshot(path)
+    matches = match_goals(snapshot, snapshot['matches'])
+
+    home = pd.DataFrame({
+        'matchId': matches['matchId'],
+        'dateTime': matches['dateTime'],
+        'TEAM': matches['homeSquadName'],
+        'OPPONENT': matches['awaySquadName'],
+        'VENUE': 'H',
+        'XG_FOR': matches['HOME_XG'],
+        'XG_AGAINST': matches['AWAY_XG'],
+        'GOALS_FOR': matches['HOME_GOALS'],
+        'GOALS_AGAINST': matches['AWAY_GOALS'],
+        'SET_PIECE_XG_FOR': matches['HOME_SET_PIECE_XG'],
+        'SET_PIECE_XG_AGAINST': matches['AWAY_SET_PIECE_XG'],
+        'SET_PIECE_GOALS_FOR': matches['HOME_SET_PIECE_GOALS'],
+        'SET_PIECE_GOALS_AGAINST': matches['AWAY_SET_PIECE_GOALS'],
+        'OWN_GOALS_FOR': matches['AWAY_OWN_GOALS'],
+        'OWN_GOALS_AGAINST': matches['HOME_OWN_GOALS'],
+    })
+    away = pd.DataFrame({
+        'matchId': matches['matchId'],
+        'dateTime': matches['dateTime'],
+        'TEAM': matches['awaySquadName'],
+        'OPPONENT': matches['homeSquadName'],
+        'VENUE': 'A',
+        'XG_FOR': matches['AWAY_XG'],
+        'XG_AGAINST': matches['HOME_XG'],
+        'GOALS_FOR': matches['AWAY_GOALS'],
+        'GOALS_AGAINST': matches['HOME_GOALS'],
+        'SET_PIECE_XG_FOR': matches['AWAY_SET_PIECE_XG'],
+        'SET_PIECE_XG_AGAINST': matches['HOME_SET_PIECE_XG'],
+        'SET_PIECE_GOALS_FOR': matches['AWAY_SET_PIECE_GOALS'],
+        'SET_PIECE_GOALS_AGAINST': matches['HOME_SET_PIECE_GOALS'],
+        'OWN_GOALS_FOR': matches['HOME_OWN_GOALS'],
+        'OWN_GOALS_AGAINST': matches['AWAY_OWN_GOALS'],
+    })
+    return (
+        pd.concat([home, away], ignore_index=True)
+        .sort_values(['TEAM', 'dateTime'], kind='mergesort')
+        .reset_index(drop=True)
+    )
+
+
+def query_shot_quality(path):
+    """Shots per team, opponent, phase and xG to the hundredth, as returned by the get_shot_quality query."""
+    snapshot = load_snapshot(path)
+    teams = snapshot['teams']
+
+    valid = snapshot['valid']
+    shots = valid[(valid['SHOT_XG'] > 0).to_numpy()]
+    squad, home, away = (shots[col].cat.codes.to_numpy() for col in SQUAD_COLUMNS)
+    on_pitch = (squad == home) | (squad == away)
+    xg = shots['SHOT_XG'].to_numpy()
+
+    grouped = pd.DataFrame({
+        'team': squad,
+        'opponent': np.where(squad == home, away, home),
+        # COALESCE("phase", 'UNKNOWN'): groupby would drop shots without a phase
+        'phase': shots['phase'].astype(object).fillna('UNKNOWN').to_numpy(),
+        'xg_cents': np.floor(xg * 100 + 0.000001).astype(int),
+        'xg': xg,
+        'goals': (shots['GOALS'] == 1).to_numpy().astype(int),
+    })[on_pitch].groupby(['team', 'opponent', 'phase', 'xg_cents'], as_index=False).agg(
+        shots=('xg', 'size'), xg=('xg', 'sum'), goals=('goals', 'sum')
+    )
+
+    return pd.DataFrame({
+        'TEAM': teams[grouped['team']].astype(object),
+        'OPPONENT': teams[grouped['opponent']].astype(object),
+        'PHASE': grouped['phase'],
+        'XG_CENTS': grouped['xg_cents'],
+        'SHOTS': grouped['shots'],
+        'XG': grouped['xg'],
+        'GOALS': grouped['goals'],
+    }).sort_values(['TEAM', 'OPPONENT', 'PHASE', 'XG_CENTS'], kind='mergesort').reset_index(drop=True)
+
+
+@st.cache_resource
+def load_replay_feed(path):
+    """
+    Read a replay feed (events in the order they land, such as the rounds
+    generate_events.py --live-rounds splits off) once per process.
+
+    Returns:
+        Dict with each event's match (matchId, dateTime, homeSquadName,
+        awaySquadName) and what it adds to its match's home and away totals
+        (totals, named as in match_goals)
+    """
+    if path.endswith(('.feather', '.arrow')):
+        events = feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+    else:
+        events = pd.read_parquet(path)
+
+    squad, home, away = (events[col].astype(str).to_numpy() for col in SQUAD_COLUMNS)
+    is_home = (squad == home) & events['squadName'].notna().to_numpy()
+    is_away = (squad == away) & events['squadName'].notna().to_numpy()
+    xg = events['SHOT_XG'].fillna(0).to_numpy()
+    goal = (events['GOALS'] == 1).to_numpy()
+    own_goal = (events['OWNGOALS'] == 1).to_numpy()
+    set_piece = (events['phase'] == 'SET_PIECE').to_numpy()
+    set_piece_xg = np.where((events['SHOT_XG'] > 0).to_numpy() & set_piece, xg, 0)
+
+    totals = {}
+    for side, mine, theirs in [('HOME', is_home, is_away), ('AWAY', is_away, is_home)]:
+        # Own goals count for the other side's score
+        totals[f"{side}_GOALS"] = (goal & mine) * 1.0 + (own_goal & theirs)
+        totals[f"{side}_XG"] = np.where(mine, xg, 0)
+        totals[f"{side}_SET_PIECE_XG"] = np.where(mine, set_piece_xg, 0)
+        totals[f"{side}_SET_PIECE_GOALS"] = (goal & set_piece & mine) * 1.0
+        totals[f"{side}_OWN_GOALS"] = (own_goal & mine) * 1.0
+
+    return {
+        'matchId': events['matchId'].to_numpy(),
+        'dateTime': events['dateTime'].to_numpy(),
+        'homeSquadName': home,
+        'awaySquadName': away,
+        'totals': totals,
+    }
+
+
+def replay_match_totals(path, start, n_events):
+    """
+    What the next n_events of a replay feed past row start add to each
+    match's totals, in kick-off order, and the row the feed continues from.
+    """
+    feed = load_replay_feed(path)
+    end = min(start + n_events, len(feed['matchId']))
+    match_ids, first, inverse = np.unique(feed['matchId'][start:end], return_index=True, return_inverse=True)
+    first += start
+
+    matches = pd.DataFrame({
+        'matchId': match_ids,
+        'dateTime': feed['dateTime'][first],
+        'homeSquadName': feed['homeSquadName'][first],
+        'awaySquadName': feed['awaySquadName'][first],
+        **{
+            col: np.bincount(inverse, weights=values[start:end], minlength=len(match_ids))
+            for col, values in feed['totals'].items()
+        },
+    })
+    return matches.sort_values(['dateTime', 'matchId'], kind='mergesort').reset_index(drop=True), end
+
+
+def query_live_match_totals(path, since):
+    """Home and away totals of matches kicking off at or after since, as returned by the live match totals query."""
+    snapshot = load_snapshot(path)
+    matches = snapshot['matches']
+    matches = match_goals(snapshot, matches[matches['dateTime'] >= since])
+    return matches.sort_values(['dateTime', 'matchId'], kind='mergesort').reset_index(drop=True)
@@ -0,0 +1,700 @@
+"""
+Derived football metrics shared by the dashboard views
+"""
+import numpy as np
+import pandas as pd
+
+SHOT_XG_BIN_WIDTH = 0.05
+BIG_CHANCE_XG = 0.3  # Shots at or above this xG count as big chances
+ALL_PHASES = 'All phases'
+UNKNOWN_PHASE = 'UNKNOWN'  # Shots without a phase, as the shot quality query reports them
+
+# Per-match facts summed into the matchday index
+MATCHDAY_SUMS = [
+    'POINTS', 'GOALS_FOR', 'GOALS_AGAINST', 'OWN_GOALS_FOR', 'OWN_GOALS_AGAINST', 'XG_FOR', 'XG_AGAINST',
+    'SET_PIECE_XG_FOR', 'SET_PIECE_XG_AGAINST', 'SET_PIECE_GOALS_FOR', 'SET_PIECE_GOALS_AGAINST',
+]
+
+# Per-match rates compared by team similarity search
+SIMILARITY_COLUMNS = ['XG_PER_90', 'XGA_PER_90', 'GOALS_PER_90', 'GOALS_AGAINST_PER_90', 'POINTS_PER_GAME']
+
+
+def expected_points(xg_for, xg_against, max_goals=10):
+    """
+    Expected points for arrays of matches at once, from each side's xG as
+    independent Poisson goal counts.
+
+    Args:
+        xg_for: Array of expected goals for the team, one per match
+        xg_against: Matching array of expected goals against
+        max_goals: Maximum number of goals to consider (default 10)
+
+    Returns:
+        Array of expected points (0-3)
+    """
+    # scipy is slow to import, load it on the first xPoints calculation
+    from scipy.stats import poisson
+
+    goals = np.arange(max_goals)
+    prob_for = poisson.pmf(goals, np.asarray(xg_for, dtype=float)[:, None])
+    prob_against = poisson.pmf(goals, np.asarray(xg_against, dtype=float)[:, None])
+
+    # Probability the opponent scores fewer than each goal count
+    prob_fewer = np.cumsum(prob_against, axis=1) - prob_against
+    prob_win = (prob_for * prob_fewer).sum(axis=1)
+    prob_draw = (prob_for * prob_against).sum(axis=1)
+    # Expected points = 3 * P(win) + 1 * P(draw) + 0 * P(loss)
+    return 3 * prob_win + prob_draw
+
+
+def team_match_data(league_match_data, team):
+    """
+    One team's match-by-match data taken from the league match facts, with the
+    same derived columns as database.get_match_by_match_data.
+    """
+    match_data = league_match_data[league_match_data['TEAM'] == team].reset_index(drop=True)
+
+    # Add date label
+    match_data['match_label'] = match_data['match_number'].astype(str) + ': ' + match_data['OPPONENT'].astype(str)
+
+    # Calculate rolling averages (right-aligned, includes current match)
+    match_data['xg_rolling_5'] = match_data['XG_FOR'].rolling(window=5, min_periods=1).mean()
+    match_data['xga_rolling_5'] = match_data['XG_AGAINST'].rolling(window=5, min_periods=1).mean()
+
+    return match_data
+
+
+def add_points_progression(match_data):
+    """
+    Return a copy of a team's match data with cumulative points and xPoints.
+
+    Adds cumulative_points, ppg, xpoints, cumulative_xpoints and xppg columns.
+    """
+    match_data = match_data.copy()
+
+    # Matches played so far; match_number restarts each season
+    played = np.arange(1, len(match_data) + 1)
+
+    match_data['cumulative_points'] = match_data['POINTS'].cumsum()
+    match_data['ppg'] = match_data['cumulative_points'] / played
+
+    # Calculate expected points for each match using Poisson model
+    match_data['xpoints'] = expected_points(match_data['XG_FOR'], match_data['XG_AGAINST'])
+    match_data['cumulative_xpoints'] = match_data['xpoints'].cumsum()
+    match_data['xppg'] = match_data['cumulative_xpoints'] / played
+
+    return match_data
+
+
+def team_percentiles(df):
+    """
+    Percentile rankings (0-100 scale) of the team stats, as a frame of TEAM and
+    the percentile columns with the same index as df.
+
+    Higher percentile = better performance, so xGA metrics are inverted.
+    """
+    return pd.DataFrame({
+        'TEAM': df['TEAM'],
+        'xg90_percentile': df['XG_PER_90'].rank(pct=True) * 100,
+        'xga90_percentile': (1 - df['XGA_PER_90'].rank(pct=True)) * 100,  # Inverted - lower is better
+        'xg_conv_percentile': df['XG_CONVERSION'].rank(pct=True) * 100,
+        'xga_conv_percentile': (1 - df['XGA_CONVERSION'].rank(pct=True)) * 100,  # Inverted - lower is better
+        'ppg_percentile': df['POINTS_PER_GAME'].rank(pct=True) * 100,
+        'xgd90_percentile': df['XGD_PER_90'].rank(pct=True) * 100,
+    })
+
+
+def add_percentiles(df, percentiles=None):
+    """
+    Return the team stats joined with their percentile rankings.
+
+    Pass percentiles (from team_percentiles) to reuse an already computed frame.
+    """
+    if percentiles is None:
+        percentiles = team_percentiles(df)
+    return df.join(percentiles.drop(columns='TEAM'))
+
+
+def recent_form(match_data, n_matches=5):
+    """Form string (e.g. 'WDLWW') for a team's last n matches, most recent last."""
+    if len(match_data) < n_matches:
+        return 'N/A'
+    form = ''
+    for points in match_data['POINTS'].tail(n_matches):
+        if points == 3:
+            form += 'W'
+        elif points == 1:
+            form += 'D'
+        else:
+            form += 'L'
+    return form
+
+
+def build_league_table(df, match_data_by_team):
+    """
+    Build the actual vs expected league table.
+
+    Args:
+        df: Team stats from get_team_stats
+        match_data_by_team: Dict of team name to that team's match-by-match data
+
+    Returns:
+        DataFrame sorted by actual position with EXPECTED_POINTS, ACTUAL_POSITION,
+        EXPECTED_POSITION, POSITION_DIFF, POINTS_DIFF and FORM columns
+    """
+    league_table = df.copy()
+
+    # Calculate expected points using Poisson model
+    def calculate_team_xpoints(team_name):
+        """Calculate total expected points for a team across all matches"""
+        match_data = match_data_by_team[team_name]
+        # Already there when the match data went through add_points_progression
+        if 'xpoints' in match_data:
+            return match_data['xpoints'].sum()
+        if len(match_data) > 0:
+            return expected_points(match_data['XG_FOR'], match_data['XG_AGAINST']).sum()
+        return 0
+
+    # Iterated rather than .apply so a categorical TEAM doesn't give categorical results
+    league_table['EXPECTED_POINTS'] = [calculate_team_xpoints(team) for team in league_table['TEAM']]
+
+    # Calculate goal difference for ranking
+    league_table['GOAL_DIFF'] = league_table['GOALS'] - league_table['GOALS_AGAINST']
+    league_table['XGD'] = league_table['XG'] - league_table['XGA']
+
+    # Calculate positions using points then goal difference (standard football ranking)
+    # Sort by points desc, then goal difference desc, then goals scored desc
+    league_table = league_table.sort_values(
+        by=['TOTAL_POINTS', 'GOAL_DIFF', 'GOALS'],
+        ascending=[False, False, False]
+    ).reset_index(drop=True)
+    league_table['ACTUAL_POSITION'] = range(1, len(league_table) + 1)
+
+    # Sort by expected points, then xGD, then xG for expected position
+    league_table_xg_sorted = league_table.sort_values(
+        by=['EXPECTED_POINTS', 'XGD', 'XG'],
+        ascending=[False, False, False]
+    ).reset_index(drop=True)
+    league_table_xg_sorted['EXPECTED_POSITION'] = range(1, len(league_table_xg_sorted) + 1)
+
+    # Merge expected position back
+    league_table = league_table.merge(
+        league_table_xg_sorted[['TEAM', 'EXPECTED_POSITION']],
+        on='TEAM',
+        how='left'
+    )
+
+    league_table['POSITION_DIFF'] = league_table['EXPECTED_POSITION'] - league_table['ACTUAL_POSITION']
+    league_table['POINTS_DIFF'] = league_table['TOTAL_POINTS'] - league_table['EXPECTED_POINTS']
+
+    # Last 5 match form for each team
+    league_table['FORM'] = [recent_form(match_data_by_team[team]) for team in league_table['TEAM']]
+
+    return league_table
+
+
+def form_results(league_match_data):
+    """
+    Arrange every team's results as aligned team x match arrays.
+
+    Rows follow the sorted team names and columns are right-aligned so the
+    last column is each team's most recent match; teams with fewer matches
+    are padded on the left with NaN (or '' for the text arrays).
+
+    Returns:
+        Dict with teams, points, xg_for, xg_against, result and hover_text arrays
+    """
+    teams, team_idx = np.unique(league_match_data['TEAM'].to_numpy(), return_inverse=True)
+    matches_played = np.bincount(team_idx, minlength=len(teams))
+    n_columns = matches_played.max() if len(teams) else 0
+    # Rows come ordered by team and date; match_number restarts each season
+    match_idx = pd.Series(team_idx).groupby(team_idx).cumcount().to_numpy()
+    column = n_columns - matches_played[team_idx] + match_idx
+
+    def arrange(values, fill):
+        grid = np.full((len(teams), n_columns), fill, dtype=object if fill == '' else float)
+        grid[team_idx, column] = values
+        return grid
+
+    points = league_match_data['POINTS'].to_numpy()
+    xg_for = league_match_data['XG_FOR'].to_numpy(dtype=float)
+    xg_against = league_match_data['XG_AGAINST'].to_numpy(dtype=float)
+    result = np.select([points == 3, points == 1], ['W', 'D'], 'L')
+
+    hover_text = [
+        f"<b>vs {opponent}</b><br>"
+        f"Result: {res} ({goals_for}-{goals_against})<br>"
+        f"xG: {xg:.2f} - {xga:.2f}<br>"
+        f"xGD: {xg - xga:+.2f}<br>"
+        f"Points: {pts}"
+        for opponent, res, goals_for, goals_against, xg, xga, pts in zip(
+            league_match_data['OPPONENT'], result, league_match_data['GOALS_FOR'],
+            league_match_data['GOALS_AGAINST'], xg_for, xg_against, points
+        )
+    ]
+
+    return {
+        'teams': teams,
+        'points': arrange(points, np.nan),
+        'xg_for': arrange(xg_for, np.nan),
+        'xg_against': arrange(xg_against, np.nan),
+        'result': arrange(result, ''),
+        'hover_text': arrange(hover_text, ''),
+    }
+
+
+def shot_quality(shots, bin_width=SHOT_XG_BIN_WIDTH, big_chance_xg=BIG_CHANCE_XG):
+    """
+    Bin grouped shots into team x phase x xG bin arrays, for and against.
+
+    shots has one row per team, opponent, phase and xG to the hundredth, as
+    from database.get_shot_quality, so each side is a few weighted bincounts
+    however many shots there are. Phase 0 is every phase together; shots of
+    1.0 xG fall in the last bin. Shots without a phase count as UNKNOWN_PHASE.
+
+    Returns:
+        Dict with teams, phases and bin_edges, and per side ('for' and
+        'against') shots, xg and goals (team x phase x bin) and big_chances
+        (team x phase) arrays
+    """
+    teams = pd.Index(np.union1d(shots['TEAM'].unique().astype(str), shots['OPPONENT'].unique().astype(str)))
+    # factorize gives a missing phase -1, which would land in the All phases cell
+    phase_idx, phases = pd.factorize(shots['PHASE'].astype(object).fillna(UNKNOWN_PHASE), sort=True)
+    n_teams, n_phases = len(teams), len(phases) + 1
+    bin_cents = round(bin_width * 100)
+    n_bins = int(np.ceil(100 / bin_cents))
+
+    cents = shots['XG_CENTS'].to_numpy(dtype=int)
+    bin_idx = np.minimum(cents // bin_cents, n_bins - 1)
+    counts = shots['SHOTS'].to_numpy(dtype=float)
+    weights = {
+        'shots': counts,
+        'xg': shots['XG'].to_numpy(dtype=float),
+        'goals': shots['GOALS'].to_numpy(dtype=float),
+    }
+    is_big_chance = cents >= round(big_chance_xg * 100)
+
+    def side(team_column):
+        team_idx = teams.get_indexer(shots[team_column])
+        cell = team_idx * n_phases + phase_idx + 1
+        binned = {
+            name: np.bincount(cell * n_bins + bin_idx, weights=values, minlength=n_teams * n_phases * n_bins)
+            .reshape(n_teams, n_phases, n_bins)
+            for name, values in weights.items()
+        }
+        binned['big_chances'] = np.bincount(
+            cell, weights=counts * is_big_chance, minlength=n_teams * n_phases
+        ).reshape(n_teams, n_phases)
+        for values in binned.values():
+            values[:, 0] = values[:, 1:].sum(axis=1)
+        return binned
+
+    return {
+        'teams': teams.to_numpy(dtype=object),
+        'phases': np.concatenate([[ALL_PHASES], np.asarray(phases, dtype=str).astype(object)]),
+        'bin_edges': np.arange(n_bins + 1) * bin_cents / 100,
+        'for': side('TEAM'),
+        'against': side('OPPONENT'),
+    }
+
+
+def shot_quality_summary(quality, matches_played):
+    """
+    One row per team and phase: shots per match, xG per shot and big-chance
+    share, for and against, from shot_quality's arrays.
+
+    Args:
+        quality: Output of shot_quality
+        matches_played: Series of matches played indexed by team
+    """
+    teams, phases = quality['teams'], quality['phases']
+    matches = matches_played.reindex(teams).to_numpy(dtype=float)[:, None]
+
+    columns = {
+        'TEAM': np.repeat(teams, len(phases)),
+        'PHASE': np.tile(phases, len(teams)),
+    }
+    for side, suffix in [('for', ''), ('against', '_AGAINST')]:
+        binned = quality[side]
+        shots = binned['shots'].sum(axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns[f'SHOTS{suffix}'] = shots.ravel()
+            columns[f'SHOTS_PER_MATCH{suffix}'] = (shots / matches).ravel()
+            columns[f'XG_PER_SHOT{suffix}'] = (binned['xg'].sum(axis=2) / shots).ravel()
+            columns[f'BIG_CHANCE_SHARE{suffix}'] = (binned['big_chances'] / shots * 100).ravel()
+            columns[f'CONVERSION{suffix}'] = (binned['goals'].sum(axis=2) / shots * 100).ravel()
+    return pd.DataFrame(columns)
+
+
+def season_of(dates):
+    """Season of each date as its starting year; seasons run from July to June."""
+    dates = pd.to_datetime(dates)
+    return (dates.dt.year - (dates.dt.month < 7)).to_numpy()
+
+
+def season_label(season):
+    """Display name of a season from its starting year, e.g. 2025 as '2025/26'."""
+    return f"{season}/{(season + 1) % 100:02d}"
+
+
+def latest_season_match_data(league_match_data):
+    """The rows of the league match facts in their latest season."""
+    seasons = season_of(league_match_data['dateTime'])
+    return league_match_data[seasons == seasons.max(initial=0)].reset_index(drop=True)
+
+
+def team_season_stats(league_match_data):
+    """
+    Per-match rates for every team in every season of the match facts: one
+    row per TEAM and SEASON with MATCHES and the SIMILARITY_COLUMNS.
+    """
+    return pd.DataFrame({
+        'TEAM': league_match_data['TEAM'].astype(str).to_numpy(),
+        'SEASON': season_of(league_match_data['dateTime']),
+        'XG_FOR': league_match_data['XG_FOR'].to_numpy(dtype=float),
+        'XG_AGAINST': league_match_data['XG_AGAINST'].to_numpy(dtype=float),
+        'GOALS_FOR': league_match_data['GOALS_FOR'].to_numpy(dtype=float),
+        'GOALS_AGAINST': league_match_data['GOALS_AGAINST'].to_numpy(dtype=float),
+        'POINTS': league_match_data['POINTS'].to_numpy(dtype=float),
+    }).groupby(['TEAM', 'SEASON'], as_index=False).agg(
+        MATCHES=('POINTS', 'size'),
+        XG_PER_90=('XG_FOR', 'mean'),
+        XGA_PER_90=('XG_AGAINST', 'mean'),
+        GOALS_PER_90=('GOALS_FOR', 'mean'),
+        GOALS_AGAINST_PER_90=('GOALS_AGAINST', 'mean'),
+        POINTS_PER_GAME=('POINTS', 'mean'),
+    )
+
+
+def similarity_index(team_seasons, columns=SIMILARITY_COLUMNS):
+    """
+    Nearest-neighbour index over team-seasons' metric vectors.
+
+    Each column is standardised (z-scores across every team-season) so the
+    metrics weigh equally, and the rows go into a k-d tree, making a most
+    similar query O(log n) over any number of seasons.
+
+    Args:
+        team_seasons: Output of team_season_stats
+        columns: Metrics to compare on
+
+    Returns:
+        Dict with team_seasons, matrix (the standardised vectors),
+        current_rows (row positions of the latest season's teams), current
+        (each of those teams to its row), tree (every row) and current_tree
+        (the current rows, in current_rows' order)
+    """
+    # scipy is slow to import, load it on the first index build
+    from scipy.spatial import cKDTree
+
+    values = team_seasons[columns].to_numpy(dtype=float)
+    std = values.std(axis=0)
+    matrix = (values - values.mean(axis=0)) / np.where(std > 0, std, 1)
+
+    # Teams without matches in the latest season are not current
+    seasons = team_seasons['SEASON'].to_numpy()
+    current_rows = np.flatnonzero(seasons == seasons.max(initial=0))
+
+    return {
+        'team_seasons': team_seasons,
+        'matrix': matrix,
+        'current_rows': current_rows,
+        'current': dict(zip(team_seasons['TEAM'].to_numpy()[current_rows], current_rows.tolist())),
+        'tree': cKDTree(matrix),
+        'current_tree': cKDTree(matrix[current_rows]),
+    }
+
+
+def most_similar(index, team, n=5, current_only=False):
+    """
+    The n team-seasons closest to a team's season in the latest season,
+    nearest first, excluding that season itself.
+
+    Args:
+        index: Output of similarity_index
+        team: Team name, one of index['current']
+        n: Number of results
+        current_only: Only search other teams in the latest season
+
+    Returns:
+        (row positions into index['team_seasons'], distances) arrays
+    """
+    row = index['current'][team]
+    tree = index['current_tree'] if current_only else index['tree']
+    k = min(n + 1, tree.n)
+    distances, positions = tree.query(index['matrix'][row], k=k)
+    distances, positions = np.atleast_1d(distances), np.atleast_1d(positions)
+    if current_only:
+        positions = index['current_rows'][positions]
+    keep = positions != row
+    return positions[keep][:n], distances[keep][:n]
+
+
+def matchday_columns(league_match_data):
+    """
+    Where each row of the league match facts falls in a matchday index.
+
+    Matchdays are numbered within each season (a team's Nth match of a season
+    is matchday N of it) and the seasons are laid end to end, so the index's
+    columns run season by season.
+
+    Returns:
+        Dict with teams and team_idx (each row's team), seasons (starting
+        years, oldest first), season_bounds (the column before each season's
+        first matchday, then the last column) and column (each row's column,
+        counting from 1)
+    """
+    teams, team_idx = np.unique(league_match_data['TEAM'].astype(str).to_numpy(), return_inverse=True)
+    seasons, season_idx = np.unique(season_of(league_match_data['dateTime']), return_inverse=True)
+    # Rows come ordered by team and date
+    match_number = pd.Series(team_idx).groupby([team_idx, season_idx]).cumcount().to_numpy() + 1
+
+    season_matchdays = np.zeros(len(seasons), dtype=int)
+    np.maximum.at(season_matchdays, season_idx, match_number)
+    season_bounds = np.concatenate([[0], np.cumsum(season_matchdays)])
+
+    return {
+        'teams': teams,
+        'team_idx': team_idx,
+        'seasons': seasons,
+        'season_bounds': season_bounds,
+        'column': season_bounds[season_idx] + match_number,
+    }
+
+
+def matchday_index(league_match_data):
+    """
+    Prefix sums of every team's per-match facts over matchdays, so team stats
+    as they stood after any matchday of a season, or over any run of
+    matchdays, are a lookup or difference of two columns rather than a
+    re-aggregation.
+
+    Columns are matchdays season by season (see matchday_columns), and the
+    sums run on across seasons: a season's stats to a matchday are that
+    column less the column before the season (see season_span).
+
+    Returns:
+        Dict with teams, seasons and season_bounds (from matchday_columns),
+        matchdays (the last column), cumulative (each MATCHDAY_SUMS column,
+        MATCHES and XPOINTS as team x (matchdays + 1) arrays; column 0 is
+        before the first match), points and xpoints per match (team x
+        matchday, NaN where there is no match) and positions (league position
+        in its season after each matchday, ranked as in build_league_table,
+        0 for teams not in that season)
+    """
+    columns = matchday_columns(league_match_data)
+    teams, team_idx, column = columns['teams'], columns['team_idx'], columns['column']
+    n_matchdays = int(columns['season_bounds'][-1])
+
+    per_match = {col: league_match_data[col].to_numpy(dtype=float) for col in MATCHDAY_SUMS}
+    per_match['MATCHES'] = np.ones(len(column))
+    per_match['XPOINTS'] = expected_points(per_match['XG_FOR'], per_match['XG_AGAINST'])
+
+    def by_matchday(values, fill):
+        grid = np.full((len(teams), n_matchdays), fill)
+        grid[team_idx, column - 1] = values
+        return grid
+
+    index = {
+        'teams': teams,
+        'seasons': columns['seasons'],
+        'season_bounds': columns['season_bounds'],
+        'matchdays': n_matchdays,
+        'cumulative': {
+            name: np.concatenate([np.zeros((len(teams), 1)), np.cumsum(by_matchday(values, 0.0), axis=1)], axis=1)
+            for name, values in per_match.items()
+        },
+        'points': by_matchday(per_match['POINTS'], np.nan),
+        'xpoints': by_matchday(per_match['XPOINTS'], np.nan),
+    }
+    index['positions'] = league_positions(index, range(1, n_matchdays + 1))
+    return index
+
+
+def season_position(index, matchday):
+    """Position in index['seasons'] of the season a matchday index column is in."""
+    return int(np.searchsorted(index['season_bounds'], matchday)) - 1
+
+
+def season_span(index, matchday):
+    """
+    The season a matchday index column is in, as (the column before its
+    first matchday, its last column).
+    """
+    season = season_position(index, matchday)
+    return int(index['season_bounds'][season]), int(index['season_bounds'][season + 1])
+
+
+def season_teams(index, matchday):
+    """Rows of the teams with matches in the season a matchday index column is in."""
+    start, end = season_span(index, matchday)
+    matches = index['cumulative']['MATCHES']
+    return np.flatnonzero(matches[:, end] > matches[:, start])
+
+
+def league_positions(index, matchdays):
+    """
+    League position of every team in its season after each of the given
+    matchdays, from a matchday_index's cumulative sums, as a team x
+    len(matchdays) array (0 for teams not in the season).
+    """
+    cumulative = index['cumulative']
+    positions = np.zeros((len(index['teams']), len(matchdays)), dtype=int)
+    for col, matchday in enumerate(matchdays):
+        start, _ = season_span(index, matchday)
+        rows = season_teams(index, matchday)
+        totals = {
+            name: cumulative[name][rows, matchday] - cumulative[name][rows, start]
+            for name in ['POINTS', 'GOALS_FOR', 'GOALS_AGAINST', 'OWN_GOALS_FOR', 'OWN_GOALS_AGAINST', 'XG_FOR']
+        }
+        # Same ordering as build_league_table: points, goal difference, goals, then
+        # xG (the order team stats come in) for teams level on all three
+        goals = totals['GOALS_FOR'] - totals['OWN_GOALS_FOR']
+        goal_diff = goals - (totals['GOALS_AGAINST'] - totals['OWN_GOALS_AGAINST'])
+        order = np.lexsort((-totals['XG_FOR'], -goals, -goal_diff, -totals['POINTS']))
+        positions[rows[order], col] = np.arange(1, len(rows) + 1)
+    return positions
+
+
+def side_match_facts(totals, venue, xpoints):
+    """
+    One side's per-match facts (MATCHDAY_SUMS, MATCHES and XPOINTS), as
+    summed by matchday_index, from a match's home and away totals.
+
+    Args:
+        totals: Mapping of HOME_ and AWAY_ XG, GOALS (the score, own goals
+            included), OWN_GOALS (scored by that side), SET_PIECE_XG and
+            SET_PIECE_GOALS
+        venue: 'H' or 'A'
+        xpoints: The side's expected points, from expected_points
+    """
+    side, other = ('HOME', 'AWAY') if venue == 'H' else ('AWAY', 'HOME')
+    goals_for, goals_against = totals[f"{side}_GOALS"], totals[f"{other}_GOALS"]
+    return {
+        'POINTS': 3.0 if goals_for > goals_against else (1.0 if goals_for == goals_against else 0.0),
+        'GOALS_FOR': goals_for,
+        'GOALS_AGAINST': goals_against,
+        'OWN_GOALS_FOR': totals[f"{other}_OWN_GOALS"],
+        'OWN_GOALS_AGAINST': totals[f"{side}_OWN_GOALS"],
+        'XG_FOR': totals[f"{side}_XG"],
+        'XG_AGAINST': totals[f"{other}_XG"],
+        'SET_PIECE_XG_FOR': totals[f"{side}_SET_PIECE_XG"],
+        'SET_PIECE_XG_AGAINST': totals[f"{other}_SET_PIECE_XG"],
+        'SET_PIECE_GOALS_FOR': totals[f"{side}_SET_PIECE_GOALS"],
+        'SET_PIECE_GOALS_AGAINST': totals[f"{other}_SET_PIECE_GOALS"],
+        'MATCHES': 1.0,
+        'XPOINTS': float(xpoints),
+    }
+
+
+def add_matchday_team(index, team):
+    """Add a team with no matches to a writable matchday_index, returning its row."""
+    index['teams'] = np.append(index['teams'], team)
+    for name, values in index['cumulative'].items():
+        index['cumulative'][name] = np.vstack([values, np.zeros((1, values.shape[1]))])
+    for name, fill in [('points', np.nan), ('xpoints', np.nan), ('positions', 0)]:
+        index[name] = np.vstack([index[name], np.full((1, index[name].shape[1]), fill, dtype=index[name].dtype)])
+    return len(index['teams']) - 1
+
+
+def add_matchday_season(index, season):
+    """Start a new season, with no matchdays yet, at the end of a writable matchday_index."""
+    index['seasons'] = np.append(index['seasons'], season)
+    index['season_bounds'] = np.append(index['season_bounds'], index['season_bounds'][-1])
+
+
+def update_matchday_index(index, row, matchday, before, after):
+    """
+    Apply the change in one team's facts for one match to a writable
+    matchday_index in place: the difference is added to that team's
+    cumulative sums from the matchday on, so no other match is re-summed.
+    League positions are left for the caller to re-rank (league_positions).
+
+    Args:
+        index: Writable matchday_index
+        row: The team's row
+        matchday: The match's column for the team (see matchday_columns),
+            at most one past the index's last, which opens a matchday at the
+            end of the last season
+        before: side_match_facts before the change, None for a new match
+        after: side_match_facts after it
+    """
+    if matchday > index['matchdays']:
+        # A match past every team's last one opens a matchday column
+        for name, values in index['cumulative'].items():
+            index['cumulative'][name] = np.hstack([values, values[:, -1:]])
+        for name, fill in [('points', np.nan), ('xpoints', np.nan), ('positions', 0)]:
+            index[name] = np.hstack([index[name], np.full((len(index[name]), 1), fill, dtype=index[name].dtype)])
+        index['matchdays'] = index['season_bounds'][-1] = matchday
+
+    for name, values in index['cumulative'].items():
+        values[row, matchday:] += after[name] - (before[name] if before is not None else 0.0)
+    index['points'][row, matchday - 1] = after['POINTS']
+    index['xpoints'][row, matchday - 1] = after['XPOINTS']
+
+
+def team_stats_as_of(index, matchday, since=None):
+    """
+    Team stats over matchday columns since+1 to matchday (the season to that
+    matchday by default) from a matchday_index, for the teams in that season,
+    with the columns of the get_team_stats query before ranks, sorted by xG
+    like it.
+    """
+    if since is None:
+        since, _ = season_span(index, matchday)
+    rows = season_teams(index, matchday)
+    totals = {name: values[rows, matchday] - values[rows, since] for name, values in index['cumulative'].items()}
+    matches_played = totals['MATCHES']
+    per_match = np.where(matches_played > 0, matches_played, np.nan)
+
+    # GOALS_FOR includes the opponent's own goals, the team stats goals don't
+    goals = totals['GOALS_FOR'] - totals['OWN_GOALS_FOR']
+    goals_against = totals['GOALS_AGAINST'] - totals['OWN_GOALS_AGAINST']
+    xg, xga = totals['XG_FOR'], totals['XG_AGAINST']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = pd.DataFrame({
+            'TEAM': index['teams'][rows],
+            'MATCHES_PLAYED': matches_played,
+            'TOTAL_POINTS': totals['POINTS'],
+            'POINTS_PER_GAME': totals['POINTS'] / per_match,
+            'GOALS': goals,
+            'XG': xg,
+            'OPEN_PLAY_XG': xg - totals['SET_PIECE_XG_FOR'],
+            'SET_PIECE_XG': totals['SET_PIECE_XG_FOR'],
+            'OPEN_PLAY_GOALS': goals - totals['SET_PIECE_GOALS_FOR'],
+            'SET_PIECE_GOALS': totals['SET_PIECE_GOALS_FOR'],
+            'XG_PER_90': xg / per_match,
+            'XG_CONVERSION': np.where(xg > 0, goals / xg, 0),
+            'GOALS_AGAINST': goals_against,
+            'XGA': xga,
+            'OPEN_PLAY_XGA': xga - totals['SET_PIECE_XG_AGAINST'],
+            'SET_PIECE_XGA': totals['SET_PIECE_XG_AGAINST'],
+            'OPEN_PLAY_GOALS_AGAINST': goals_against - totals['SET_PIECE_GOALS_AGAINST'],
+            'SET_PIECE_GOALS_AGAINST': totals['SET_PIECE_GOALS_AGAINST'],
+            'XGA_PER_90': xga / per_match,
+            'XGA_CONVERSION': np.where(xga > 0, goals_against / xga, 0),
+            'XGD': xg - xga,
+            'XGD_PER_90': (xg - xga) / per_match,
+        })
+    return df.sort_values('XG', ascending=False, kind='mergesort').reset_index(drop=True)
+
+
+def league_table_as_of(index, df, matchday):
+    """
+    build_league_table for team stats from team_stats_as_of, taking each
+    team's xPoints and form in the season up to the matchday from the index.
+    """
+    start, _ = season_span(index, matchday)
+    rows = {team: row for row, team in enumerate(index['teams'])}
+    match_data_by_team = {}
+    for team in df['TEAM']:
+        row = rows[team]
+        played = int(index['cumulative']['MATCHES'][row, matchday] - index['cumulative']['MATCHES'][row, start])
+        # A team's matches fill the first columns of its season
+        match_data_by_team[team] = pd.DataFrame({
+            'POINTS': index['points'][row, start:start + played],
+            'xpoints': index['xpoints'][row, start:start + played],
+        })
+    return build_league_table(df, match_data_by_team)
+
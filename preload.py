@@ -0,0 +1,57 @@
+"""
+Background data preload while the login screen is shown
+
+The Snowflake connection, team stats and league match facts are loaded in a
+worker thread as soon as a session shows the password screen, so the
+warehouse round trips overlap with the time spent typing the password. The
+loaders are the usual cached functions, so the post-login render reads the
+warm cache.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+
+PRELOAD_KEY = '_data_preload'
+
+
+@st.cache_resource
+def get_preload_executor():
+    """One small worker pool per process, shared by every session."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix='data-preload')
+
+
+def preload_data():
+    """Fill the data caches. Runs in the worker thread."""
+    # Imported here so pandas and Snowflake load off the login screen's critical path
+    from database import (
+        DATA_BACKEND, get_snowflake_connection, get_team_stats, get_league_match_data, get_data_version
+    )
+    from bundle import current_bundle
+
+    # With an analytics bundle this just loads the bundle
+    if DATA_BACKEND == 'snowflake' and current_bundle() is None:
+        get_snowflake_connection()
+    get_team_stats()
+    get_data_version()
+    get_league_match_data()
+
+
+def start_data_preload():
+    """Start loading data in the background, once per session."""
+    if PRELOAD_KEY not in st.session_state:
+        st.session_state[PRELOAD_KEY] = get_preload_executor().submit(preload_data)
+
+
+def wait_for_preload():
+    """
+    Block until this session's preload (if any) has finished.
+
+    Errors are left for the normal load path to raise and report, so the
+    user sees the same message as without preloading.
+    """
+    future = st.session_state.pop(PRELOAD_KEY, None)
+    if future is None:
+        return
+    try:
+        future.result()
+    except Exception:
+        pass
@@ -0,0 +1,209 @@
+"""
+Per-rerun timing spans for the dashboard
+
+Sections of app.py are wrapped in `span(name)` (or decorated with
+`timed(name)`) to record how long each takes, nested by depth. Each rerun's
+spans are kept in session state for the last MAX_RERUNS reruns; fragment
+reruns are recorded as their own entries. Recording only happens for admin
+sessions, who get a sidebar panel with a flame-style breakdown and an export
+in Chrome trace format (chrome://tracing, ui.perfetto.dev).
+"""
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+import streamlit as st
+
+PROFILE_KEY = '_profiling'
+MAX_RERUNS = 10
+
+# Span colours, assigned by name so a section keeps its colour across reruns
+SPAN_COLORS = ['#4A90E2', '#FF6F00', '#00C853', '#AB47BC', '#FFD600', '#26C6DA', '#EF5350', '#8D6E63']
+
+
+def _state():
+    """This session's profiling state."""
+    if PROFILE_KEY not in st.session_state:
+        st.session_state[PROFILE_KEY] = {
+            'enabled': False,
+            'history': deque(maxlen=MAX_RERUNS),
+            'current': None,
+            'depth': 0,
+            'count': 0,
+        }
+    return st.session_state[PROFILE_KEY]
+
+
+def _open_rerun(state, label):
+    state['count'] += 1
+    state['current'] = {
+        'id': state['count'],
+        'label': label,
+        'started_at': time.time(),
+        'start': time.perf_counter(),
+        'spans': [],
+    }
+    state['depth'] = 0
+    return state['current']
+
+
+def _close_rerun(state, label_suffix=''):
+    rerun = state['current']
+    rerun['duration'] = time.perf_counter() - rerun['start']
+    rerun['label'] += label_suffix
+    state['history'].append(rerun)
+    state['current'] = None
+
+
+def start_rerun(enabled):
+    """Begin recording a full app rerun (a no-op unless enabled)."""
+    state = _state()
+    # A rerun cut short by st.rerun never reached finish_rerun
+    if state['current'] is not None:
+        _close_rerun(state, ' (interrupted)')
+    state['enabled'] = enabled
+    if enabled:
+        _open_rerun(state, 'app')
+
+
+def finish_rerun():
+    """Finish recording the current full app rerun."""
+    state = _state()
+    if state['current'] is not None:
+        _close_rerun(state)
+
+
+@contextmanager
+def span(name):
+    """
+    Time the enclosed block as a named span of the current rerun.
+
+    Outside a full rerun (a fragment rerunning on its own) the span starts
+    its own entry in the history.
+    """
+    state = _state()
+    if not state['enabled']:
+        yield
+        return
+
+    own_rerun = state['current'] is None
+    rerun = _open_rerun(state, name) if own_rerun else state['current']
+    depth = state['depth']
+    state['depth'] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        state['depth'] = depth
+        rerun['spans'].append({
+            'name': name,
+            'depth': depth,
+            'start': start - rerun['start'],
+            'duration': time.perf_counter() - start,
+        })
+        if own_rerun:
+            _close_rerun(state)
+
+
+def timed(name):
+    """Decorator recording every call of a function as a span."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def chrome_trace(history):
+    """Reruns and their spans as Chrome trace event JSON."""
+    events = []
+    for rerun in history:
+        base = rerun['started_at'] * 1e6
+        events.append({
+            'name': f"Rerun {rerun['id']}: {rerun['label']}", 'ph': 'X',
+            'ts': base, 'dur': rerun['duration'] * 1e6, 'pid': 1, 'tid': 1,
+        })
+        for s in rerun['spans']:
+            events.append({
+                'name': s['name'], 'ph': 'X',
+                'ts': base + s['start'] * 1e6, 'dur': s['duration'] * 1e6, 'pid': 1, 'tid': 1,
+            })
+    return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+
+def build_flame_figure(rows, spans):
+    """
+    Horizontal flame-style bars: one bar per span, positioned at its start.
+
+    Args:
+        rows: Row label for each span
+        spans: Span dicts with name, start and duration (seconds)
+    """
+    import plotly.graph_objects as go
+
+    names = [s['name'] for s in spans]
+    palette = {name: SPAN_COLORS[i % len(SPAN_COLORS)] for i, name in enumerate(dict.fromkeys(names))}
+    fig = go.Figure(go.Bar(
+        orientation='h',
+        y=rows,
+        base=[s['start'] * 1000 for s in spans],
+        x=[s['duration'] * 1000 for s in spans],
+        marker=dict(color=[palette[name] for name in names], line=dict(color='#0e1117', width=1)),
+        text=names,
+        textposition='inside',
+        insidetextanchor='start',
+        hovertemplate='<b>%{text}</b><br>%{x:.1f} ms<extra></extra>',
+    ))
+    fig.update_layout(
+        plot_bgcolor='#0e1117',
+        paper_bgcolor='#0e1117',
+        font=dict(color='#ffffff', size=10),
+        height=80 + 28 * len(set(rows)),
+        margin=dict(l=10, r=10, t=10, b=30),
+        xaxis=dict(title='ms', gridcolor='#2a2a2a'),
+        yaxis=dict(type='category', autorange='reversed'),
+        showlegend=False,
+        bargap=0.1,
+    )
+    return fig
+
+
+def render_profiling_panel():
+    """Admin sidebar panel: recent reruns, a flame breakdown of one, and export."""
+    state = _state()
+    history = list(state['history'])
+
+    st.markdown("---")
+    st.markdown("### ⏱️ Rerun Profile")
+    if not history:
+        st.caption("No reruns recorded yet")
+        return
+
+    # Top-level sections of every recent rerun, one row per rerun
+    top_level = [(rerun, s) for rerun in history for s in rerun['spans'] if s['depth'] == 0]
+    st.plotly_chart(
+        build_flame_figure([f"#{rerun['id']}" for rerun, _ in top_level], [s for _, s in top_level]),
+        use_container_width=True
+    )
+
+    reruns = {rerun['id']: rerun for rerun in history}
+    rerun_id = st.selectbox(
+        "Breakdown",
+        options=list(reversed(reruns)),
+        format_func=lambda i: f"#{i} {reruns[i]['label']} · {reruns[i]['duration'] * 1000:.0f} ms",
+        key='_profile_rerun'
+    )
+    spans = reruns[rerun_id]['spans']
+    if spans:
+        st.plotly_chart(build_flame_figure([f"depth {s['depth']}" for s in spans], spans), use_container_width=True)
+
+    st.download_button(
+        "Export spans",
+        data=chrome_trace(history),
+        file_name="dashboard_spans.json",
+        mime="application/json",
+        help="Chrome trace format: open in chrome://tracing or ui.perfetto.dev"
+    )
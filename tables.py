@@ -0,0 +1,297 @@
+"""
+Cached table construction for the dashboard
+
+Tables and their cell styles are computed once per data version and shared by
+every rerun and session until the data changes. Styles are whole-column CSS
+arrays built with numpy, so rendering applies them to a Styler in one call
+rather than calling a Python function per cell.
+"""
+import numpy as np
+import pandas as pd
+from database import get_matchday_index, get_team_stats_as_of, cache_shared, MAX_CACHED_MATCHDAYS
+from bundle import current_bundle
+from metrics import league_table_as_of, season_label
+
+LEFT_CELL = 'text-align: left; padding: 8px;'
+CENTER_CELL = 'text-align: center; padding: 8px;'
+SELECTED_ROW = 'background-color: #4A90E2; color: white; font-weight: bold;'
+
+# (label, value column, value format, rank column)
+ATTACK_METRICS = [
+    ('Goals', 'GOALS', '.0f', 'goals_rank'),
+    ('xG', 'XG', '.2f', 'xg_rank'),
+    ('Open Play xG', 'OPEN_PLAY_XG', '.2f', 'open_play_xg_rank'),
+    ('Set Piece xG', 'SET_PIECE_XG', '.2f', 'set_piece_xg_rank'),
+    ('Set Piece Goals', 'SET_PIECE_GOALS', '.0f', 'set_piece_goals_rank'),
+    ('xG per 90', 'XG_PER_90', '.2f', 'xg_per_90_rank'),
+    ('xG Conversion', 'XG_CONVERSION', '.3f', 'xg_conversion_rank'),
+]
+
+DEFEND_METRICS = [
+    ('Goals Against', 'GOALS_AGAINST', '.0f', 'goals_against_rank'),
+    ('xG Against', 'XGA', '.2f', 'xga_rank'),
+    ('Open Play xGA', 'OPEN_PLAY_XGA', '.2f', 'open_play_xga_rank'),
+    ('Set Piece xGA', 'SET_PIECE_XGA', '.2f', 'set_piece_xga_rank'),
+    ('Set Piece GA', 'SET_PIECE_GOALS_AGAINST', '.0f', 'set_piece_goals_against_rank'),
+    ('xGA per 90', 'XGA_PER_90', '.2f', 'xga_per_90_rank'),
+    ('xGA Conversion', 'XGA_CONVERSION', '.3f', 'xga_conversion_rank'),
+]
+
+
+def rank_styles(ranks, max_rank=24):
+    """
+    Rank colour CSS for an array of ranks, from bright green (best) to red (worst).
+    """
+    normalized = (np.asarray(ranks, dtype=float) - 1) / (max_rank - 1)
+    bands = [normalized < 0.2, normalized < 0.4, normalized < 0.6, normalized < 0.8]
+    colors = np.select(bands, ['#00C853', '#64DD17', '#FFD600', '#FF6F00'], '#D32F2F')
+    text_colors = np.where(normalized < 0.6, '#000000', '#ffffff')
+    return np.char.add(np.char.add(np.char.add('background-color: ', colors), '; color: '),
+                       np.char.add(text_colors, '; font-weight: bold;'))
+
+
+def position_diff_styles(position_diff):
+    """Position difference CSS: red when underperforming xG, green when overperforming."""
+    position_diff = np.asarray(position_diff)
+    return np.select(
+        [position_diff > 0, position_diff < 0],
+        ['background-color: #D32F2F; color: white; font-weight: bold;',
+         'background-color: #00C853; color: black; font-weight: bold;'],
+        'background-color: #333333; color: white;'
+    )
+
+
+def points_diff_styles(points_diff):
+    """Points difference CSS banded at +/-2 points, matching the displayed 2dp values."""
+    points_diff = np.round(np.asarray(points_diff, dtype=float), 2)
+    return np.select(
+        [points_diff > 2, points_diff > 0, points_diff < -2, points_diff < 0],
+        ['background-color: #00C853; color: black; font-weight: bold;',
+         'background-color: #64DD17; color: black; font-weight: bold;',
+         'background-color: #D32F2F; color: white; font-weight: bold;',
+         'background-color: #FF6F00; color: white; font-weight: bold;'],
+        'background-color: #333333; color: white;'
+    )
+
+
+def build_stat_table(df, metrics):
+    """
+    Long Metric/Value/Rank table for every team, with a CSS column per display column.
+    """
+    max_rank = len(df)
+    parts = []
+    for order, (label, value_col, value_format, rank_col) in enumerate(metrics):
+        parts.append(pd.DataFrame({
+            'TEAM': df['TEAM'].to_numpy(),
+            'ORDER': order,
+            'Metric': label,
+            'Value': [f"{value:{value_format}}" for value in df[value_col]],
+            'Rank': df[rank_col].to_numpy(),
+            'Rank_css': np.char.add(rank_styles(df[rank_col], max_rank), CENTER_CELL),
+        }))
+    table = pd.concat(parts, ignore_index=True).sort_values(['TEAM', 'ORDER'], kind='stable')
+    table['Metric_css'] = LEFT_CELL
+    table['Value_css'] = CENTER_CELL
+    return table.reset_index(drop=True)
+
+
+@cache_shared(max_entries=MAX_CACHED_MATCHDAYS, show_spinner=False)
+def get_team_stat_tables(data_version, matchday=None):
+    """
+    Attacking and defensive stat tables for every team, one build per data
+    version (and matchday, when as of one).
+    """
+    df = get_team_stats_as_of(data_version, matchday)
+    return {
+        'attack': build_stat_table(df, ATTACK_METRICS),
+        'defend': build_stat_table(df, DEFEND_METRICS),
+    }
+
+
+def style_precomputed(display, css_values):
+    """Apply precomputed CSS (an array shaped like display) in a single Styler call."""
+    return display.style.apply(lambda _: css_values, axis=None)
+
+
+def team_stats_display(stat_table, team):
+    """One team's Metric/Value/Rank display frame and its cell CSS from a build_stat_table frame."""
+    rows = stat_table[stat_table['TEAM'] == team]
+    display = rows[['Metric', 'Value', 'Rank']].reset_index(drop=True)
+    return display, rows[['Metric_css', 'Value_css', 'Rank_css']].to_numpy()
+
+
+def style_team_stats(stat_table, team):
+    """Styled Metric/Value/Rank table for one team from a build_stat_table frame."""
+    return style_precomputed(*team_stats_display(stat_table, team))
+
+
+def team_stat_table(data_version, kind, team, matchday=None):
+    """Styled Metric/Value/Rank table for one team ('attack' or 'defend')."""
+    return style_team_stats(get_team_stat_tables(data_version, matchday)[kind], team)
+
+
+def format_league_table(league_table):
+    """
+    League Table display frame and its cell CSS from metrics.build_league_table,
+    without the selected team highlight.
+    """
+    # Prepare display dataframe
+    display_table = league_table[[
+        'ACTUAL_POSITION', 'TEAM', 'MATCHES_PLAYED', 'TOTAL_POINTS',
+        'EXPECTED_POINTS', 'POINTS_DIFF', 'EXPECTED_POSITION', 'POSITION_DIFF',
+        'GOALS', 'GOALS_AGAINST', 'XG', 'XGA', 'FORM'
+    ]].copy()
+
+    display_table.columns = [
+        'Pos', 'Team', 'P', 'Pts', 'xPts', 'Pts Diff', 'xPos', 'Pos Diff',
+        'GF', 'GA', 'xGF', 'xGA', 'Form'
+    ]
+
+    # Format numbers - remove trailing zeros
+    display_table['xPts'] = display_table['xPts'].apply(lambda x: f"{x:.2f}".rstrip('0').rstrip('.'))
+    display_table['Pts Diff'] = display_table['Pts Diff'].apply(lambda x: f"{x:+.2f}".rstrip('0').rstrip('.'))
+    display_table['Pos Diff'] = display_table['Pos Diff'].apply(lambda x: f"{x:+d}" if x != 0 else "–")
+    display_table['xGF'] = display_table['xGF'].apply(lambda x: f"{x:.2f}".rstrip('0').rstrip('.'))
+    display_table['xGA'] = display_table['xGA'].apply(lambda x: f"{x:.2f}".rstrip('0').rstrip('.'))
+
+    # Cell styles
+    css = pd.DataFrame(CENTER_CELL, index=display_table.index, columns=display_table.columns)
+    css['Team'] = LEFT_CELL
+    css['Pos Diff'] = np.char.add(position_diff_styles(league_table['POSITION_DIFF']), CENTER_CELL)
+    css['Pts Diff'] = np.char.add(points_diff_styles(league_table['POINTS_DIFF']), CENTER_CELL)
+
+    return display_table, css
+
+
+def league_table_css(display_table, css, selected_team):
+    """League Table cell CSS with the selected team's row highlighted."""
+    css_values = css.to_numpy(dtype=object, copy=True)
+    selected = display_table['Team'].to_numpy() == selected_team
+    # Position/points diff colours stay visible on the highlighted row
+    css_values[selected] = SELECTED_ROW + css_values[selected]
+    return css_values
+
+
+def style_league_table(display_table, css, selected_team):
+    """League Table Styler with the selected team's row highlighted."""
+    return style_precomputed(display_table, league_table_css(display_table, css, selected_team))
+
+
+@cache_shared(max_entries=MAX_CACHED_MATCHDAYS, show_spinner=False)
+def compute_league_table_as_of(data_version, matchday):
+    """Actual vs expected league table as it stood after a matchday, from the matchday index."""
+    return league_table_as_of(
+        get_matchday_index(data_version), get_team_stats_as_of(data_version, matchday), matchday
+    )
+
+
+def get_league_table_data(data_version, matchday=None):
+    """
+    Actual vs expected league table for the latest season to date, or as it
+    stood after a matchday. The analytics bundle has the latest season's
+    table and each season's after its last matchday.
+    """
+    bundle = current_bundle()
+    # Live revisions have their own data version, so they never match the bundle's
+    if bundle is not None and data_version == bundle['version']:
+        if matchday is None:
+            return bundle['league_table']
+        if matchday in bundle.get('league_table_by_matchday', {}):
+            return bundle['league_table_by_matchday'][matchday]
+    if matchday is None:
+        matchday = get_matchday_index(data_version)['matchdays']
+    return compute_league_table_as_of(data_version, matchday)
+
+
+@cache_shared(max_entries=MAX_CACHED_MATCHDAYS, show_spinner=False)
+def get_league_table(data_version, matchday=None):
+    """
+    League Table display frame (actual vs expected) and its cell CSS,
+    one per data version and matchday.
+    """
+    return format_league_table(get_league_table_data(data_version, matchday))
+
+
+def styled_league_table(data_version, selected_team, matchday=None):
+    """League Table Styler for the current data with the selected team highlighted."""
+    display_table, css = get_league_table(data_version, matchday)
+    return style_league_table(display_table, css, selected_team)
+
+
+def match_results_table(match_data):
+    """Match Results display frame (one row per match) for a team's match data."""
+    # Prepare display dataframe with rolling averages
+    display_df = match_data[['match_number', 'OPPONENT', 'GOALS_FOR', 'GOALS_AGAINST', 'XG_FOR', 'XG_AGAINST', 'xg_rolling_5', 'xga_rolling_5', 'POINTS']].copy()
+    display_df.columns = ['Match', 'Opponent', 'GF', 'GA', 'xG', 'xGA', 'xG (R5)', 'xGA (R5)', 'Pts']
+    display_df['Result'] = np.select([display_df['Pts'] == 3, display_df['Pts'] == 1], ['W', 'D'], 'L')
+    display_df = display_df[['Match', 'Opponent', 'Result', 'GF', 'GA', 'xG', 'xGA', 'xG (R5)', 'xGA (R5)', 'Pts']]
+
+    # Format numbers
+    return display_df.round({'xG': 2, 'xGA': 2, 'xG (R5)': 2, 'xGA (R5)': 2})
+
+
+def live_matches_table(matches):
+    """Live Matches display frame (one row per match) from live mode's followed matches."""
+    def pair(home, away, fmt):
+        return [f"{h:{fmt}} - {a:{fmt}}" for h, a in zip(matches[home], matches[away])]
+
+    return pd.DataFrame({
+        'Kick-off': pd.to_datetime(matches['dateTime']).dt.strftime('%a %H:%M'),
+        'Home': matches['homeSquadName'],
+        'Score': pair('HOME_GOALS', 'AWAY_GOALS', '.0f'),
+        'Away': matches['awaySquadName'],
+        'xG': pair('HOME_XG', 'AWAY_XG', '.2f'),
+        'xPts': pair('HOME_XPOINTS', 'AWAY_XPOINTS', '.2f'),
+    })
+
+
+def phase_label(phase):
+    """Display name of a phase, e.g. 'SET_PIECE' as 'Set piece'."""
+    return phase.replace('_', ' ').capitalize()
+
+
+SHOT_QUALITY_COLUMNS = {
+    'SHOTS_PER_MATCH': 'Shots/Match',
+    'XG_PER_SHOT': 'xG/Shot',
+    'BIG_CHANCE_SHARE': 'Big Chance %',
+    'CONVERSION': 'Conv. %',
+    'SHOTS_PER_MATCH_AGAINST': 'Shots Faced/Match',
+    'XG_PER_SHOT_AGAINST': 'xGA/Shot',
+    'BIG_CHANCE_SHARE_AGAINST': 'Big Chances Faced %',
+    'CONVERSION_AGAINST': 'Opp. Conv. %',
+}
+
+
+def shot_quality_table(summary, team=None, phase=None):
+    """
+    Shot quality display frame from metrics.shot_quality_summary: one team's
+    phases (team given) or every team in one phase (phase given), the latter
+    sorted by xG per shot.
+    """
+    if team is not None:
+        rows = summary[summary['TEAM'] == team]
+        display_df = pd.DataFrame({'Phase': rows['PHASE'].map(phase_label)})
+    else:
+        rows = summary[summary['PHASE'] == phase].sort_values('XG_PER_SHOT', ascending=False)
+        display_df = pd.DataFrame({'Team': rows['TEAM']})
+
+    for column, label in SHOT_QUALITY_COLUMNS.items():
+        decimals = 3 if column.startswith('XG_PER_SHOT') else 1
+        display_df[label] = rows[column].round(decimals)
+    return display_df.reset_index(drop=True)
+
+
+def similar_teams_table(similar):
+    """Most Similar Teams display frame from figures.similar_teams."""
+    display_df = pd.DataFrame({
+        'Team': similar['TEAM'],
+        'Season': similar['SEASON'].map(season_label),
+        'Distance': similar['DISTANCE'].round(2),
+        'MP': similar['MATCHES'],
+        'xG/90': similar['XG_PER_90'].round(2),
+        'xGA/90': similar['XGA_PER_90'].round(2),
+        'Goals/90': similar['GOALS_PER_90'].round(2),
+        'GA/90': similar['GOALS_AGAINST_PER_90'].round(2),
+        'PPG': similar['POINTS_PER_GAME'].round(2),
+    })
+    return display_df.reset_index(drop=True)
@@ -0,0 +1,52 @@
+"""
+Shot quality binning: shots without a phase count towards every total
+"""
+import numpy as np
+import pandas as pd
+
+import local_backend
+from metrics import ALL_PHASES, UNKNOWN_PHASE, shot_quality
+
+
+def test_shots_without_a_phase_are_kept(tmp_path):
+    path = str(tmp_path / 'events.parquet')
+    pd.DataFrame({
+        'matchId': [1, 1],
+        'dateTime': pd.to_datetime(['2024-08-10 15:00', '2024-08-10 15:00']),
+        'squadName': ['Home FC', 'Home FC'],
+        'homeSquadName': ['Home FC', 'Home FC'],
+        'awaySquadName': ['Away FC', 'Away FC'],
+        'phase': ['OPEN_PLAY', None],
+        'SHOT_XG': [0.1, 0.5],
+        'GOALS': [0, 0],
+        'OWNGOALS': [0, 0],
+    }).to_parquet(path)
+
+    shots = local_backend.query_shot_quality(path)
+    assert shots['PHASE'].tolist() == ['OPEN_PLAY', UNKNOWN_PHASE]
+
+    quality = shot_quality(shots)
+    team, phases = list(quality['teams']).index('Home FC'), list(quality['phases'])
+    shots_for, xg_for = quality['for']['shots'][team], quality['for']['xg'][team]
+    assert shots_for[phases.index(ALL_PHASES)].sum() == 2
+    assert np.isclose(xg_for[phases.index(ALL_PHASES)].sum(), 0.6)
+    assert shots_for[phases.index('OPEN_PLAY')].sum() == 1
+    assert np.isclose(xg_for[phases.index(UNKNOWN_PHASE)].sum(), 0.5)
+
+
+def test_missing_phase_in_grouped_shots():
+    # Shots grouped before NULL phases were coalesced
+    shots = pd.DataFrame({
+        'TEAM': ['Home FC', 'Home FC'],
+        'OPPONENT': ['Away FC', 'Away FC'],
+        'PHASE': ['OPEN_PLAY', None],
+        'XG_CENTS': [10, 50],
+        'SHOTS': [1, 1],
+        'XG': [0.1, 0.5],
+        'GOALS': [0, 0],
+    })
+
+    quality = shot_quality(shots)
+    team, phases = list(quality['teams']).index('Home FC'), list(quality['phases'])
+    assert quality['for']['shots'][team, phases.index(ALL_PHASES)].sum() == 2
+    assert np.isclose(quality['for']['xg'][team, phases.index(ALL_PHASES)].sum(), 0.6)